@@ -16,7 +16,7 @@ import socket
 from datetime import datetime, timezone
 from functools import wraps
 from logging import Logger
-from typing import NoReturn, Union
+from typing import Callable, Iterable, NoReturn, Union
 
 from grpc import ServicerContext
 from manager.configuration import get_logger
@@ -145,13 +145,32 @@ class ArtifactManagerServicer(BluePrintManagementServiceServicer):
 
     processing_started_at = None
 
-    def __init__(self) -> NoReturn:
+    def __init__(self, blueprint_listeners: Iterable[Callable[[str, str], None]] = ()) -> NoReturn:
         """Instance of ArtifactManagerServer class initialization.
 
         Create logger for class using class name and set configuration property.
+        :param blueprint_listeners: callables invoked with blueprint name and version
+            once a blueprint was uploaded or removed (eg. to invalidate caches of the blueprint)
         """
         self.logger: Logger = get_logger(self.__class__.__name__)
         self.repository: Repository = RepositoryStrategy.get_reporitory()
+        self.blueprint_listeners = list(blueprint_listeners)
+
+    def notify_blueprint_changed(self, name: str, version: str) -> NoReturn:
+        """Call the blueprint listeners after an upload or a removal.
+
+        A failing listener is logged and does not fail the request.
+        :param name: Blueprint name
+        :param version: Blueprint version
+        """
+        for listener in self.blueprint_listeners:
+            try:
+                listener(name, version)
+            except Exception:
+                self.logger.exception(
+                    "Blueprint listener failed - blueprintName={} blueprintVersion={}".format(name, version),
+                    extra={"mdc": MDC.result()},
+                )
 
     def fill_MDC_timestamps(self, status_code: int = 200) -> NoReturn:
         """Add MDC context timestamps "in place".
@@ -204,6 +223,7 @@ class ArtifactManagerServicer(BluePrintManagementServiceServicer):
         self.repository.upload_blueprint(
             request.fileChunk.chunk, request.actionIdentifiers.blueprintName, request.actionIdentifiers.blueprintVersion
         )
+        self.notify_blueprint_changed(request.actionIdentifiers.blueprintName, request.actionIdentifiers.blueprintVersion)
         self.fill_MDC_timestamps()
         self.logger.info(
             "Blueprint upload successfuly processed - blueprintName={} blueprintVersion={}".format(
@@ -227,6 +247,7 @@ class ArtifactManagerServicer(BluePrintManagementServiceServicer):
         self.repository.remove_blueprint(
             request.actionIdentifiers.blueprintName, request.actionIdentifiers.blueprintVersion
         )
+        self.notify_blueprint_changed(request.actionIdentifiers.blueprintName, request.actionIdentifiers.blueprintVersion)
         self.fill_MDC_timestamps()
         self.logger.info(
             "Blueprint removal successfuly processed - blueprintName={} blueprintVersion={}".format(
@@ -194,3 +194,41 @@ def test_servicer_remove_handler_success(grpc_stub):
         output: BluePrintManagementOutput = grpc_stub.removeBlueprint(request)
     assert output.status.code == 200
     assert output.status.message == "success"
+
+
+def test_servicer_blueprint_listeners():
+    """Test servicer blueprint listeners are called after upload and removal."""
+    calls = []
+
+    def failing_listener(name, version):
+        raise RuntimeError("listener failure")
+
+    servicer = ArtifactManagerServicer(blueprint_listeners=(failing_listener, lambda *args: calls.append(args)))
+
+    action_identifiers: ActionIdentifiers = ActionIdentifiers()
+    action_identifiers.blueprintName = "sample-cba"
+    action_identifiers.blueprintVersion = "1.0.0"
+
+    file_chunk = FileChunk()
+    file_chunk.chunk = ZIP_FILE_BINARY
+
+    # fmt: off
+    with patch.object(os, "makedirs", return_value=None), \
+            patch.object(manager.utils, 'ZipFile', return_value=MockZipFile()):
+        request: BluePrintUploadInput = BluePrintUploadInput(fileChunk=file_chunk, actionIdentifiers=action_identifiers)
+        output: BluePrintManagementOutput = servicer.uploadBlueprint(request, None)
+    # fmt: on
+    assert output.status.code == 200
+    assert calls == [("sample-cba", "1.0.0")]
+
+    with patch.object(shutil, "rmtree", return_value=None):
+        request: BluePrintRemoveInput = BluePrintRemoveInput(actionIdentifiers=action_identifiers)
+        output: BluePrintManagementOutput = servicer.removeBlueprint(request, None)
+    assert output.status.code == 200
+    assert calls == [("sample-cba", "1.0.0"), ("sample-cba", "1.0.0")]
+
+    # A failed upload does not change the blueprint
+    request: BluePrintUploadInput = BluePrintUploadInput(actionIdentifiers=action_identifiers)
+    output: BluePrintManagementOutput = servicer.uploadBlueprint(request, None)
+    assert output.status.code == 500
+    assert len(calls) == 2
@@ -35,6 +35,24 @@ then
   export PROMETHEUS_METRICS_ENABLED=false
 fi
 
+if [ -z "${VENV_TEMPLATE_POOL_SIZE}" ]
+then
+  echo "VENV_TEMPLATE_POOL_SIZE environment variable is not set, using default(2)."
+  export VENV_TEMPLATE_POOL_SIZE=2
+fi
+
+if [ -z "${RESPONSE_TAIL_KB}" ]
+then
+  echo "RESPONSE_TAIL_KB environment variable is not set, using default(512)."
+  export RESPONSE_TAIL_KB=512
+fi
+
+if [ -z "${ASYNC_SERVER_ENABLED}" ]
+then
+  echo "ASYNC_SERVER_ENABLED environment variable is not set, using default(false)."
+  export ASYNC_SERVER_ENABLED=false
+fi
+
 if [ -z "${BASIC_AUTH}" ]
 then
   echo "BASIC_AUTH environment variable is not set, using default."
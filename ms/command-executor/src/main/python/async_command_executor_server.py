@@ -0,0 +1,114 @@
+#!/usr/bin/python
+
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+import asyncio
+import os
+import utils
+
+from command_executor_server import CommandExecutorServer, prepare_envs_groups
+from server_metrics import MeteredSemaphore
+
+# concurrent calls allowed per RPC, beyond that calls wait for a slot (executeCommandStream counts as executeCommand)
+MAX_CONCURRENT_CALLS_DEFAULTS = {
+    'uploadBlueprint': ('MAX_CONCURRENT_UPLOAD_BLUEPRINT', '16'),
+    'prepareEnv': ('MAX_CONCURRENT_PREPARE_ENV', '8'),
+    'executeCommand': ('MAX_CONCURRENT_EXECUTE_COMMAND', '1000'),
+}
+
+
+# CommandExecutorServer for the grpc.aio server (see ASYNC_SERVER_ENABLED).
+# Commands run as asyncio subprocesses, so an execution only costs a coroutine while it waits for its script;
+# uploadBlueprint and prepareEnv (unzip, pip) keep running in the loop default executor.
+# Must be created from within the running event loop.
+class AsyncCommandExecutorServer(CommandExecutorServer):
+
+    def __init__(self):
+        super().__init__()
+        self.limits = {}
+        for rpc, (env_var, default) in MAX_CONCURRENT_CALLS_DEFAULTS.items():
+            self.limits[rpc] = MeteredSemaphore(int(os.environ.get(env_var, default)), rpc)
+
+    async def uploadBlueprint(self, request, context):
+        async with self.limits['uploadBlueprint']:
+            return await asyncio.get_event_loop().run_in_executor(None, super().uploadBlueprint, request, context)
+
+    async def prepareEnv(self, request, context):
+        async with self.limits['prepareEnv']:
+            return await asyncio.get_event_loop().run_in_executor(None, super().prepareEnv, request, context)
+
+    async def prepareEnvs(self, request, context):
+        extra = utils.getExtraLogData(request)
+        groups = prepare_envs_groups(request.environments)
+        self.logger.info("Received prepareEnvs request for {} environments ({} blueprints)".format(len(request.environments), len(groups)), extra=extra)
+        slots = asyncio.Semaphore(self.prepare_envs_concurrency(request, groups))
+
+        async def prepare(group):
+            async with slots:
+                try:
+                    return group, await self.prepareEnv(group[0], context)
+                except Exception as err:
+                    return group, self.prepare_env_error(group[0], err, extra)
+
+        tasks = [asyncio.ensure_future(prepare(group)) for group in groups]
+        try:
+            completed = 0
+            for task in asyncio.as_completed(tasks):
+                group, result = await task
+                for environment in group:
+                    completed += 1
+                    yield utils.build_grpc_prepare_envs_progress(request.requestId, environment.identifiers, result, completed, len(request.environments))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def getEnvironments(self, request, context):
+        return super().getEnvironments(request, context)
+
+    async def executeCommand(self, request, context):
+        blueprint_id = utils.blueprint_name_version_uuid(request)
+        extra = utils.getExtraLogData(request)
+        self.logger.info("{} - Received executeCommand request".format(blueprint_id), extra=extra)
+        if os.environ.get('CE_DEBUG','false') == "true":
+            self.logger.info(request, extra=extra)
+
+        cache_key, cache_ttl = self.result_cache.request_key(request, blueprint_id)
+        if cache_key is not None:
+            cached_output = self.result_cache.get(cache_key, request.requestId)
+            self.service.prometheus_cache_counter.labels('execution_result', 'miss' if cached_output is None else 'hit').inc()
+            if cached_output is not None:
+                self.logger.info("{} - Returning cached executeCommand output".format(blueprint_id), extra=extra)
+                return cached_output
+
+        async with self.limits['executeCommand']:
+            handler = self.new_handler(request)
+            with self.executing(handler):
+                exec_cmd_response = await handler.execute_command_async(request)
+        ret = self.build_execute_command_response(request, exec_cmd_response, extra)
+        if cache_key is not None:
+            self.result_cache.put(cache_key, ret, cache_ttl)
+        return ret
+
+    async def executeCommandStream(self, request, context):
+        blueprint_id = utils.blueprint_name_version_uuid(request)
+        extra = utils.getExtraLogData(request)
+        self.logger.info("{} - Received executeCommandStream request".format(blueprint_id), extra=extra)
+        if os.environ.get('CE_DEBUG','false') == "true":
+            self.logger.info(request, extra=extra)
+
+        async with self.limits['executeCommand']:
+            handler = self.new_handler(request)
+            with self.executing(handler):
+                async for kind, data in handler.execute_command_stream_async(request):
+                    yield self.build_execute_command_stream_response(request, kind, data, extra)
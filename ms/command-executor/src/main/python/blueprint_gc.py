@@ -0,0 +1,180 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import contextlib
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+import prometheus_client as prometheus
+import utils
+
+# name prefix of the dirs renamed aside before being deleted
+EVICTED_PREFIX = '.evicted-'
+# staging dirs of uploads (see CommandExecutorHandler.UPLOAD_STAGING_PREFIX) older than that were abandoned
+STALE_UPLOAD_AGE = 3600
+
+
+# Evicts the least recently used deployed blueprints (<deploy dir>/<name>/<version>/<uuid>, CBA files and venv)
+# when they exceed max_size bytes or max_entries (0: no limit). A blueprint is used when it is executed:
+# execute_command touches its dir (and records it in the environment registry). Blueprints in use (see using()) are never evicted; an evicted blueprint is
+# uploaded again by the blueprint processor on its next use.
+class BlueprintGarbageCollector():
+
+    def __init__(self, deploy_dir, max_size=0, max_entries=0, interval=300, upload_staging_prefix='.upload-', warm_worker_pool=None,
+                 environment_registry=None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.deploy_dir = deploy_dir
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.interval = interval
+        self.upload_staging_prefix = upload_staging_prefix
+        self.warm_worker_pool = warm_worker_pool
+        self.environment_registry = environment_registry
+        self.lock = threading.Lock()
+        # blueprint dir -> number of requests using it
+        self.in_use = {}
+        self.thread = None
+        self.metrics = get_prometheus_metrics()
+
+    def is_enabled(self):
+        return self.max_size > 0 or self.max_entries > 0
+
+    def start(self):
+        if not self.is_enabled() or self.thread is not None:
+            return
+        self.logger.info("Starting blueprint garbage collector on {} (max size: {}, max entries: {})".format(self.deploy_dir, self.max_size, self.max_entries),
+                         extra=utils.getExtraLogData())
+        self.thread = threading.Thread(target=self.run, name=self.__class__.__name__, daemon=True)
+        self.thread.start()
+
+    @contextlib.contextmanager
+    def using(self, blueprint_dir):
+        blueprint_dir = os.path.normpath(blueprint_dir)
+        with self.lock:
+            self.in_use[blueprint_dir] = self.in_use.get(blueprint_dir, 0) + 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.in_use[blueprint_dir] -= 1
+                if self.in_use[blueprint_dir] <= 0:
+                    del self.in_use[blueprint_dir]
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.collect()
+            except Exception as err:
+                self.logger.error("Blueprint garbage collection failed. Error: {}".format(err), extra=utils.getExtraLogData())
+
+    def collect(self):
+        blueprints = []
+        for version_dir, entry in self.list_blueprint_dirs():
+            path = os.path.join(version_dir, entry.name)
+            if entry.name.startswith(EVICTED_PREFIX) or \
+                    (entry.name.startswith(self.upload_staging_prefix) and time.time() - entry.stat().st_mtime > STALE_UPLOAD_AGE):
+                shutil.rmtree(path, ignore_errors=True)
+            elif not entry.name.startswith('.'):
+                size = tree_size(path)
+                last_used = entry.stat().st_mtime
+                if self.environment_registry is not None:
+                    blueprint_id = self.blueprint_id(path)
+                    self.environment_registry.measured(blueprint_id, size)
+                    # uses more recent than the dir mtime resolution
+                    last_used = max(last_used, self.environment_registry.last_used(blueprint_id))
+                blueprints.append((last_used, size, path))
+
+        total_size = sum(size for _, size, _ in blueprints)
+        count = len(blueprints)
+        # least recently used first
+        for _, size, path in sorted(blueprints):
+            if self.max_size > 0 and total_size > self.max_size:
+                reason = 'size'
+            elif self.max_entries > 0 and count > self.max_entries:
+                reason = 'entries'
+            else:
+                break
+            if not self.evict(path):
+                self.metrics['skipped'].inc()
+                continue
+            self.metrics['evictions'].labels(reason).inc()
+            self.metrics['evicted_bytes'].inc(size)
+            total_size -= size
+            count -= 1
+        self.metrics['blueprints'].set(count)
+        self.metrics['blueprints_bytes'].set(total_size)
+
+    def list_blueprint_dirs(self):
+        for name_entry in scan_dirs(self.deploy_dir):
+            for version_entry in scan_dirs(name_entry.path):
+                for entry in scan_dirs(version_entry.path):
+                    yield version_entry.path, entry
+
+    def blueprint_id(self, path):
+        return os.path.relpath(path, self.deploy_dir)
+
+    # Returns False when the blueprint is in use.
+    def evict(self, path):
+        evicted_path = os.path.join(os.path.dirname(path), EVICTED_PREFIX + uuid.uuid4().hex)
+        with self.lock:
+            if os.path.normpath(path) in self.in_use:
+                return False
+            # renamed while holding the lock: a request starting now finds no blueprint rather than half of it
+            os.rename(path, evicted_path)
+            if self.environment_registry is not None:
+                self.environment_registry.removed(self.blueprint_id(path))
+        self.logger.info("Evicting blueprint {}".format(path), extra=utils.getExtraLogData())
+        if self.warm_worker_pool is not None:
+            self.warm_worker_pool.evict(path)
+        shutil.rmtree(evicted_path, ignore_errors=True)
+        return True
+
+
+def scan_dirs(path):
+    try:
+        with os.scandir(path) as entries:
+            return [entry for entry in entries if entry.is_dir(follow_symlinks=False)]
+    except FileNotFoundError:
+        return []
+
+
+def tree_size(path):
+    size = 0
+    for dir_path, dir_names, file_names in os.walk(path):
+        for name in file_names:
+            try:
+                size += os.lstat(os.path.join(dir_path, name)).st_size
+            except OSError:
+                pass
+    return size
+
+
+def get_prometheus_metrics():
+    metrics = getattr(prometheus.REGISTRY, '_command_executor_gc_metrics', None)
+    if not metrics:
+        metrics = {
+            'evictions': prometheus.Counter('cds_ce_blueprint_evictions_total',
+                                            'How many deployed CBAs were evicted, by reason (size or entries quota)', ['reason']),
+            'evicted_bytes': prometheus.Counter('cds_ce_blueprint_evicted_bytes_total', 'Disk space freed by evicting deployed CBAs'),
+            'skipped': prometheus.Counter('cds_ce_blueprint_eviction_skipped_total', 'How many times a CBA to evict was skipped because it was in use'),
+            'blueprints': prometheus.Gauge('cds_ce_deployed_blueprints', 'Number of deployed CBAs after the last garbage collection'),
+            'blueprints_bytes': prometheus.Gauge('cds_ce_deployed_blueprints_bytes', 'Disk space used by the deployed CBAs after the last garbage collection'),
+        }
+        prometheus.REGISTRY._command_executor_gc_metrics = metrics
+    return metrics
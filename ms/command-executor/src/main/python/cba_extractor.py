@@ -0,0 +1,189 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from concurrent import futures
+import gzip
+import io
+import os
+import shutil
+import tarfile
+import zipfile
+
+COPY_BUFFER_SIZE = 64 * 1024
+# below that, extracting in the calling thread is cheaper than dispatching
+PARALLEL_MIN_MEMBERS = 8
+
+
+class CbaExtractionError(Exception):
+    pass
+
+
+# Read-only, seekable file object over a memoryview: archives are read straight from the gRPC message buffer,
+# and every extraction thread gets its own reader (position) over the same memory.
+class MemoryViewReader(io.RawIOBase):
+
+    def __init__(self, view):
+        self.view = view
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = len(self.view) + offset
+        else:
+            raise ValueError("invalid whence {}".format(whence))
+        if self.position < 0:
+            if whence == io.SEEK_SET:
+                raise ValueError("negative seek position {}".format(offset))
+            # same as BytesIO: relative seeks before the start stop at the start
+            self.position = 0
+        return self.position
+
+    def read(self, size=-1):
+        end = len(self.view) if size is None or size < 0 else self.position + size
+        data = self.view[self.position:end].tobytes()
+        self.position += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.view[self.position:self.position + len(buffer)]
+        size = len(data)
+        buffer[:size] = data
+        self.position += size
+        return size
+
+
+# Extracts CBA archives (CBA_ZIP: zip, CBA_GZIP: gzip'ed tar, or a gzip'ed zip) into a directory.
+# Zip members are spread over a small thread pool (zlib releases the GIL), their CRC is checked as they are read.
+class CbaExtractor():
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.executor = futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=self.__class__.__name__) if max_workers > 1 else None
+
+    # sync: fsync the extracted files and directories before returning
+    def extract(self, data, archive_type, target_dir, sync=False):
+        view = memoryview(data)
+        if archive_type == "CBA_ZIP":
+            self.extract_zip(view, target_dir, sync)
+        elif archive_type == "CBA_GZIP":
+            self.extract_gzip(view, target_dir, sync)
+        else:
+            raise CbaExtractionError("Archive type {} is not valid.".format(archive_type))
+        if sync:
+            fsync_dirs(target_dir)
+
+    def extract_zip(self, view, target_dir, sync=False):
+        with zipfile.ZipFile(MemoryViewReader(view)) as archive:
+            members = archive.infolist()
+            for info in members:
+                path = member_path(target_dir, info.filename)
+                os.makedirs(path if info.is_dir() else os.path.dirname(path), mode=0o755, exist_ok=True)
+            files = [info for info in members if not info.is_dir()]
+            if self.executor is None or len(files) < PARALLEL_MIN_MEMBERS:
+                extract_zip_members(archive, files, target_dir, sync)
+                return
+        tasks = [self.executor.submit(extract_zip_members_from, view, bucket, target_dir, sync)
+                 for bucket in balance(files, self.max_workers) if bucket]
+        for task in tasks:
+            task.result()
+
+    def extract_gzip(self, view, target_dir, sync=False):
+        try:
+            # streaming mode: members are extracted as the gzip stream is inflated
+            with tarfile.open(fileobj=MemoryViewReader(view), mode='r|gz') as archive:
+                for member in archive:
+                    extract_tar_member(archive, member, target_dir, sync)
+            return
+        except tarfile.ReadError:
+            pass
+        # not a tar: a gzip'ed zip
+        with gzip.GzipFile(fileobj=MemoryViewReader(view)) as stream:
+            self.extract_zip(memoryview(stream.read()), target_dir, sync)
+
+
+# Resolves an archive member name under target_dir, refusing absolute paths and '..' escapes.
+def member_path(target_dir, name):
+    parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.')]
+    if name.startswith('/') or '..' in parts:
+        raise CbaExtractionError("Illegal path in archive: {}".format(name))
+    return os.path.join(target_dir, *parts)
+
+
+# Splits the members in 'count' lists of about the same uncompressed size.
+def balance(members, count):
+    buckets = [[] for _ in range(count)]
+    sizes = [0] * count
+    for info in sorted(members, key=lambda i: i.file_size, reverse=True):
+        index = sizes.index(min(sizes))
+        buckets[index].append(info)
+        sizes[index] += info.file_size
+    return buckets
+
+
+def extract_zip_members_from(view, members, target_dir, sync=False):
+    with zipfile.ZipFile(MemoryViewReader(view)) as archive:
+        extract_zip_members(archive, members, target_dir, sync)
+
+
+def extract_zip_members(archive, members, target_dir, sync=False):
+    for info in members:
+        # ZipExtFile checks the CRC when the member has been read completely (raises BadZipFile)
+        with archive.open(info) as src, open(member_path(target_dir, info.filename), 'wb') as dst:
+            shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+            if sync:
+                dst.flush()
+                os.fsync(dst.fileno())
+
+
+def extract_tar_member(archive, member, target_dir, sync=False):
+    path = member_path(target_dir, member.name)
+    if member.isdir():
+        os.makedirs(path, mode=0o755, exist_ok=True)
+    elif member.isfile():
+        os.makedirs(os.path.dirname(path), mode=0o755, exist_ok=True)
+        with archive.extractfile(member) as src, open(path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+            if sync:
+                dst.flush()
+                os.fsync(dst.fileno())
+        os.chmod(path, member.mode & 0o755 | 0o644)
+    else:
+        raise CbaExtractionError("Unsupported member type in archive: {}".format(member.name))
+
+
+def fsync_dirs(path):
+    for dir_path, _, _ in os.walk(path):
+        fsync_dir(dir_path)
+
+
+def fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -2,10 +2,29 @@ import json
 from email.mime import multipart
 from email.mime import text
 import email.parser
+import os
+import struct
 import sys
 
+# When run by the command executor, results are sent as frames to the file named by this variable
+# (type byte, 4 bytes big endian length, UTF-8 JSON), see utils.ResultChannel.
+RESULT_FILE_ENV = "CDS_RESULT_FILE"
+RESULT_FRAME_HEADER = struct.Struct('>cI')
+
+
+def send_result_frame(frame_type, data):
+    result_file = os.environ.get(RESULT_FILE_ENV)
+    if not result_file:
+        return False
+    encoded = json.dumps(data).encode()
+    with open(result_file, "ab") as f:
+        f.write(RESULT_FRAME_HEADER.pack(frame_type, len(encoded)) + encoded)
+    return True
+
 
 def send_response_data_payload(json_payload):
+    if send_result_frame(b'P', json_payload):
+        return
     m = multipart.MIMEMultipart("form-data")
     data = text.MIMEText("response_payload", "json", "utf8")
     data.set_payload(json.JSONEncoder().encode(json_payload))
@@ -16,13 +35,14 @@ def send_response_data_payload(json_payload):
 
 
 def send_response_err_msg(ret_err_msg):
+    # anything printable is accepted, as with the print() protocol (e.g. an exception)
+    if send_result_frame(b'E', str(ret_err_msg)):
+        return
     print("BEGIN_EXTRA_RET_ERR_MSG")
     print(ret_err_msg)
     print("END_EXTRA_RET_ERR_MSG")
 
 
 def send_response_err_msg_and_exit(ret_err_msg, code=1):
-    print("BEGIN_EXTRA_RET_ERR_MSG")
-    print(ret_err_msg)
-    print("END_EXTRA_RET_ERR_MSG")
+    send_response_err_msg(ret_err_msg)
     sys.exit(code)
@@ -14,36 +14,55 @@
 # limitations under the License.
 #
 from builtins import Exception, open, dict
+from concurrent import futures
 from subprocess import CalledProcessError, PIPE, TimeoutExpired
 from google.protobuf.json_format import MessageToJson
+import asyncio
 import tempfile
 import logging
 import os
 import sys
 import re
 import subprocess
+import threading
 import venv
 import utils
 import proto.CommandExecutor_pb2 as CommandExecutor_pb2
-from zipfile import ZipFile
-import io
+from zipfile import BadZipFile
+import tarfile
+import uuid
+import zlib
 import time
-import prometheus_client as prometheus
 import shlex
+import shutil
+from install_plan import InstallPlan, copy_roles
+import environment_registry
+import execution_resources
+from cba_extractor import CbaExtractionError, fsync_dir
 
 REQUIREMENTS_TXT = "requirements.txt"
+CDS_UTILS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cds_utils')
 
 
 class CommandExecutorHandler():
     BLUEPRINTS_DEPLOY_DIR = '/opt/app/onap/blueprints/deploy/'
     TOSCA_META_FILE = 'TOSCA-Metadata/TOSCA.meta'
+    # uploads are extracted in <name>/<version>/.upload-<random> then renamed to <name>/<version>/<uuid>
+    UPLOAD_STAGING_PREFIX = '.upload-'
     PROMETHEUS_METRICS_UPLOAD_CBA_LABEL = 'upload_cba'
     PROMETHEUS_METRICS_PREP_ENV_LABEL = 'prepare_env'
     PROMETHEUS_METRICS_EXEC_COMMAND_LABEL = 'execute_command'
 
-    def __init__(self, request):
+    logger = logging.getLogger('CommandExecutorHandler')
+    # per-request state only, anything shared across requests lives in the CommandExecutorService
+    __slots__ = ('request', 'service', 'blueprint_name', 'blueprint_version', 'uuid', 'request_id', 'sub_request_id',
+                 'blueprint_name_version', 'blueprint_name_version_uuid', 'execution_timeout', 'blueprint_dir',
+                 'blueprint_tosca_meta_file', 'extra', 'installed', 'venv_from_template')
+
+    # service: the CommandExecutorService of the server, shared by all the requests
+    def __init__(self, request, service):
         self.request = request
-        self.logger = logging.getLogger(self.__class__.__name__)
+        self.service = service
         self.blueprint_name = utils.get_blueprint_name(request)
         self.blueprint_version = utils.get_blueprint_version(request)
         self.uuid = utils.get_blueprint_uuid(request)
@@ -59,51 +78,22 @@ class CommandExecutorHandler():
         self.blueprint_tosca_meta_file = self.blueprint_dir + '/' + self.TOSCA_META_FILE
         self.extra = utils.getExtraLogData(request)
         self.installed = self.blueprint_dir + '/.installed'
-        self.prometheus_histogram = self.get_prometheus_histogram()
-        self.prometheus_counter = self.get_prometheus_counter()
-        self.start_prometheus_server()
-
-    def get_prometheus_histogram(self):
-        histogram = getattr(prometheus.REGISTRY, '_command_executor_histogram', None)
-        if not histogram:
-            histogram = prometheus.Histogram('cds_ce_execution_duration_seconds',
-                             'How many times CE actions (upload, prepare env and execute) got executed and how long it took to complete for each CBA python script.',
-                             ['step', 'blueprint_name', 'blueprint_version', 'script_name'])
-            prometheus.REGISTRY._command_executor_histogram = histogram
-        return histogram
-
-    def get_prometheus_counter(self):
-        counter = getattr(prometheus.REGISTRY, '_command_executor_counter', None)
-        if not counter:
-            counter = prometheus.Counter('cds_ce_execution_error_total',
-                              'How many times CE actions (upload, prepare env and execute) got executed and failed for each CBA python script',
-                              ['step', 'blueprint_name', 'blueprint_version', 'script_name'])
-            prometheus.REGISTRY._command_executor_counter = counter
-        return counter
-
-    def start_prometheus_server(self):
-        self.logger.info("PROMETHEUS_METRICS_ENABLED: {}".format(os.environ.get('PROMETHEUS_METRICS_ENABLED')), extra=self.extra)
-        if (os.environ.get('PROMETHEUS_METRICS_ENABLED')):
-           if not "PROMETHEUS_PORT" in os.environ:
-              err_msg = "ERROR: failed to start prometheus server, PROMETHEUS_PORT env variable is not found."
-              self.logger.error(err_msg, extra=self.extra)
-              return utils.build_ret_data(False, results_log=[], error=err_msg)
-
-           server_started = getattr(prometheus.REGISTRY, '_command_executor_prometheus_server_started', None)
-           if not server_started:
-               self.logger.info("PROMETHEUS_PORT: {}".format(os.environ.get('PROMETHEUS_PORT')), extra=self.extra)
-               prometheus.start_http_server(int(os.environ.get('PROMETHEUS_PORT')))
-               prometheus.REGISTRY._command_executor_prometheus_server_started = True
+        self.venv_from_template = False
 
     def is_installed(self):
-        return os.path.exists(self.installed)
+        return self.service.environment_registry.state(self.blueprint_name_version_uuid) == environment_registry.INSTALLED
 
     def blueprint_dir_exists(self):
-        return os.path.exists(self.blueprint_dir)
+        return self.service.environment_registry.state(self.blueprint_name_version_uuid) is not None
 
     # used to validate if the blueprint actually had a chace of getting uploaded
     def blueprint_tosca_meta_file_exists(self):
-        return os.path.exists(self.blueprint_tosca_meta_file)
+        return self.service.environment_registry.state(self.blueprint_name_version_uuid) in (environment_registry.UPLOADED, environment_registry.INSTALLED)
+
+    # touch blueprint dir to indicate this CBA was used recently
+    def mark_used(self):
+        if self.service.environment_registry.used(self.blueprint_name_version_uuid):
+            os.utime(self.blueprint_dir)
 
     def err_exit(self, msg):
         self.logger.error(msg, extra=self.extra)
@@ -116,58 +106,84 @@ class CommandExecutorHandler():
     # accept UploadBlueprintInput (CommandExecutor.proto) struct
     # create dir blueprintName/BlueprintVersion/BlueprintUUID, and extract binData as either ZIP file or GZIP
     # based on archiveType field...
+    # Concurrent uploads of the same blueprint share a single extraction.
     def uploadBlueprint(self, request):
+        return self.service.blueprint_flight.do(self.blueprint_name_version_uuid, lambda: self.upload_blueprint_once(request), kind=self.PROMETHEUS_METRICS_UPLOAD_CBA_LABEL)
+
+    def upload_blueprint_once(self, request):
         start_time = time.time()
         archive_type = request.archiveType
-        compressed_cba_stream = io.BytesIO(request.binData)
-        ### request_copy = request.pop("binData") # Do not show binData of the uploaded compressed CBA in the log
-        ### self.logger.info("uploadBlueprint request\n{}".format(request_copy), extra=self.extra)
-        self.logger.info("uploadBlueprint request\n{}".format(request), extra=self.extra)
+        # Do not show binData of the uploaded compressed CBA in the log (nor copy it to do so)
+        self.logger.info("uploadBlueprint request\n{}binData: <{} bytes>".format(utils.message_without_fields(request, ['binData']), len(request.binData)),
+                         extra=self.extra)
         if not self.is_valid_archive_type(archive_type):
-            self.prometheus_counter.labels(self.PROMETHEUS_METRICS_UPLOAD_CBA_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
+            self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_UPLOAD_CBA_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
             return utils.build_grpc_blueprint_upload_response(self.request_id, self.sub_request_id, False, ["Archive type {} is not valid.".format(archive_type)])
-        
-        # create the BP dir self.blueprint_dir
+
+        # the blueprint dir only appears complete (see below): same UUID, same content, nothing to do
+        if self.blueprint_tosca_meta_file_exists():
+            self.logger.info("CBA directory {} already exists on cmd-exec, skipping extraction.".format(self.blueprint_name_version_uuid), extra=self.extra)
+            return utils.build_grpc_blueprint_upload_response(self.request_id, self.sub_request_id, True, [])
+
+        # extract into a staging dir next to the BP dir self.blueprint_dir, then rename it into place
+        staging_dir = "{}{}{}".format(os.path.dirname(self.blueprint_dir) + '/', self.UPLOAD_STAGING_PREFIX, uuid.uuid4().hex)
         try:
-            os.makedirs(name=self.blueprint_dir, mode=0o755, exist_ok=True)
+            os.makedirs(name=staging_dir, mode=0o755)
         except OSError as ex:
-            self.prometheus_counter.labels(self.PROMETHEUS_METRICS_UPLOAD_CBA_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
-            err_msg = "Failed to create blueprint dir: {} exception message: {}".format(self.blueprint_dir, ex.strerror)
+            self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_UPLOAD_CBA_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
+            err_msg = "Failed to create blueprint dir: {} exception message: {}".format(staging_dir, ex.strerror)
+            self.logger.error(err_msg, extra=self.extra)
+            return utils.build_grpc_blueprint_upload_response(self.request_id, self.sub_request_id, False, [err_msg])
+        self.logger.info("Extracting {} data to dir {}".format(archive_type, staging_dir), extra=self.extra)
+        try:
+            self.service.cba_extractor.extract(request.binData, archive_type, staging_dir, sync=True)
+            self.logger.info("Done extracting {} data to dir {}".format(archive_type, staging_dir), extra=self.extra)
+            self.move_blueprint_dir_into_place(staging_dir)
+        except (IOError, EOFError, zlib.error, BadZipFile, tarfile.TarError, CbaExtractionError) as e:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_UPLOAD_CBA_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
+            err_msg = "Error extracting {} data to dir {} exception: {}".format(archive_type, self.blueprint_dir, e)
             self.logger.error(err_msg, extra=self.extra)
             return utils.build_grpc_blueprint_upload_response(self.request_id, self.sub_request_id, False, [err_msg])
-        if archive_type=="CBA_ZIP":
-            self.logger.info("Extracting ZIP data to dir {}".format(self.blueprint_dir), extra=self.extra)
-            try:
-                with ZipFile(compressed_cba_stream,'r') as zipfile:
-                    zipfile.extractall(self.blueprint_dir)                    
-                self.logger.info("Done extracting ZIP data to dir {}".format(self.blueprint_dir), extra=self.extra)
-            except (IOError, zipfile.error) as e:
-                self.prometheus_counter.labels(self.PROMETHEUS_METRICS_UPLOAD_CBA_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
-                err_msg = "Error extracting ZIP data to dir {} exception: {}".format(self.blueprint_dir, e)
-                self.logger.error(err_msg, extra=self.extra)
-                return utils.build_grpc_blueprint_upload_response(self.request_id, self.sub_request_id, False, [err_msg])
-        # TODO with an actual test gzip cba...
-        elif archive_type=="CBA_GZIP":
-            self.prometheus_counter.labels(self.PROMETHEUS_METRICS_UPLOAD_CBA_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
-            self.logger.error("CBA_GZIP TODO", extra=self.extra)
-            return utils.build_grpc_blueprint_upload_response(self.request_id, self.sub_request_id, False, ["Error extracting GZIP data to {} GZIP todo!".format(self.blueprint_dir)])
         # Finally, everything is ok!
-        self.prometheus_histogram.labels(self.PROMETHEUS_METRICS_UPLOAD_CBA_LABEL, self.blueprint_name, self.blueprint_version, None).observe(time.time() - start_time)
+        self.service.prometheus_histogram.labels(self.PROMETHEUS_METRICS_UPLOAD_CBA_LABEL, self.blueprint_name, self.blueprint_version, None).observe(time.time() - start_time)
         return utils.build_grpc_blueprint_upload_response(self.request_id, self.sub_request_id, True, [])
 
+    def move_blueprint_dir_into_place(self, staging_dir):
+        # a blueprint dir without TOSCA meta is the leftover of an interrupted (pre-staging) upload: replace it
+        if self.blueprint_dir_exists() and not self.blueprint_tosca_meta_file_exists():
+            self.logger.info("Replacing incomplete CBA directory {}".format(self.blueprint_dir), extra=self.extra)
+            stale_dir = "{}{}{}".format(os.path.dirname(self.blueprint_dir) + '/', self.UPLOAD_STAGING_PREFIX, uuid.uuid4().hex)
+            os.rename(self.blueprint_dir, stale_dir)
+            self.service.environment_registry.removed(self.blueprint_name_version_uuid)
+            shutil.rmtree(stale_dir, ignore_errors=True)
+        try:
+            os.rename(staging_dir, self.blueprint_dir)
+        except OSError:
+            # uploaded concurrently by another process
+            if not os.path.exists(self.blueprint_tosca_meta_file):
+                raise
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        fsync_dir(os.path.dirname(self.blueprint_dir))
+        self.service.environment_registry.uploaded(self.blueprint_name_version_uuid)
+
+    # Concurrent prepare_env calls for the same blueprint share the result of the first one.
     def prepare_env(self, request):
+        return self.service.blueprint_flight.do(self.blueprint_name_version_uuid, lambda: self.prepare_env_once(request), kind=self.PROMETHEUS_METRICS_PREP_ENV_LABEL)
+
+    def prepare_env_once(self, request):
         results_log = []
         start_time = time.time()
 
         self.logger.info("prepare_env request {}".format(request), extra=self.extra)
         # validate that the blueprint name in the request exists, if not, notify the caller
         if not self.blueprint_dir_exists():
-            self.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
+            self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
             err_msg = "CBA directory {} not found on cmd-exec. CBA will be uploaded by BP proc.".format(self.blueprint_name_version_uuid)
             self.logger.info(err_msg, extra=self.extra)
             return utils.build_ret_data(False, results_log=results_log, error=err_msg, reupload_cba=True)
         if not self.blueprint_tosca_meta_file_exists():
-            self.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
+            self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
             err_msg = "CBA directory {} exists on cmd-exec, but TOSCA meta file is not found!!! Returning (null) as UUID. CBA will be uploaded by BP proc.".format(self.blueprint_name_version_uuid)
             self.logger.info(err_msg, extra=self.extra)
             return utils.build_ret_data(False, results_log=results_log, error=err_msg, reupload_cba=True)
@@ -176,45 +192,49 @@ class CommandExecutorHandler():
         if not self.is_installed():
             create_venv_status = self.create_venv()
             if not create_venv_status[utils.CDS_IS_SUCCESSFUL_KEY]:
-                self.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
+                self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
                 return self.err_exit("ERROR: failed to prepare environment for request {} due to error in creating virtual Python env. Original error {}".format(self.blueprint_name_version_uuid, create_venv_status[utils.ERR_MSG_KEY]))
 
             # Upgrade pip - venv comes with PIP 18.1, which is too old.
             if not self.upgrade_pip(results_log):
-                self.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
+                self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
                 err_msg = "ERROR: failed to prepare environment for request {} due to error in upgrading pip.".format(self.blueprint_name_version_uuid)
                 return utils.build_ret_data(False, results_log=results_log, error=err_msg)
 
             try:
                 # NOTE: pip or ansible selection is done later inside 'install_packages'
+                plan = InstallPlan.from_request(request)
                 with open(self.installed, "w+") as f:
-                    if not self.install_packages(request, CommandExecutor_pb2.pip, f, results_log):
-                        self.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
+                    if not self.install_cds_utils(results_log) or not self.install_packages(plan, CommandExecutor_pb2.pip, f, results_log):
+                        self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
                         err_msg = "ERROR: failed to prepare environment for request {} during pip package install.".format(self.blueprint_name_version_uuid)
                         return utils.build_ret_data(False, results_log=results_log, error=err_msg)
                     f.write("\r\n") # TODO: is \r needed?
                     results_log.append("\n")
-                    if not self.install_packages(request, CommandExecutor_pb2.ansible_galaxy, f, results_log):
-                        self.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
+                    if not self.install_packages(plan, CommandExecutor_pb2.ansible_galaxy, f, results_log):
+                        self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
                         err_msg = "ERROR: failed to prepare environment for request {} during Ansible install.".format(self.blueprint_name_version_uuid)
                         return utils.build_ret_data(False, results_log=results_log, error=err_msg)
+                self.service.environment_registry.installed(self.blueprint_name_version_uuid)
+                # warm workers preloaded the previous packages
+                if self.service.warm_worker_pool is not None:
+                    self.service.warm_worker_pool.evict(self.blueprint_dir)
             except Exception as ex:
-                self.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
+                self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
                 err_msg = "ERROR: failed to prepare environment for request {} during installing packages. Exception: {}".format(self.blueprint_name_version_uuid, ex)
                 self.logger.error(err_msg, extra=self.extra)
                 return utils.build_ret_data(False, error=err_msg)
         else:
             try:
                 self.logger.info(".installed file was found for request {}".format(self.blueprint_name_version_uuid), extra=self.extra)
-                with open(self.installed, "r") as f:
-                    results_log.append(f.read())
+                results_log.append(self.service.environment_registry.install_log(self.blueprint_name_version_uuid))
             except Exception as ex:
-                self.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
+                self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).inc()
                 err_msg="ERROR: failed to prepare environment during reading 'installed' file {}. Exception: {}".format(self.installed, ex)
                 return utils.build_ret_data(False, error=err_msg)
 
         # deactivate_venv(blueprint_id)
-        self.prometheus_histogram.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).observe(time.time() - start_time)
+        self.service.prometheus_histogram.labels(self.PROMETHEUS_METRICS_PREP_ENV_LABEL, self.blueprint_name, self.blueprint_version, None).observe(time.time() - start_time)
         return utils.build_ret_data(True, results_log=results_log)
 
     def execute_command(self, request):
@@ -226,113 +246,452 @@ class CommandExecutorHandler():
         script_err_msg = []
 
         self.logger.info("execute_command request {}".format(request), extra=self.extra)
-        
-        #Get the script name to be used for prometheus metrics
-        #Command looks like this: python <script name> <parameter>
-        command_array = request.command.split(" ")
-        script_name = os.path.basename(command_array[1])
+        script_name = self.get_script_name(request)
 
-        # workaround for when packages are not specified, we may not want to go through the install step
-        # can just call create_venv from here.
-        if not self.is_installed():
-            self.create_venv()
         try:
-            if not self.is_installed():
-                create_venv_status = self.create_venv
-                if not create_venv_status[utils.CDS_IS_SUCCESSFUL_KEY]:
-                    self.prometheus_counter.labels(self.PROMETHEUS_METRICS_EXEC_COMMAND_LABEL, self.blueprint_name, self.blueprint_version, script_name).inc()
-                    err_msg = "{} - Failed to execute command during venv creation. Original error: {}".format(self.blueprint_name_version_uuid, create_venv_status[utils.ERR_MSG_KEY])
-                    return utils.build_ret_data(False, error=err_msg)
+            venv_error = self.ensure_venv(script_name)
+            if venv_error is not None:
+                return venv_error
 
-            # touch blueprint dir to indicate this CBA was used recently
-            os.utime(self.blueprint_dir)
+            self.mark_used()
+
+            cmd, updated_env, warm_argv = self.build_command(request)
+            self.logger.info("Running blueprint {} with timeout: {}".format(self.blueprint_name_version_uuid, self.execution_timeout), extra=self.extra)
+            with tempfile.NamedTemporaryFile(mode="w+b") as tmp, utils.ResultChannel() as result_channel:
+                updated_env.update(result_channel.env())
+                try:
+                    outcome = None
+                    if warm_argv is not None:
+                        outcome = self.service.warm_worker_pool.run(self.blueprint_dir, warm_argv, updated_env, tmp.name, self.execution_timeout, extra=self.extra,
+                                                            rlimits=self.service.execution_limits.as_dict())
+                    if outcome is None:
+                        outcome = execution_resources.run_with_usage(cmd, tmp, updated_env, self.execution_timeout, self.service.execution_limits)
+                    rc, usage = outcome
+                except TimeoutExpired as e:
+                    timeout_err_msg = self.timeout_error(script_name, getattr(e, 'killed_processes', None))
+                    # In the time-out case, we will never get CBA's script err msg string.
+                    # Keep the logs and the payload the script returned before being killed.
+                    utils.parse_cmd_exec_output(outputfile=tmp, logger=self.logger, payload_result=result, err_msg_result=script_err_msg, results_log=results_log, extra=self.extra,
+                                                result_channel=result_channel)
+                    result.update(utils.build_ret_data(False, results_log=results_log, error=timeout_err_msg))
+                    return result
+                utils.parse_cmd_exec_output(outputfile=tmp, logger=self.logger, payload_result=result, err_msg_result=script_err_msg, results_log=results_log, extra=self.extra,
+                                            result_channel=result_channel)
+        except Exception as e:
+            self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_EXEC_COMMAND_LABEL, self.blueprint_name, self.blueprint_version, script_name).inc()
+            err_msg = "{} - Failed to execute command. Error: {}".format(self.blueprint_name_version_uuid, e)
+            result.update(utils.build_ret_data(False, results_log=results_log, error=err_msg))
+            return result
 
-            cmd = "cd " + self.blueprint_dir
+        return self.build_execution_result(result, results_log, script_err_msg, rc, script_name, start_time, usage)
 
-            ### if properties are defined we add them to the command
-            properties = ""
-            if request.properties is not None and len(request.properties) > 0:
-                properties = " " + shlex.quote(MessageToJson(request.properties))
+    # Same as execute_command, but yields the output while the command runs:
+    # (STREAM_LOGS, [log lines]), (STREAM_PAYLOAD, payload returned so far) and finally (STREAM_RESULT, ret data without the logs).
+    def execute_command_stream(self, request):
+        start_time = time.time()
+        result = {}
+        script_err_msg = []
 
-            # SR7/SR10 compatibility hack
-            # check if the path for the request.command does not contain UUID, then add it after cba_name/cba_version path.
-            updated_request_command = request.command
-            if self.blueprint_name_version in updated_request_command and self.blueprint_name_version_uuid not in updated_request_command:
-                updated_request_command = updated_request_command.replace(self.blueprint_name_version, self.blueprint_name_version_uuid)
+        self.logger.info("execute_command_stream request {}".format(request), extra=self.extra)
+        script_name = self.get_script_name(request)
 
-            if "ansible-playbook" in updated_request_command:
-                cmd = cmd + "; " + updated_request_command + " -e 'ansible_python_interpreter=" + self.blueprint_dir + "/bin/python'"
-            else:
-                cmd = cmd + "; " + updated_request_command + properties
-
-            ### extract the original header request into sys-env variables
-            # OriginatorID
-            originator_id = request.originatorId
-            # CorrelationID
-            correlation_id = request.correlationId
-            request_id_map = {'CDS_REQUEST_ID':self.request_id, 'CDS_SUBREQUEST_ID':self.sub_request_id, 'CDS_ORIGINATOR_ID': originator_id, 'CDS_CORRELATION_ID': correlation_id}
-            updated_env =  { **os.environ, **request_id_map }
-            # Prepare PATH and VENV_HOME
-            updated_env['PATH'] = self.blueprint_dir + "/bin/:" + os.environ['PATH']
-            updated_env['VIRTUAL_ENV'] = self.blueprint_dir
+        process = None
+        result_channel = None
+        try:
+            venv_error = self.ensure_venv(script_name)
+            if venv_error is not None:
+                yield utils.STREAM_RESULT, venv_error
+                return
+
+            self.mark_used()
+
+            cmd, updated_env, _ = self.build_command(request)
+            self.logger.info("Running blueprint {} with timeout: {} (streaming)".format(self.blueprint_name_version_uuid, self.execution_timeout), extra=self.extra)
+            result_channel = utils.ResultChannel()
+            updated_env.update(result_channel.env())
+            parser = utils.CmdExecOutputParser(result, script_err_msg, result_channel)
+            capture = utils.OutputCapture(parser)
+            # own process group: the script outlives the shell on kill and would keep the output pipe open
+            process = subprocess.Popen(cmd, stdout=PIPE, stderr=subprocess.STDOUT, shell=True, env=updated_env, start_new_session=True,
+                                       preexec_fn=self.service.execution_limits.preexec_fn())
+            killed_processes = []
+            timer = threading.Timer(self.execution_timeout, lambda: killed_processes.append(self.kill_process_tree(process)))
+            timer.start()
+            try:
+                for chunk in utils.read_chunks(process.stdout.fileno()):
+                    capture.feed(chunk)
+                    logs, payload_updated = capture.poll()
+                    if logs:
+                        yield utils.STREAM_LOGS, logs
+                    if payload_updated:
+                        yield utils.STREAM_PAYLOAD, dict(result)
+                capture.close()
+                logs, payload_updated = capture.poll()
+                if logs:
+                    yield utils.STREAM_LOGS, logs
+                rc, usage = execution_resources.wait_with_usage(process)
+                if parser.feed_lines([])[1] or payload_updated:
+                    yield utils.STREAM_PAYLOAD, dict(result)
+            finally:
+                timer.cancel()
+                # a timer already running kills the tree to the end
+                timer.join()
+            if killed_processes:
+                result.update(utils.build_ret_data(False, error=self.timeout_error(script_name, killed_processes[0])))
+                yield utils.STREAM_RESULT, result
+                return
+        except Exception as e:
+            self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_EXEC_COMMAND_LABEL, self.blueprint_name, self.blueprint_version, script_name).inc()
+            err_msg = "{} - Failed to execute command. Error: {}".format(self.blueprint_name_version_uuid, e)
+            result.update(utils.build_ret_data(False, error=err_msg))
+            yield utils.STREAM_RESULT, result
+            return
+        finally:
+            # the client went away (or we failed) while the command is still running
+            if process is not None:
+                if process.poll() is None:
+                    self.kill_process_tree(process)
+                    process.wait()
+                process.stdout.close()
+            if result_channel is not None:
+                result_channel.close()
+
+        yield utils.STREAM_RESULT, self.build_execution_result(result, [], script_err_msg, rc, script_name, start_time, usage)
+
+    # asyncio version of execute_command, for the grpc.aio server: no thread is held while the command runs.
+    # Blocking steps (venv creation, warm workers) go to the loop default executor.
+    async def execute_command_async(self, request):
+        start_time = time.time()
+        results_log = []
+        result = {}
+        script_err_msg = []
+
+        self.logger.info("execute_command_async request {}".format(request), extra=self.extra)
+        script_name = self.get_script_name(request)
+        loop = asyncio.get_event_loop()
+
+        try:
+            if not self.is_installed():
+                venv_error = await loop.run_in_executor(None, self.ensure_venv, script_name)
+                if venv_error is not None:
+                    return venv_error
+
+            self.mark_used()
+
+            cmd, updated_env, warm_argv = self.build_command(request)
             self.logger.info("Running blueprint {} with timeout: {}".format(self.blueprint_name_version_uuid, self.execution_timeout), extra=self.extra)
-            with tempfile.TemporaryFile(mode="w+") as tmp:
+            with tempfile.NamedTemporaryFile(mode="w+b") as tmp, utils.ResultChannel() as result_channel:
+                updated_env.update(result_channel.env())
                 try:
-                    completed_subprocess = subprocess.run(cmd, stdout=tmp, stderr=subprocess.STDOUT, shell=True,
-                                                          env=updated_env, timeout=self.execution_timeout)
-                except TimeoutExpired as timeout_ex:
-                    self.prometheus_counter.labels(self.PROMETHEUS_METRICS_EXEC_COMMAND_LABEL, self.blueprint_name, self.blueprint_version, script_name).inc()
-                    timeout_err_msg = "Running command {} failed due to timeout of {} seconds.".format(self.blueprint_name_version_uuid, self.execution_timeout)
-                    self.logger.error(timeout_err_msg, extra=self.extra)
+                    outcome = None
+                    if warm_argv is not None:
+                        outcome = await loop.run_in_executor(None, lambda: self.service.warm_worker_pool.run(self.blueprint_dir, warm_argv, updated_env, tmp.name,
+                                                                                                     self.execution_timeout, extra=self.extra,
+                                                                                                     rlimits=self.service.execution_limits.as_dict()))
+                    if outcome is None:
+                        process = subprocess.Popen(cmd, stdout=tmp, stderr=subprocess.STDOUT, shell=True, env=updated_env, start_new_session=True,
+                                                   preexec_fn=self.service.execution_limits.preexec_fn())
+                        outcome = await self.wait_process_async(process)
+                    rc, usage = outcome
+                except TimeoutExpired as e:
+                    timeout_err_msg = self.timeout_error(script_name, getattr(e, 'killed_processes', None))
                     # In the time-out case, we will never get CBA's script err msg string.
-                    utils.parse_cmd_exec_output(outputfile=tmp, logger=self.logger, payload_result=result, err_msg_result=script_err_msg, results_log=results_log, extra=self.extra)
-                    return utils.build_ret_data(False, results_log=results_log, error=timeout_err_msg)
-                utils.parse_cmd_exec_output(outputfile=tmp, logger=self.logger, payload_result=result, err_msg_result=script_err_msg, results_log=results_log, extra=self.extra)
-                rc = completed_subprocess.returncode
+                    # Keep the logs and the payload the script returned before being killed.
+                    utils.parse_cmd_exec_output(outputfile=tmp, logger=self.logger, payload_result=result, err_msg_result=script_err_msg, results_log=results_log, extra=self.extra,
+                                                result_channel=result_channel)
+                    result.update(utils.build_ret_data(False, results_log=results_log, error=timeout_err_msg))
+                    return result
+                utils.parse_cmd_exec_output(outputfile=tmp, logger=self.logger, payload_result=result, err_msg_result=script_err_msg, results_log=results_log, extra=self.extra,
+                                            result_channel=result_channel)
         except Exception as e:
-            self.prometheus_counter.labels(self.PROMETHEUS_METRICS_EXEC_COMMAND_LABEL, self.blueprint_name, self.blueprint_version, script_name).inc()
+            self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_EXEC_COMMAND_LABEL, self.blueprint_name, self.blueprint_version, script_name).inc()
             err_msg = "{} - Failed to execute command. Error: {}".format(self.blueprint_name_version_uuid, e)
             result.update(utils.build_ret_data(False, results_log=results_log, error=err_msg))
             return result
 
+        return self.build_execution_result(result, results_log, script_err_msg, rc, script_name, start_time, usage)
+
+    # asyncio version of execute_command_stream, same events.
+    async def execute_command_stream_async(self, request):
+        start_time = time.time()
+        result = {}
+        script_err_msg = []
+
+        self.logger.info("execute_command_stream_async request {}".format(request), extra=self.extra)
+        script_name = self.get_script_name(request)
+        loop = asyncio.get_event_loop()
+
+        process = None
+        stdout_transport = None
+        result_channel = None
+        try:
+            if not self.is_installed():
+                venv_error = await loop.run_in_executor(None, self.ensure_venv, script_name)
+                if venv_error is not None:
+                    yield utils.STREAM_RESULT, venv_error
+                    return
+
+            self.mark_used()
+
+            cmd, updated_env, _ = self.build_command(request)
+            self.logger.info("Running blueprint {} with timeout: {} (streaming)".format(self.blueprint_name_version_uuid, self.execution_timeout), extra=self.extra)
+            result_channel = utils.ResultChannel()
+            updated_env.update(result_channel.env())
+            parser = utils.CmdExecOutputParser(result, script_err_msg, result_channel)
+            capture = utils.OutputCapture(parser)
+            process = subprocess.Popen(cmd, stdout=PIPE, stderr=subprocess.STDOUT, shell=True, env=updated_env, start_new_session=True,
+                                       preexec_fn=self.service.execution_limits.preexec_fn())
+            stdout = asyncio.StreamReader()
+            stdout_transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(stdout), process.stdout)
+            deadline = loop.time() + self.execution_timeout
+            try:
+                while True:
+                    chunk = await asyncio.wait_for(stdout.read(utils.OUTPUT_CHUNK_SIZE), max(deadline - loop.time(), 0))
+                    if not chunk:
+                        break
+                    capture.feed(chunk)
+                    logs, payload_updated = capture.poll()
+                    if logs:
+                        yield utils.STREAM_LOGS, logs
+                    if payload_updated:
+                        yield utils.STREAM_PAYLOAD, dict(result)
+                capture.close()
+                logs, payload_updated = capture.poll()
+                if logs:
+                    yield utils.STREAM_LOGS, logs
+                rc, usage = await self.wait_process_async(process, max(deadline - loop.time(), 0))
+                if parser.feed_lines([])[1] or payload_updated:
+                    yield utils.STREAM_PAYLOAD, dict(result)
+            except asyncio.TimeoutError:
+                killed_processes = await loop.run_in_executor(None, self.kill_process_tree, process)
+                await execution_resources.wait_with_usage_async(process)
+                result.update(utils.build_ret_data(False, error=self.timeout_error(script_name, killed_processes)))
+                yield utils.STREAM_RESULT, result
+                return
+            except TimeoutExpired as e:
+                result.update(utils.build_ret_data(False, error=self.timeout_error(script_name, e.killed_processes)))
+                yield utils.STREAM_RESULT, result
+                return
+        except Exception as e:
+            self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_EXEC_COMMAND_LABEL, self.blueprint_name, self.blueprint_version, script_name).inc()
+            err_msg = "{} - Failed to execute command. Error: {}".format(self.blueprint_name_version_uuid, e)
+            result.update(utils.build_ret_data(False, error=err_msg))
+            yield utils.STREAM_RESULT, result
+            return
+        finally:
+            # the client went away (or we failed) while the command is still running
+            if process is not None:
+                if process.returncode is None:
+                    await loop.run_in_executor(None, self.kill_process_tree, process)
+                    await execution_resources.wait_with_usage_async(process)
+                if stdout_transport is not None:
+                    stdout_transport.close()
+                else:
+                    process.stdout.close()
+            if result_channel is not None:
+                result_channel.close()
+
+        yield utils.STREAM_RESULT, self.build_execution_result(result, [], script_err_msg, rc, script_name, start_time, usage)
+
+    # Waits for a subprocess.Popen command started in its own session, returning (return code, resource usage).
+    # Kills its process tree on timeout (raising ExecutionTimeoutExpired like subprocess.run) or when the waiting
+    # task is cancelled.
+    async def wait_process_async(self, process, timeout=None):
+        if timeout is None:
+            timeout = self.execution_timeout
+        waiter = execution_resources.wait_with_usage_async(process, timeout, kill=self.kill_process_tree)
+        try:
+            return await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # the grace period runs in the background, the caller is gone: the waiting thread reaps the process
+            asyncio.get_event_loop().run_in_executor(None, self.kill_process_tree, process)
+            raise
+
+    # killed_processes: number of processes of the command killed on timeout, when known
+    def timeout_error(self, script_name, killed_processes=None):
+        self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_EXEC_COMMAND_LABEL, self.blueprint_name, self.blueprint_version, script_name).inc()
+        timeout_err_msg = "Running command {} failed due to timeout of {} seconds.".format(self.blueprint_name_version_uuid, self.execution_timeout)
+        if killed_processes is not None:
+            self.service.prometheus_killed_processes_counter.labels(self.PROMETHEUS_METRICS_EXEC_COMMAND_LABEL, self.blueprint_name, self.blueprint_version, script_name).inc(killed_processes)
+            timeout_err_msg += " {} process(es) killed.".format(killed_processes)
+        self.logger.error(timeout_err_msg, extra=self.extra)
+        return timeout_err_msg
+
+    # Kills the session of a command started with start_new_session: SIGTERM, then SIGKILL after EXEC_KILL_GRACE_SECONDS.
+    # Blocks for the grace period, returns the number of processes killed.
+    def kill_process_tree(self, process):
+        killed_processes = execution_resources.kill_session(process.pid)
+        self.logger.info("{} - Killed {} process(es) of command {}".format(self.blueprint_name_version_uuid, killed_processes, process.pid), extra=self.extra)
+        return killed_processes
+
+    # usage: resource usage of the execution (see execution_resources.usage_from_rusage), when known
+    def build_execution_result(self, result, results_log, script_err_msg, rc, script_name, start_time, usage=None):
         # Since return code is only used to check if it's zero (success), we can just return success flag instead.
         is_execution_successful = rc == 0
         # Propagate error message in case rc is not 0
         ret_err_msg = None if is_execution_successful or not script_err_msg else script_err_msg
         result.update(utils.build_ret_data(is_execution_successful, results_log=results_log, error=ret_err_msg))
-        self.prometheus_histogram.labels(self.PROMETHEUS_METRICS_EXEC_COMMAND_LABEL, self.blueprint_name, self.blueprint_version, script_name).observe(time.time() - start_time)
-
+        self.service.prometheus_histogram.labels(self.PROMETHEUS_METRICS_EXEC_COMMAND_LABEL, self.blueprint_name, self.blueprint_version, script_name).observe(time.time() - start_time)
+        if usage is not None:
+            labels = (self.PROMETHEUS_METRICS_EXEC_COMMAND_LABEL, self.blueprint_name, self.blueprint_version, script_name)
+            self.service.prometheus_usage_histograms['cpu'].labels(*labels, 'user').observe(usage['user_cpu_seconds'])
+            self.service.prometheus_usage_histograms['cpu'].labels(*labels, 'sys').observe(usage['sys_cpu_seconds'])
+            self.service.prometheus_usage_histograms['max_rss'].labels(*labels).observe(usage['max_rss_bytes'])
+            self.service.prometheus_usage_histograms['io'].labels(*labels, 'read').observe(usage['read_bytes'])
+            self.service.prometheus_usage_histograms['io'].labels(*labels, 'write').observe(usage['written_bytes'])
+            if self.service.execution_usage_in_payload:
+                result[utils.EXECUTION_USAGE_KEY] = usage
         return result
 
-    def install_packages(self, request, type, f, results):
-        success = self.install_python_packages('UTILITY', results)
+    def get_script_name(self, request):
+        #Get the script name to be used for prometheus metrics
+        #Command looks like this: python <script name> <parameter>
+        command_array = request.command.split(" ")
+        return os.path.basename(command_array[1])
+
+    # Returns the ret data to send back when the venv could not be created, None if it is ready.
+    def ensure_venv(self, script_name):
+        # workaround for when packages are not specified, we may not want to go through the install step
+        # can just call create_venv from here.
+        if not self.is_installed():
+            create_venv_status = self.service.blueprint_flight.do(self.blueprint_name_version_uuid, self.create_venv_if_missing, kind='create_venv')
+            if not create_venv_status[utils.CDS_IS_SUCCESSFUL_KEY]:
+                self.service.prometheus_counter.labels(self.PROMETHEUS_METRICS_EXEC_COMMAND_LABEL, self.blueprint_name, self.blueprint_version, script_name).inc()
+                err_msg = "{} - Failed to execute command during venv creation. Original error: {}".format(self.blueprint_name_version_uuid, create_venv_status[utils.ERR_MSG_KEY])
+                return utils.build_ret_data(False, error=err_msg)
+        return None
+
+    # Returns the shell command, its environment and the argv to use instead when it can run in a warm worker (or None).
+    def build_command(self, request):
+        cmd = "cd " + self.blueprint_dir
+
+        ### if properties are defined we add them to the command
+        properties = ""
+        properties_json = None
+        if request.properties is not None and len(request.properties) > 0:
+            properties_json = MessageToJson(request.properties)
+            properties = " " + shlex.quote(properties_json)
+
+        # SR7/SR10 compatibility hack
+        # check if the path for the request.command does not contain UUID, then add it after cba_name/cba_version path.
+        updated_request_command = request.command
+        if self.blueprint_name_version in updated_request_command and self.blueprint_name_version_uuid not in updated_request_command:
+            updated_request_command = updated_request_command.replace(self.blueprint_name_version, self.blueprint_name_version_uuid)
+
+        if "ansible-playbook" in updated_request_command:
+            cmd = cmd + "; " + updated_request_command + " -e 'ansible_python_interpreter=" + self.blueprint_dir + "/bin/python'"
+        else:
+            cmd = cmd + "; " + updated_request_command + properties
+
+        ### extract the original header request into sys-env variables
+        # OriginatorID
+        originator_id = request.originatorId
+        # CorrelationID
+        correlation_id = request.correlationId
+        request_id_map = {'CDS_REQUEST_ID':self.request_id, 'CDS_SUBREQUEST_ID':self.sub_request_id, 'CDS_ORIGINATOR_ID': originator_id, 'CDS_CORRELATION_ID': correlation_id}
+        updated_env =  { **os.environ, **request_id_map }
+        # Prepare PATH and VENV_HOME
+        updated_env['PATH'] = self.blueprint_dir + "/bin/:" + os.environ['PATH']
+        updated_env['VIRTUAL_ENV'] = self.blueprint_dir
+
+        # plain 'python script args' commands can run in a warm worker instead of a new shell + interpreter
+        warm_argv = None
+        if self.service.warm_worker_pool is not None and self.service.warm_worker_pool.is_enabled() and "ansible-playbook" not in updated_request_command:
+            warm_argv = self.service.warm_worker_pool.warm_argv(updated_request_command)
+            if warm_argv is not None and properties_json is not None:
+                warm_argv.append(properties_json)
+        return cmd, updated_env, warm_argv
+
+    def install_packages(self, plan, type, f, results):
+        packages = plan.packages(type)
+        if type == CommandExecutor_pb2.pip and self.package_layer_cache_usable():
+            return self.install_python_packages_layer(packages, f, results)
+        if not packages:
+            return True
+
+        f.write("Installed %s packages:\r\n" % CommandExecutor_pb2.PackageType.Name(type))
+        for p in packages:
+            f.write("   %s\r\n" % p)
+        if type == CommandExecutor_pb2.pip:
+            success = self.install_python_packages(packages, results)
+        else:
+            success = self.install_ansible_packages(packages, results)
         if not success:
-            self.logger.error("Error installing 'UTILITY (cds_utils) package to CBA python environment!!!", extra=self.extra)
+            f.close()
+            os.remove(self.installed)
             return False
+        return True
 
-        for package in request.packages:
-            if package.type == type:
-                f.write("Installed %s packages:\r\n" % CommandExecutor_pb2.PackageType.Name(type))
-                for p in package.package:
-                    f.write("   %s\r\n" % p)
-                    if package.type == CommandExecutor_pb2.pip:
-                        success = self.install_python_packages(p, results)
-                    else:
-                        success = self.install_ansible_packages(p, results)
-                    if not success:
-                        f.close()
-                        os.remove(self.installed)
-                        return False
+    def package_layer_cache_usable(self):
+        # layers are installed with 'pip install --target', which does not mix with '--user' nor with the pip of the server
+        return self.service.package_layer_cache is not None and self.service.package_layer_cache.is_enabled() and not self.service.pip_install_user_flag \
+            and not self.service.pip_install_server_pip
+
+    # Install all the pip packages of the request as one shared package layer, or link the venv to the existing one.
+    def install_python_packages_layer(self, packages, f, results):
+        if not packages:
+            return True
+        f.write("Installed %s packages:\r\n" % CommandExecutor_pb2.PackageType.Name(CommandExecutor_pb2.pip))
+        for p in packages:
+            f.write("   %s\r\n" % p)
+
+        full_path_to_requirements_txt = self.blueprint_dir + "/Environments/" + REQUIREMENTS_TXT
+        requirements_txt = None
+        pip_args = []
+        for p in packages:
+            if REQUIREMENTS_TXT == p:
+                with open(full_path_to_requirements_txt, "r") as req:
+                    requirements_txt = req.read()
+                pip_args.extend(["-r", full_path_to_requirements_txt])
+            else:
+                pip_args.append(p)
+
+        request_key = self.service.package_layer_cache.request_key(packages, requirements_txt)
+        layer_key = self.service.package_layer_cache.resolved_layer(request_key)
+        if layer_key is not None:
+            self.service.prometheus_cache_counter.labels('package_layer', 'hit').inc()
+            self.logger.info("{} - Reusing package layer {}".format(self.blueprint_name_version_uuid, layer_key), extra=self.extra)
+            results.append("Reusing package layer {}\n".format(layer_key))
+        else:
+            self.service.prometheus_cache_counter.labels('package_layer', 'miss').inc()
+            env = dict(os.environ)
+            if "https_proxy" in os.environ:
+                env['https_proxy'] = os.environ['https_proxy']
+                self.logger.info("Using https_proxy: {}".format(env['https_proxy']), extra=self.extra)
+            start_time = time.time()
+            success, install_log, layer_key = self.service.package_layer_cache.build_layer(request_key, self.blueprint_dir + "/bin/pip", pip_args, env, extra=self.extra,
+                                                                                           wheelhouse=self.service.wheelhouse)
+            self.observe_pip_install('package_layer', success, packages, start_time)
+            results.append(install_log)
+            results.append("\n")
+            if not success:
+                f.close()
+                os.remove(self.installed)
+                return False
+        if not self.service.package_layer_cache.link_layer(layer_key, self.blueprint_dir):
+            results.append("Package layer {} was evicted before it could be linked\n".format(layer_key))
+            self.logger.error("{} - Package layer {} was evicted before it could be linked".format(self.blueprint_name_version_uuid, layer_key), extra=self.extra)
+            f.close()
+            os.remove(self.installed)
+            return False
         return True
 
     def upgrade_pip(self, results):
+        if self.venv_from_template:
+            self.logger.info("{} - venv was cloned from a template, PIP is already up to date.".format(self.blueprint_name_version_uuid), extra=self.extra)
+            return True
         self.logger.info("{} - updating PIP (venv supplied pip is too old...)".format(self.blueprint_name_version_uuid), extra=self.extra)
         full_path_to_pip = self.blueprint_dir + "/bin/pip"
-        command = [full_path_to_pip,"install","--upgrade","pip"]
         env = dict(os.environ)
         if "https_proxy" in os.environ:
             env['https_proxy'] = os.environ['https_proxy']
             self.logger.info("Using https_proxy: {}".format(env['https_proxy']), extra=self.extra)
+        success, wheel_log, pip_args = self.wheelhouse_install_args(full_path_to_pip, ["pip"], env)
+        if not success:
+            results.append(wheel_log)
+            self.logger.error("upgrade_pip failed", extra=self.extra)
+            return False
+        command = [full_path_to_pip, "install", "--upgrade"] + pip_args
         try:
             results.append(subprocess.run(command, check=True, stdout=PIPE, stderr=PIPE, env=env).stdout.decode())
             results.append("\n")
@@ -343,53 +702,123 @@ class CommandExecutorHandler():
             self.logger.error("upgrade_pip failed", extra=self.extra)
             return False
 
-    def install_python_packages(self, package, results):
-        self.logger.info( "{} - Install Python package({}) in Python Virtual Environment".format(self.blueprint_name_version_uuid, package), extra=self.extra)
-        pip_install_user_flag = 'PIP_INSTALL_USER_FLAG' in os.environ
+    # Install the pip packages (requirements.txt included) with a single pip run of the venv.
+    def install_python_packages(self, packages, results):
+        self.logger.info( "{} - Install Python packages({}) in Python Virtual Environment".format(self.blueprint_name_version_uuid, packages), extra=self.extra)
+        pip_install_user_flag = self.service.pip_install_user_flag
 
         if pip_install_user_flag:
             self.logger.info("Note: PIP_INSTALL_USER_FLAG is set, 'pip install' will use '--user' flag.", extra=self.extra)
 
-        if REQUIREMENTS_TXT == package:
-            full_path_to_pip = self.blueprint_dir + "/bin/pip"
-            full_path_to_requirements_txt = self.blueprint_dir + "/Environments/" + REQUIREMENTS_TXT
-            command = [full_path_to_pip, "install", "--user", "-r", full_path_to_requirements_txt] if pip_install_user_flag else [full_path_to_pip, "install", "-r", full_path_to_requirements_txt]
-        elif package == 'UTILITY':
-            py_ver_maj = sys.version_info.major
-            py_ver_min = sys.version_info.minor
-            command = ["cp", "-r", "./cds_utils", "{}/lib/python{}.{}/site-packages/".format(self.blueprint_dir, py_ver_maj,py_ver_min)]
-        else:
-            command = ["pip", "install", "--user", package] if pip_install_user_flag else ["pip", "install", package]
+        venv_packages = []
+        server_packages = []
+        for package in packages:
+            if REQUIREMENTS_TXT == package:
+                full_path_to_requirements_txt = self.blueprint_dir + "/Environments/" + REQUIREMENTS_TXT
+                venv_packages.extend(["-r", full_path_to_requirements_txt])
+            elif self.service.pip_install_server_pip:
+                server_packages.append(package)
+            else:
+                venv_packages.append(package)
+        # PIP_INSTALL_SERVER_PIP: the packages listed in the request go, as they used to, to the environment of the
+        # pip of the server rather than to the venv, only requirements.txt is installed by the venv pip
+        pip_runs = []
+        if venv_packages:
+            pip_runs.append((self.blueprint_dir + "/bin/pip", venv_packages))
+        if server_packages:
+            pip_runs.append(("pip", server_packages))
 
         env = dict(os.environ)
         if "https_proxy" in os.environ:
             env['https_proxy'] = os.environ['https_proxy']
             self.logger.info("Using https_proxy: {}".format(env['https_proxy']), extra=self.extra)
+        start_time = time.time()
         try:
-            results.append(subprocess.run(command, check=True, stdout=PIPE, stderr=PIPE, env=env).stdout.decode())
-            results.append("\n")
-            self.logger.info("install_python_packages {} succeeded".format(package), extra=self.extra)
+            for pip, pip_args in pip_runs:
+                success, wheel_log, pip_args = self.wheelhouse_install_args(pip, pip_args, env)
+                if not success:
+                    self.observe_pip_install('venv', False, packages, start_time)
+                    results.append(wheel_log)
+                    self.logger.error("install_python_packages {} failed".format(packages), extra=self.extra)
+                    return False
+                command = [pip, "install"] + (["--user"] if pip_install_user_flag else []) + pip_args
+                results.append(subprocess.run(command, check=True, stdout=PIPE, stderr=PIPE, env=env).stdout.decode())
+                results.append("\n")
+            self.observe_pip_install('venv', True, packages, start_time)
+            self.logger.info("install_python_packages {} succeeded".format(packages), extra=self.extra)
             return True
         except CalledProcessError as e:
+            self.observe_pip_install('venv', False, packages, start_time)
             results.append(e.stderr.decode())
-            self.logger.error("install_python_packages {} failed".format(package), extra=self.extra)
+            self.logger.error("install_python_packages {} failed".format(packages), extra=self.extra)
             return False
 
-    def install_ansible_packages(self, package, results):
-        self.logger.info( "{} - Install Ansible Role package({}) in Python Virtual Environment".format(self.blueprint_name_version_uuid, package), extra=self.extra)
-        command = ["ansible-galaxy", "install", package, "-p", self.blueprint_dir + "/Scripts/ansible/roles"]
+    # one observation per pip run, the packages it installed are only logged (request specs are not bounded label values)
+    def observe_pip_install(self, kind, success, packages, start_time):
+        duration = time.time() - start_time
+        self.service.prometheus_pip_install_histogram.labels(kind, 'success' if success else 'failure').observe(duration)
+        self.logger.info("{} - pip install ({}) of {} took {:.1f}s".format(self.blueprint_name_version_uuid, kind, packages, duration), extra=self.extra)
+
+    # Returns (success, log, 'pip install' arguments for pip_args), see Wheelhouse.install_args
+    def wheelhouse_install_args(self, pip, pip_args, env):
+        if self.service.wheelhouse is None:
+            return True, "", list(pip_args)
+        return self.service.wheelhouse.install_args(pip, pip_args, env, extra=self.extra)
+
+    # Copy the UTILITY package (cds_utils) into the venv site-packages.
+    def install_cds_utils(self, results):
+        py_ver_maj = sys.version_info.major
+        py_ver_min = sys.version_info.minor
+        target = "{}/lib/python{}.{}/site-packages/cds_utils".format(self.blueprint_dir, py_ver_maj, py_ver_min)
+        try:
+            shutil.rmtree(target, ignore_errors=True)
+            shutil.copytree(CDS_UTILS_DIR, target, ignore=shutil.ignore_patterns('__pycache__'))
+            self.logger.info("install_python_packages UTILITY succeeded", extra=self.extra)
+            return True
+        except OSError as e:
+            results.append(str(e))
+            self.logger.error("Error installing 'UTILITY (cds_utils) package to CBA python environment!!!", extra=self.extra)
+            return False
 
+    # Install the Ansible roles, ANSIBLE_GALAXY_WORKERS at a time.
+    def install_ansible_packages(self, packages, results):
+        self.logger.info( "{} - Install Ansible Role packages({}) in Python Virtual Environment".format(self.blueprint_name_version_uuid, packages), extra=self.extra)
+        roles_dir = self.blueprint_dir + "/Scripts/ansible/roles"
         env = dict(os.environ)
         if "http_proxy" in os.environ:
             # ansible galaxy uses https_proxy environment variable, but requires it to be set with http proxy value.
             env['https_proxy'] = os.environ['http_proxy']
-        try:
-            results.append(subprocess.run(command, check=True, stdout=PIPE, stderr=PIPE, env=env).stdout.decode())
+
+        max_workers = min(len(packages), self.service.ansible_galaxy_workers)
+        with futures.ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            outcomes = list(executor.map(lambda package: self.install_ansible_package(package, roles_dir, env), packages))
+        for _, install_log in outcomes:
+            results.append(install_log)
             results.append("\n")
-            return True
+        return all(success for success, _ in outcomes)
+
+    # Returns (success, install log)
+    def install_ansible_package(self, package, roles_dir, env):
+        if self.service.ansible_role_cache is not None and self.service.ansible_role_cache.is_enabled():
+            return self.service.ansible_role_cache.install(package, roles_dir, env, extra=self.extra)
+        # each role is installed in its own directory then merged, concurrent installs would race on shared dependencies
+        os.makedirs(roles_dir, mode=0o755, exist_ok=True)
+        install_dir = tempfile.mkdtemp(prefix='.galaxy-', dir=os.path.dirname(roles_dir))
+        command = ["ansible-galaxy", "install", package, "-p", install_dir]
+        try:
+            install_log = subprocess.run(command, check=True, stdout=PIPE, stderr=PIPE, env=env).stdout.decode()
+            copy_roles(install_dir, roles_dir, move=True)
+            return True, install_log
         except CalledProcessError as e:
-            results.append(e.stderr.decode())
-            return False
+            return False, e.stderr.decode()
+        finally:
+            shutil.rmtree(install_dir, ignore_errors=True)
+
+    # a prepare_env may have completed (or a venv been created) while waiting for the blueprint dir
+    def create_venv_if_missing(self):
+        if self.is_installed() or os.path.exists(self.blueprint_dir + '/pyvenv.cfg'):
+            return utils.build_ret_data(True)
+        return self.create_venv()
 
     # Returns a map with 'status' and 'err_msg'.
     # 'status' True indicates success.
@@ -400,9 +829,16 @@ class CommandExecutorHandler():
         try:
             bin_dir = self.blueprint_dir + "/bin"
             # check if CREATE_VENV_DISABLE_SITE_PACKAGES is set
-            venv_system_site_packages_disabled = 'CREATE_VENV_DISABLE_SITE_PACKAGES' in os.environ
+            venv_system_site_packages_disabled = self.service.venv_system_site_packages_disabled
             if (venv_system_site_packages_disabled):
                 self.logger.info("Note: CREATE_VENV_DISABLE_SITE_PACKAGES env var is set - environment creation will have site packages disabled.", extra=self.extra)
+            if self.service.venv_template_pool is not None and self.service.venv_template_pool.clone_into(self.blueprint_dir, extra=self.extra):
+                self.venv_from_template = True
+                self.service.prometheus_cache_counter.labels('venv_template', 'hit').inc()
+                self.logger.info("{} - Python Virtual Environment cloned from a pre-built template.".format(self.blueprint_name_version_uuid), extra=self.extra)
+                return utils.build_ret_data(True)
+            if self.service.venv_template_pool is not None and self.service.venv_template_pool.is_enabled():
+                self.service.prometheus_cache_counter.labels('venv_template', 'miss').inc()
             venv.create(self.blueprint_dir, with_pip=True, system_site_packages=not venv_system_site_packages_disabled)
             self.logger.info("{} - Creation of Python Virtual Environment finished.".format(self.blueprint_name_version_uuid), extra=self.extra)
             return utils.build_ret_data(True)
@@ -15,24 +15,105 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+from concurrent import futures
+import contextlib
+import itertools
 import logging
 import os, sys
 import proto.CommandExecutor_pb2_grpc as CommandExecutor_pb2_grpc
 
 from command_executor_handler import CommandExecutorHandler
+from command_executor_service import CommandExecutorService
+from venv_template_pool import VenvTemplatePool
+from package_layer_cache import PackageLayerCache
+from single_flight import SingleFlight
+from warm_worker_pool import WarmWorkerPool
+from cba_extractor import CbaExtractor
+from blueprint_gc import BlueprintGarbageCollector
+from install_plan import AnsibleRoleCache, InstallPlan
+from wheelhouse import Wheelhouse
+from execution_resources import ExecutionLimits
+from environment_registry import EnvironmentRegistry
+from result_cache import ExecutionResultCache
+import server_metrics
 import utils
 
+VENV_TEMPLATE_POOL_DIR = '/opt/app/onap/blueprints/venv-templates/'
+PACKAGE_LAYER_CACHE_DIR = '/opt/app/onap/blueprints/package-layers/'
+ANSIBLE_ROLE_CACHE_DIR = '/opt/app/onap/blueprints/ansible-roles/'
+WHEELHOUSE_DIR = '/opt/app/onap/blueprints/wheelhouse/'
+
 class CommandExecutorServer(CommandExecutor_pb2_grpc.CommandExecutorServiceServicer):
 
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
+        # local wheel cache used by the pip installs, see WHEELHOUSE_ENABLED / WHEELHOUSE_OFFLINE
+        self.wheelhouse = Wheelhouse(os.environ.get('WHEELHOUSE_DIR', WHEELHOUSE_DIR),
+                                     enabled=os.environ.get('WHEELHOUSE_ENABLED', 'false') == 'true',
+                                     offline=os.environ.get('WHEELHOUSE_OFFLINE', 'false') == 'true')
+        self.wheelhouse.start()
+        # rlimits of the executed commands, see EXEC_LIMIT_*
+        self.execution_limits = ExecutionLimits.from_env()
+        # pre-built venvs handed out to new CBAs, see VENV_TEMPLATE_POOL_SIZE
+        self.venv_template_pool = VenvTemplatePool(os.environ.get('VENV_TEMPLATE_POOL_DIR', VENV_TEMPLATE_POOL_DIR),
+                                                   int(os.environ.get('VENV_TEMPLATE_POOL_SIZE', '0')),
+                                                   system_site_packages='CREATE_VENV_DISABLE_SITE_PACKAGES' not in os.environ,
+                                                   wheelhouse=self.wheelhouse)
+        self.venv_template_pool.start()
+        # pip packages shared across CBAs resolving to the same set, see PACKAGE_LAYER_CACHE_ENABLED,
+        # PACKAGE_LAYER_CACHE_MAX_SIZE_MB / PACKAGE_LAYER_CACHE_MAX_ENTRIES for the eviction of the unused layers
+        self.package_layer_cache = PackageLayerCache(os.environ.get('PACKAGE_LAYER_CACHE_DIR', PACKAGE_LAYER_CACHE_DIR),
+                                                     enabled=os.environ.get('PACKAGE_LAYER_CACHE_ENABLED', 'false') == 'true',
+                                                     max_size=int(os.environ.get('PACKAGE_LAYER_CACHE_MAX_SIZE_MB', '0')) * 1024 * 1024,
+                                                     max_entries=int(os.environ.get('PACKAGE_LAYER_CACHE_MAX_ENTRIES', '0')),
+                                                     interval=int(os.environ.get('PACKAGE_LAYER_CACHE_GC_INTERVAL', '300')),
+                                                     resolve_ttl=int(os.environ.get('PACKAGE_LAYER_CACHE_RESOLVE_TTL', '86400')))
+        self.package_layer_cache.start()
+        # one environment build at a time per blueprint UUID, shared by concurrent requests
+        self.blueprint_flight = SingleFlight()
+        # pre-forked python interpreters per venv for executeCommand, see WARM_WORKERS_ENABLED
+        self.warm_worker_pool = WarmWorkerPool(enabled=os.environ.get('WARM_WORKERS_ENABLED', 'false') == 'true',
+                                               workers_per_venv=int(os.environ.get('WARM_WORKERS_PER_VENV', '2')),
+                                               max_workers=int(os.environ.get('WARM_WORKERS_MAX', '20')),
+                                               idle_timeout=int(os.environ.get('WARM_WORKERS_IDLE_TIMEOUT', '300')))
+        self.warm_worker_pool.start()
+        # state of the deployed blueprints, read from disk once here
+        self.environment_registry = EnvironmentRegistry(CommandExecutorHandler.BLUEPRINTS_DEPLOY_DIR, CommandExecutorHandler.TOSCA_META_FILE)
+        self.environment_registry.load()
+        # uploadBlueprint archive extraction, members are extracted by CBA_EXTRACT_WORKERS threads
+        self.cba_extractor = CbaExtractor(max_workers=int(os.environ.get('CBA_EXTRACT_WORKERS', '4')))
+        # LRU eviction of the deployed CBAs, see BLUEPRINTS_GC_MAX_SIZE_MB / BLUEPRINTS_GC_MAX_ENTRIES
+        self.blueprint_gc = BlueprintGarbageCollector(CommandExecutorHandler.BLUEPRINTS_DEPLOY_DIR,
+                                                      max_size=int(os.environ.get('BLUEPRINTS_GC_MAX_SIZE_MB', '0')) * 1024 * 1024,
+                                                      max_entries=int(os.environ.get('BLUEPRINTS_GC_MAX_ENTRIES', '0')),
+                                                      interval=int(os.environ.get('BLUEPRINTS_GC_INTERVAL', '300')),
+                                                      upload_staging_prefix=CommandExecutorHandler.UPLOAD_STAGING_PREFIX,
+                                                      warm_worker_pool=self.warm_worker_pool,
+                                                      environment_registry=self.environment_registry)
+        self.blueprint_gc.start()
+        # Ansible roles downloaded once for all the CBAs, see ANSIBLE_ROLE_CACHE_ENABLED
+        self.ansible_role_cache = AnsibleRoleCache(os.environ.get('ANSIBLE_ROLE_CACHE_DIR', ANSIBLE_ROLE_CACHE_DIR),
+                                                   enabled=os.environ.get('ANSIBLE_ROLE_CACHE_ENABLED', 'false') == 'true')
+        # executeCommand outputs of the requests with the cds_cache_result property, see EXECUTION_RESULT_CACHE_*
+        self.result_cache = ExecutionResultCache(max_entries=int(os.environ.get('EXECUTION_RESULT_CACHE_MAX_ENTRIES', '1000')),
+                                                 max_size=int(os.environ.get('EXECUTION_RESULT_CACHE_MAX_SIZE_MB', '64')) * 1024 * 1024,
+                                                 max_ttl=float(os.environ.get('EXECUTION_RESULT_CACHE_MAX_TTL', '300')))
+        # prepareEnvs environments prepared at the same time, at most
+        self.prepare_envs_max_concurrency = int(os.environ.get('PREPARE_ENVS_MAX_CONCURRENCY', '4'))
+        # what the per-request handlers share: the components above, metrics and configuration
+        self.service = CommandExecutorService(venv_template_pool=self.venv_template_pool, package_layer_cache=self.package_layer_cache,
+                                              blueprint_flight=self.blueprint_flight, warm_worker_pool=self.warm_worker_pool,
+                                              cba_extractor=self.cba_extractor, ansible_role_cache=self.ansible_role_cache,
+                                              wheelhouse=self.wheelhouse, execution_limits=self.execution_limits,
+                                              environment_registry=self.environment_registry)
 
     def uploadBlueprint(self, request, context):
         # handler for 'uploadBluleprint' call - extracts compressed cbaData to a  bpname/bpver/bpuuid dir.
         blueprint_name_version_uuid = utils.blueprint_name_version_uuid(request)
         extra = utils.getExtraLogData(request)
         self.logger.info("{} - Received uploadBlueprint request".format(blueprint_name_version_uuid), extra=extra)
-        handler = CommandExecutorHandler(request)
+        handler = self.new_handler(request)
+        self.result_cache.invalidate(blueprint_name_version_uuid)
         return handler.uploadBlueprint(request)
         
     def prepareEnv(self, request, context):
@@ -41,8 +122,10 @@ class CommandExecutorServer(CommandExecutor_pb2_grpc.CommandExecutorServiceServi
         self.logger.info("{} - Received prepareEnv request".format(blueprint_id), extra=extra)
         self.logger.info(request, extra=extra)
 
-        handler = CommandExecutorHandler(request)
-        prepare_env_response = handler.prepare_env(request)
+        handler = self.new_handler(request)
+        self.result_cache.invalidate(blueprint_id)
+        with self.blueprint_gc.using(handler.blueprint_dir):
+            prepare_env_response = handler.prepare_env(request)
         if prepare_env_response[utils.CDS_IS_SUCCESSFUL_KEY]:
             self.logger.info("{} - Package installation logs {}".format(blueprint_id, prepare_env_response[utils.RESULTS_LOG_KEY]), extra=extra)
         else:
@@ -50,6 +133,47 @@ class CommandExecutorServer(CommandExecutor_pb2_grpc.CommandExecutorServiceServi
         self.logger.info("Prepare Env Response returned : %s" % prepare_env_response, extra=extra)
         return utils.build_grpc_response(request.requestId, prepare_env_response)
 
+    # Prepares the environments of the request, maxConcurrency (at most PREPARE_ENVS_MAX_CONCURRENCY) at a time,
+    # streaming the prepareEnv output of each one as it completes.
+    def prepareEnvs(self, request, context):
+        extra = utils.getExtraLogData(request)
+        groups = prepare_envs_groups(request.environments)
+        self.logger.info("Received prepareEnvs request for {} environments ({} blueprints)".format(len(request.environments), len(groups)), extra=extra)
+        executor = futures.ThreadPoolExecutor(max_workers=self.prepare_envs_concurrency(request, groups), thread_name_prefix='prepareEnvs')
+        pending = {executor.submit(self.prepareEnv, group[0], context): group for group in groups}
+        try:
+            completed = 0
+            for future in futures.as_completed(pending):
+                try:
+                    result = future.result()
+                except Exception as err:
+                    result = self.prepare_env_error(pending[future][0], err, extra)
+                for environment in pending[future]:
+                    completed += 1
+                    yield utils.build_grpc_prepare_envs_progress(request.requestId, environment.identifiers, result, completed, len(request.environments))
+        finally:
+            # the client went away: do not start the remaining ones
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    # keeps the blueprint from being evicted and counts the execution in flight while it runs
+    @contextlib.contextmanager
+    def executing(self, handler):
+        with self.blueprint_gc.using(handler.blueprint_dir), server_metrics.in_flight(handler.blueprint_name, handler.blueprint_version):
+            yield
+
+    def prepare_envs_concurrency(self, request, groups):
+        concurrency = self.prepare_envs_max_concurrency
+        if request.maxConcurrency > 0:
+            concurrency = min(request.maxConcurrency, concurrency)
+        return max(1, min(concurrency, len(groups)))
+
+    def prepare_env_error(self, request, err, extra):
+        err_msg = "{} - Failed to prepare environment. Error: {}".format(utils.blueprint_name_version_uuid(request), err)
+        self.logger.error(err_msg, extra=extra)
+        return utils.build_grpc_response(request.requestId, utils.build_ret_data(False, error=err_msg))
+
     def executeCommand(self, request, context):
         blueprint_id = utils.blueprint_name_version_uuid(request)
         extra = utils.getExtraLogData(request)
@@ -57,8 +181,48 @@ class CommandExecutorServer(CommandExecutor_pb2_grpc.CommandExecutorServiceServi
         if os.environ.get('CE_DEBUG','false') == "true":
             self.logger.info(request, extra=extra)
 
-        handler = CommandExecutorHandler(request)
-        exec_cmd_response = handler.execute_command(request)
+        cache_key, cache_ttl = self.result_cache.request_key(request, blueprint_id)
+        if cache_key is not None:
+            cached_output = self.result_cache.get(cache_key, request.requestId)
+            self.service.prometheus_cache_counter.labels('execution_result', 'miss' if cached_output is None else 'hit').inc()
+            if cached_output is not None:
+                self.logger.info("{} - Returning cached executeCommand output".format(blueprint_id), extra=extra)
+                return cached_output
+
+        handler = self.new_handler(request)
+        with self.executing(handler):
+            exec_cmd_response = handler.execute_command(request)
+        ret = self.build_execute_command_response(request, exec_cmd_response, extra)
+        if cache_key is not None:
+            self.result_cache.put(cache_key, ret, cache_ttl)
+        return ret
+
+    def executeCommandStream(self, request, context):
+        blueprint_id = utils.blueprint_name_version_uuid(request)
+        extra = utils.getExtraLogData(request)
+        self.logger.info("{} - Received executeCommandStream request".format(blueprint_id), extra=extra)
+        if os.environ.get('CE_DEBUG','false') == "true":
+            self.logger.info(request, extra=extra)
+
+        handler = self.new_handler(request)
+        with self.executing(handler):
+            for kind, data in handler.execute_command_stream(request):
+                yield self.build_execute_command_stream_response(request, kind, data, extra)
+
+    # admin: dump the environment registry, optionally for a blueprint name / name and version / blueprint only
+    def getEnvironments(self, request, context):
+        extra = utils.getExtraLogData(request)
+        identifiers = [request.identifiers.blueprintName, request.identifiers.blueprintVersion, request.identifiers.blueprintUUID]
+        prefix = ''.join(identifier + '/' for identifier in itertools.takewhile(bool, identifiers))
+        self.logger.info("Received getEnvironments request for '{}'".format(prefix), extra=extra)
+        environments = self.environment_registry.dump(prefix, with_install_log=request.withInstallLog)
+        return utils.build_grpc_environments_response(request.requestId, environments)
+
+    def new_handler(self, request):
+        return CommandExecutorHandler(request, self.service)
+
+    def build_execute_command_response(self, request, exec_cmd_response, extra):
+        blueprint_id = utils.blueprint_name_version_uuid(request)
         if exec_cmd_response[utils.CDS_IS_SUCCESSFUL_KEY]:
             self.logger.info("{} - Execution finished successfully.".format(blueprint_id), extra=extra)
         else:
@@ -69,3 +233,35 @@ class CommandExecutorServer(CommandExecutor_pb2_grpc.CommandExecutorServiceServi
         self.logger.info("Payload returned : {}".format(exec_cmd_response), extra=extra)
 
         return ret
+
+    def build_execute_command_stream_response(self, request, kind, data, extra):
+        if kind == utils.STREAM_LOGS:
+            return utils.build_grpc_stream_response(request.requestId, logs=data)
+        if kind == utils.STREAM_PAYLOAD:
+            return utils.build_grpc_stream_response(request.requestId, payload=data)
+        blueprint_id = utils.blueprint_name_version_uuid(request)
+        if data[utils.CDS_IS_SUCCESSFUL_KEY]:
+            self.logger.info("{} - Execution finished successfully.".format(blueprint_id), extra=extra)
+        else:
+            script_err_msg = "Error returned: {}".format(data[utils.ERR_MSG_KEY]) if utils.ERR_MSG_KEY in data else ""
+            self.logger.info("{} - Failed to executeCommandStream. {}".format(blueprint_id, script_err_msg), extra=extra)
+        self.logger.info("Payload returned : {}".format(data), extra=extra)
+        return utils.build_grpc_stream_response(request.requestId, response=data)
+
+
+# The environments grouped by blueprint: a blueprint listed more than once is prepared once (whatever the cache
+# settings), its result is reported for each entry. Groups with distinct package sets come first: the ones sharing
+# a package set with an earlier one then find its package layer, Ansible roles and wheels (see
+# PACKAGE_LAYER_CACHE_ENABLED, ANSIBLE_ROLE_CACHE_ENABLED, WHEELHOUSE_ENABLED) ready, or wait for them to be built
+# once instead of each installing their own.
+def prepare_envs_groups(environments):
+    groups = {}
+    for environment in environments:
+        groups.setdefault(utils.blueprint_name_version_uuid(environment), []).append(environment)
+    first, others = [], []
+    package_sets = set()
+    for group in groups.values():
+        package_set = InstallPlan.from_request(group[0]).key()
+        (others if package_set in package_sets else first).append(group)
+        package_sets.add(package_set)
+    return first + others
@@ -0,0 +1,130 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import logging
+import os
+import prometheus_client as prometheus
+import utils
+from single_flight import SingleFlight
+from cba_extractor import CbaExtractor
+from execution_resources import ExecutionLimits
+
+
+# Per-process part of the command executor: the components shared by the requests, the Prometheus collectors and
+# the configuration read from the environment, set up once at startup.
+# A CommandExecutorHandler is built around it for each request.
+class CommandExecutorService():
+
+    def __init__(self, venv_template_pool=None, package_layer_cache=None, blueprint_flight=None, warm_worker_pool=None,
+                 cba_extractor=None, ansible_role_cache=None, wheelhouse=None, execution_limits=None, environment_registry=None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.extra = utils.getExtraLogData()
+        self.venv_template_pool = venv_template_pool
+        self.package_layer_cache = package_layer_cache
+        # serializes environment changes (prepare, venv creation) on a blueprint dir across concurrent requests
+        self.blueprint_flight = blueprint_flight if blueprint_flight is not None else SingleFlight()
+        self.warm_worker_pool = warm_worker_pool
+        self.cba_extractor = cba_extractor if cba_extractor is not None else CbaExtractor(max_workers=1)
+        self.ansible_role_cache = ansible_role_cache
+        self.wheelhouse = wheelhouse
+        self.execution_limits = execution_limits if execution_limits is not None else ExecutionLimits()
+        # state of the deployed blueprint environments, see EnvironmentRegistry
+        self.environment_registry = environment_registry
+
+        self.execution_usage_in_payload = os.environ.get('EXECUTION_USAGE_IN_PAYLOAD', 'false') == 'true'
+        self.pip_install_user_flag = 'PIP_INSTALL_USER_FLAG' in os.environ
+        self.pip_install_server_pip = 'PIP_INSTALL_SERVER_PIP' in os.environ
+        self.ansible_galaxy_workers = int(os.environ.get('ANSIBLE_GALAXY_WORKERS', '4'))
+        self.venv_system_site_packages_disabled = 'CREATE_VENV_DISABLE_SITE_PACKAGES' in os.environ
+
+        self.prometheus_histogram = self.get_prometheus_histogram()
+        self.prometheus_counter = self.get_prometheus_counter()
+        self.prometheus_usage_histograms = self.get_prometheus_usage_histograms()
+        self.prometheus_killed_processes_counter = self.get_prometheus_killed_processes_counter()
+        self.prometheus_cache_counter = self.get_prometheus_cache_counter()
+        self.prometheus_pip_install_histogram = self.get_prometheus_pip_install_histogram()
+        self.start_prometheus_server()
+
+    def get_prometheus_histogram(self):
+        histogram = getattr(prometheus.REGISTRY, '_command_executor_histogram', None)
+        if not histogram:
+            histogram = prometheus.Histogram('cds_ce_execution_duration_seconds',
+                             'How many times CE actions (upload, prepare env and execute) got executed and how long it took to complete for each CBA python script.',
+                             ['step', 'blueprint_name', 'blueprint_version', 'script_name'])
+            prometheus.REGISTRY._command_executor_histogram = histogram
+        return histogram
+
+    def get_prometheus_usage_histograms(self):
+        histograms = getattr(prometheus.REGISTRY, '_command_executor_usage_histograms', None)
+        if not histograms:
+            labels = ['step', 'blueprint_name', 'blueprint_version', 'script_name']
+            histograms = {
+                'cpu': prometheus.Histogram('cds_ce_execution_cpu_seconds', 'CPU time (user / sys) used by each CBA python script execution',
+                                            labels + ['mode'], buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, float('inf'))),
+                'max_rss': prometheus.Histogram('cds_ce_execution_max_rss_bytes', 'Peak resident memory of each CBA python script execution',
+                                                labels, buckets=tuple(2 ** i * 1024 * 1024 for i in range(3, 14)) + (float('inf'),)),
+                'io': prometheus.Histogram('cds_ce_execution_io_bytes', 'Bytes read / written from disk by each CBA python script execution',
+                                           labels + ['direction'], buckets=tuple(4 ** i * 1024 for i in range(0, 11)) + (float('inf'),)),
+            }
+            prometheus.REGISTRY._command_executor_usage_histograms = histograms
+        return histograms
+
+    def get_prometheus_killed_processes_counter(self):
+        counter = getattr(prometheus.REGISTRY, '_command_executor_killed_processes_counter', None)
+        if not counter:
+            counter = prometheus.Counter('cds_ce_execution_killed_processes', 'Processes killed when a CBA python script execution timed out',
+                                         ['step', 'blueprint_name', 'blueprint_version', 'script_name'])
+            prometheus.REGISTRY._command_executor_killed_processes_counter = counter
+        return counter
+
+    def get_prometheus_cache_counter(self):
+        counter = getattr(prometheus.REGISTRY, '_command_executor_cache_counter', None)
+        if not counter:
+            counter = prometheus.Counter('cds_ce_cache_total', 'Hits and misses of the venv template pool, package layer cache and execution result cache',
+                                         ['cache', 'result'])
+            prometheus.REGISTRY._command_executor_cache_counter = counter
+        return counter
+
+    def get_prometheus_pip_install_histogram(self):
+        histogram = getattr(prometheus.REGISTRY, '_command_executor_pip_install_histogram', None)
+        if not histogram:
+            histogram = prometheus.Histogram('cds_ce_pip_install_duration_seconds',
+                                             'Duration of the pip install runs, by kind (venv: in the blueprint venv, package_layer: shared layer build) and result',
+                                             ['kind', 'result'], buckets=(1, 2.5, 5, 10, 30, 60, 120, 300, 600, float('inf')))
+            prometheus.REGISTRY._command_executor_pip_install_histogram = histogram
+        return histogram
+
+    def get_prometheus_counter(self):
+        counter = getattr(prometheus.REGISTRY, '_command_executor_counter', None)
+        if not counter:
+            counter = prometheus.Counter('cds_ce_execution_error_total',
+                              'How many times CE actions (upload, prepare env and execute) got executed and failed for each CBA python script',
+                              ['step', 'blueprint_name', 'blueprint_version', 'script_name'])
+            prometheus.REGISTRY._command_executor_counter = counter
+        return counter
+
+    def start_prometheus_server(self):
+        self.logger.info("PROMETHEUS_METRICS_ENABLED: {}".format(os.environ.get('PROMETHEUS_METRICS_ENABLED')), extra=self.extra)
+        if (os.environ.get('PROMETHEUS_METRICS_ENABLED')):
+           if not "PROMETHEUS_PORT" in os.environ:
+              err_msg = "ERROR: failed to start prometheus server, PROMETHEUS_PORT env variable is not found."
+              self.logger.error(err_msg, extra=self.extra)
+              return utils.build_ret_data(False, results_log=[], error=err_msg)
+
+           server_started = getattr(prometheus.REGISTRY, '_command_executor_prometheus_server_started', None)
+           if not server_started:
+               self.logger.info("PROMETHEUS_PORT: {}".format(os.environ.get('PROMETHEUS_PORT')), extra=self.extra)
+               prometheus.start_http_server(int(os.environ.get('PROMETHEUS_PORT')))
+               prometheus.REGISTRY._command_executor_prometheus_server_started = True
@@ -0,0 +1,185 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import logging
+import os
+import threading
+import time
+import utils
+from blueprint_gc import scan_dirs
+
+# blueprint dir without TOSCA meta: the leftover of an interrupted upload
+INCOMPLETE = 'incomplete'
+# CBA uploaded, environment not prepared yet
+UPLOADED = 'uploaded'
+# environment prepared (.installed marker written, venv python present)
+INSTALLED = 'installed'
+# last use times more recent than that are not written to the blueprint dir mtime again
+USED_MTIME_RESOLUTION = 60
+
+
+class BlueprintEnvironment():
+
+    def __init__(self, blueprint_id, state, last_used=0.0, size=None):
+        self.blueprint_id = blueprint_id
+        self.state = state
+        # content of the .installed marker, read once when first needed
+        self.install_log = None
+        self.last_used = last_used
+        # bytes on disk, None until measured by the blueprint garbage collector
+        self.size = size
+
+    def as_dict(self, with_install_log=False):
+        environment = {'blueprint_id': self.blueprint_id, 'state': self.state, 'last_used': self.last_used, 'size': self.size}
+        if with_install_log:
+            environment['install_log'] = self.install_log
+        return environment
+
+
+# In-memory state of the deployed blueprint environments (<deploy dir>/<name>/<version>/<uuid>), keyed by
+# blueprint id (<name>/<version>/<uuid>). Loaded from disk at startup, then kept up to date by the upload,
+# prepare and garbage collection steps, so that requests do not stat the blueprint dir, TOSCA meta file and
+# .installed marker again and again.
+# Blueprints unknown to the registry are looked up on disk, and recorded when found there. A known uploaded or
+# installed state is checked against its marker files (a stat or two) before being trusted, so that an environment
+# changed behind the back of the registry (marker or venv removed, dir wiped) is probed again.
+class EnvironmentRegistry():
+
+    def __init__(self, deploy_dir, tosca_meta_file, installed_file='.installed'):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.deploy_dir = deploy_dir
+        self.tosca_meta_file = tosca_meta_file
+        self.installed_file = installed_file
+        self.lock = threading.Lock()
+        # blueprint id -> BlueprintEnvironment
+        self.environments = {}
+
+    def load(self):
+        count = 0
+        for name_entry in scan_dirs(self.deploy_dir):
+            for version_entry in scan_dirs(name_entry.path):
+                for entry in scan_dirs(version_entry.path):
+                    # staging and evicted dirs
+                    if entry.name.startswith('.'):
+                        continue
+                    self.probe('/'.join((name_entry.name, version_entry.name, entry.name)))
+                    count += 1
+        self.logger.info("Loaded {} blueprint environments from {}".format(count, self.deploy_dir), extra=utils.getExtraLogData())
+
+    def blueprint_dir(self, blueprint_id):
+        return os.path.join(self.deploy_dir, blueprint_id)
+
+    # Returns the state of a blueprint environment, None when it does not exist.
+    def state(self, blueprint_id):
+        environment = self.environments.get(blueprint_id)
+        if environment is not None and not self.still_valid(environment):
+            self.logger.info("Blueprint environment {} is no longer {} on disk, probing it again".format(blueprint_id, environment.state), extra=utils.getExtraLogData())
+            with self.lock:
+                if self.environments.get(blueprint_id) is environment:
+                    del self.environments[blueprint_id]
+            environment = None
+        if environment is None:
+            environment = self.probe(blueprint_id)
+        return environment.state if environment is not None else None
+
+    # Cheap check of a known state against the disk: the marker of the state (and the venv python when installed).
+    def still_valid(self, environment):
+        blueprint_dir = self.blueprint_dir(environment.blueprint_id)
+        if environment.state == INSTALLED:
+            return os.path.exists(os.path.join(blueprint_dir, self.installed_file)) and os.path.exists(os.path.join(blueprint_dir, 'bin', 'python'))
+        if environment.state == UPLOADED:
+            return os.path.exists(os.path.join(blueprint_dir, self.tosca_meta_file))
+        return os.path.isdir(blueprint_dir)
+
+    # Reads the state of a blueprint environment from disk.
+    def probe(self, blueprint_id):
+        blueprint_dir = self.blueprint_dir(blueprint_id)
+        try:
+            last_used = os.stat(blueprint_dir).st_mtime
+        except FileNotFoundError:
+            return None
+        if os.path.exists(os.path.join(blueprint_dir, self.installed_file)) and os.path.exists(os.path.join(blueprint_dir, 'bin', 'python')):
+            state = INSTALLED
+        elif os.path.exists(os.path.join(blueprint_dir, self.tosca_meta_file)):
+            state = UPLOADED
+        else:
+            state = INCOMPLETE
+        with self.lock:
+            environment = self.environments.get(blueprint_id)
+            if environment is None:
+                environment = BlueprintEnvironment(blueprint_id, state, last_used)
+                self.environments[blueprint_id] = environment
+            return environment
+
+    # Returns the install log of an installed environment.
+    def install_log(self, blueprint_id):
+        environment = self.environments.get(blueprint_id)
+        if environment is None or environment.state != INSTALLED:
+            return None
+        if environment.install_log is None:
+            with open(os.path.join(self.blueprint_dir(blueprint_id), self.installed_file), "r") as f:
+                environment.install_log = f.read()
+        return environment.install_log
+
+    def set_state(self, blueprint_id, state):
+        with self.lock:
+            environment = self.environments.get(blueprint_id)
+            if environment is None:
+                self.environments[blueprint_id] = BlueprintEnvironment(blueprint_id, state, time.time())
+            else:
+                environment.state = state
+                environment.install_log = None
+
+    def uploaded(self, blueprint_id):
+        self.set_state(blueprint_id, UPLOADED)
+
+    def installed(self, blueprint_id):
+        self.set_state(blueprint_id, INSTALLED)
+
+    def removed(self, blueprint_id):
+        with self.lock:
+            self.environments.pop(blueprint_id, None)
+
+    # Records a use of the blueprint. Returns True when its dir mtime, which orders the garbage collection
+    # across restarts, should be updated as well.
+    def used(self, blueprint_id):
+        environment = self.environments.get(blueprint_id)
+        now = time.time()
+        if environment is None:
+            return True
+        touch = now - environment.last_used >= USED_MTIME_RESOLUTION
+        environment.last_used = now
+        return touch
+
+    def last_used(self, blueprint_id):
+        environment = self.environments.get(blueprint_id)
+        return environment.last_used if environment is not None else 0.0
+
+    def measured(self, blueprint_id, size):
+        environment = self.environments.get(blueprint_id)
+        if environment is not None:
+            environment.size = size
+
+    # Returns the environments (as dicts) whose id starts with prefix (<name>/, <name>/<version>/ ...).
+    def dump(self, prefix='', with_install_log=False):
+        with self.lock:
+            environments = [environment for blueprint_id, environment in sorted(self.environments.items()) if (blueprint_id + '/').startswith(prefix)]
+        if with_install_log:
+            for environment in environments:
+                try:
+                    self.install_log(environment.blueprint_id)
+                except OSError:
+                    pass
+        return [environment.as_dict(with_install_log) for environment in environments]
@@ -0,0 +1,223 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from subprocess import TimeoutExpired
+import asyncio
+import os
+import resource
+import signal
+import subprocess
+import threading
+import time
+
+# env variable -> (rlimit, multiplier), 0 or unset: no limit
+RLIMITS_ENV = {
+    'EXEC_LIMIT_CPU_SECONDS': (resource.RLIMIT_CPU, 1),
+    'EXEC_LIMIT_AS_MB': (resource.RLIMIT_AS, 1024 * 1024),
+    'EXEC_LIMIT_NOFILE': (resource.RLIMIT_NOFILE, 1),
+    # Not a per execution limit: RLIMIT_NPROC caps the processes and threads of the whole uid, i.e. the command
+    # executor itself (gRPC and worker threads, warm workers) and all the concurrent executions. It only works as
+    # a fork bomb ceiling, set well above the server own task count plus the expected concurrent executions.
+    'EXEC_LIMIT_NPROC': (resource.RLIMIT_NPROC, 1),
+}
+# ru_inblock / ru_oublock unit
+BLOCK_SIZE = 512
+# time given to the processes of a timed out command to exit on SIGTERM before SIGKILL
+KILL_GRACE_PERIOD = float(os.environ.get('EXEC_KILL_GRACE_SECONDS', '5'))
+# time given to the processes to go away after SIGKILL
+KILL_WAIT = 2
+
+
+# TimeoutExpired, with the number of processes of the command killed when it expired.
+class ExecutionTimeoutExpired(TimeoutExpired):
+
+    def __init__(self, cmd, timeout, killed_processes=0):
+        super().__init__(cmd, timeout)
+        self.killed_processes = killed_processes
+
+
+# rlimits applied to every executed command (and inherited by its children).
+class ExecutionLimits():
+
+    def __init__(self, limits=None):
+        # rlimit -> value
+        self.limits = limits or {}
+
+    @classmethod
+    def from_env(cls):
+        limits = {}
+        for env_var, (rlimit, multiplier) in RLIMITS_ENV.items():
+            value = int(os.environ.get(env_var, '0'))
+            if value > 0:
+                limits[rlimit] = value * multiplier
+        return cls(limits)
+
+    def is_set(self):
+        return bool(self.limits)
+
+    # {rlimit: value} as sent to the warm workers
+    def as_dict(self):
+        return {str(rlimit): value for rlimit, value in self.limits.items()}
+
+    # preexec_fn for Popen, None when there is nothing to apply
+    def preexec_fn(self):
+        if not self.limits:
+            return None
+        return lambda: apply_rlimits(self.limits)
+
+
+# Runs in the child before exec: lower the soft and hard limits, never raise them above the current hard limit.
+def apply_rlimits(limits):
+    for rlimit, value in limits.items():
+        _, hard = resource.getrlimit(int(rlimit))
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        resource.setrlimit(int(rlimit), (value, value))
+
+
+# CPU, memory and I/O used by an execution (the process and the children it waited for), from wait4.
+def usage_from_rusage(rusage):
+    return {
+        'user_cpu_seconds': rusage.ru_utime,
+        'sys_cpu_seconds': rusage.ru_stime,
+        # Linux reports kilobytes
+        'max_rss_bytes': rusage.ru_maxrss * 1024,
+        'read_bytes': rusage.ru_inblock * BLOCK_SIZE,
+        'written_bytes': rusage.ru_oublock * BLOCK_SIZE,
+    }
+
+
+def exit_code(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+# Live (not zombie) processes of a session, from /proc.
+def session_processes(sid):
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/{}/stat'.format(entry)) as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # after the "(comm)" field: state ppid pgrp session ...
+        fields = stat[stat.rfind(')') + 2:].split()
+        if fields[0] != 'Z' and int(fields[3]) == sid:
+            pids.append(int(entry))
+    return pids
+
+
+def signal_processes(sid, pids, sig):
+    for pid in pids:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+    try:
+        os.killpg(sid, sig)
+    except ProcessLookupError:
+        pass
+
+
+# Kills every process of the session of a command started with start_new_session (sid: its pid), including the ones
+# that moved to another process group: SIGTERM, then SIGKILL for those still alive after grace_period seconds.
+# Returns the number of processes killed.
+def kill_session(sid, grace_period=None):
+    if grace_period is None:
+        grace_period = KILL_GRACE_PERIOD
+    killed = set()
+    for sig, wait in ((signal.SIGTERM, grace_period), (signal.SIGKILL, KILL_WAIT)):
+        pids = session_processes(sid)
+        if not pids:
+            break
+        killed.update(pids)
+        signal_processes(sid, pids, sig)
+        deadline = time.time() + wait
+        while session_processes(sid) and time.time() < deadline:
+            time.sleep(0.1)
+    return len(killed)
+
+
+# Waits for a Popen process with wait4, so that its resource usage is known. Returns (return code, usage).
+# When the timeout expires, kill(process) is called, the process is reaped and ExecutionTimeoutExpired raised
+# with the number of processes kill returned.
+def wait_with_usage(process, timeout=None, kill=None):
+    lock = threading.Lock()
+    killed_processes = []
+
+    def expire():
+        with lock:
+            # only a process not reaped yet is killed: its pid can not have been reused
+            if process.returncode is None:
+                killed_processes.append((kill or subprocess.Popen.kill)(process) or 0)
+
+    timer = None
+    if timeout is not None:
+        timer = threading.Timer(timeout, expire)
+        timer.start()
+    try:
+        # waits for the exit without reaping, then reaps under the lock, so that the timer either
+        # ran before (the process was still there) or sees it reaped and does nothing
+        os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+        with lock:
+            _, status, rusage = os.wait4(process.pid, 0)
+            # reaped here: Popen must not wait for it again
+            process.returncode = exit_code(status)
+    finally:
+        if timer is not None:
+            timer.cancel()
+    if killed_processes:
+        raise ExecutionTimeoutExpired(process.args, timeout, killed_processes[0])
+    return process.returncode, usage_from_rusage(rusage)
+
+
+# asyncio counterpart of wait_with_usage, for a subprocess.Popen process: returns a future of (return code, usage).
+# The asyncio child watcher reaps its processes with waitpid, losing their resource usage: wait4 runs in a thread of
+# its own instead, as the default (threaded) child watcher does, not in the loop executor whose size would cap the
+# concurrent executions.
+def wait_with_usage_async(process, timeout=None, kill=None):
+    loop = asyncio.get_event_loop()
+    future = loop.create_future()
+
+    def resolve(outcome, error):
+        if future.cancelled():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(outcome)
+
+    def wait():
+        try:
+            outcome = wait_with_usage(process, timeout, kill)
+        except Exception as error:
+            loop.call_soon_threadsafe(resolve, None, error)
+        else:
+            loop.call_soon_threadsafe(resolve, outcome, None)
+
+    threading.Thread(target=wait, name='wait-{}'.format(process.pid), daemon=True).start()
+    return future
+
+
+# subprocess.run(cmd, shell=True, timeout=...) counterpart returning (return code, usage).
+# The command runs in its own session, killed as a whole on timeout.
+def run_with_usage(cmd, stdout, env, timeout, limits=None):
+    process = subprocess.Popen(cmd, stdout=stdout, stderr=subprocess.STDOUT, shell=True, env=env, start_new_session=True,
+                               preexec_fn=limits.preexec_fn() if limits is not None else None)
+    return wait_with_usage(process, timeout, kill=lambda p: kill_session(p.pid))
@@ -0,0 +1,120 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from subprocess import CalledProcessError, PIPE
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import uuid
+import proto.CommandExecutor_pb2 as CommandExecutor_pb2
+import utils
+from single_flight import SingleFlight
+
+
+# What prepareEnv has to install for a request: all its Packages entries merged per type (first occurrence order,
+# duplicates dropped), so pip resolves everything in one run and the Ansible roles can be fetched concurrently.
+class InstallPlan():
+
+    def __init__(self, pip_packages, ansible_roles):
+        self.pip_packages = pip_packages
+        self.ansible_roles = ansible_roles
+
+    @classmethod
+    def from_request(cls, request):
+        packages = {CommandExecutor_pb2.pip: [], CommandExecutor_pb2.ansible_galaxy: []}
+        for package in request.packages:
+            for p in package.package:
+                if p not in packages[package.type]:
+                    packages[package.type].append(p)
+        return cls(packages[CommandExecutor_pb2.pip], packages[CommandExecutor_pb2.ansible_galaxy])
+
+    def packages(self, type):
+        return self.pip_packages if type == CommandExecutor_pb2.pip else self.ansible_roles
+
+    # same key: same packages to install
+    def key(self):
+        return tuple(sorted(self.pip_packages)), tuple(sorted(self.ansible_roles))
+
+
+# Ansible roles downloaded once per role spec ('name' or 'name,version') and copied into the blueprints asking for them.
+class AnsibleRoleCache():
+
+    def __init__(self, cache_dir, enabled=False):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.downloads = SingleFlight()
+
+    def is_enabled(self):
+        return self.enabled
+
+    def role_path(self, role):
+        return os.path.join(self.cache_dir, hashlib.sha256(role.encode()).hexdigest())
+
+    # Installs 'role' in roles_dir from the cache, downloading it first when needed. Returns (success, install log).
+    def install(self, role, roles_dir, env, extra=None):
+        success, install_log = self.downloads.do(role, lambda: self.download(role, env, extra))
+        if success:
+            copy_roles(self.role_path(role), roles_dir)
+        return success, install_log
+
+    def download(self, role, env, extra=None):
+        if os.path.isdir(self.role_path(role)):
+            return True, "Ansible role {} found in the role cache\n".format(role)
+        os.makedirs(self.cache_dir, mode=0o755, exist_ok=True)
+        tmp_path = os.path.join(self.cache_dir, ".tmp-{}".format(uuid.uuid4().hex))
+        self.logger.info("Downloading Ansible role {} to the role cache".format(role), extra=extra or utils.getExtraLogData())
+        try:
+            install_log = subprocess.run(["ansible-galaxy", "install", role, "-p", tmp_path], check=True, stdout=PIPE, stderr=PIPE, env=env).stdout.decode()
+        except CalledProcessError as e:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return False, e.stderr.decode()
+        try:
+            os.rename(tmp_path, self.role_path(role))
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        return True, install_log
+
+
+_roles_dirs_lock = threading.Lock()
+_roles_dir_locks = {}
+
+
+# roles installed concurrently share their dependencies: the merges into a roles_dir are serialized
+def roles_dir_lock(roles_dir):
+    with _roles_dirs_lock:
+        return _roles_dir_locks.setdefault(os.path.realpath(roles_dir), threading.Lock())
+
+
+# copy (or move, src_dir being on the same file system) the roles and their dependencies found in src_dir
+# to roles_dir, keeping the roles already there
+def copy_roles(src_dir, roles_dir, move=False):
+    os.makedirs(roles_dir, mode=0o755, exist_ok=True)
+    with roles_dir_lock(roles_dir):
+        for entry in os.listdir(src_dir):
+            dst = os.path.join(roles_dir, entry)
+            if os.path.exists(dst):
+                continue
+            try:
+                if move:
+                    os.rename(os.path.join(src_dir, entry), dst)
+                else:
+                    shutil.copytree(os.path.join(src_dir, entry), dst, symlinks=True)
+            except FileExistsError:
+                # installed meanwhile by another process
+                pass
@@ -0,0 +1,296 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from subprocess import CalledProcessError, PIPE
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import sysconfig
+import threading
+import time
+import uuid
+import prometheus_client as prometheus
+import utils
+from blueprint_gc import EVICTED_PREFIX, STALE_UPLOAD_AGE, scan_dirs, tree_size
+from single_flight import SingleFlight
+
+LAYER_PTH_FILE = 'cds_package_layer.pth'
+# records the interpreter the layer console scripts were generated for
+LAYER_PYTHON_FILE = '.python'
+# 'pip freeze' of the layer: the resolved package set it is keyed on
+LAYER_PACKAGES_FILE = '.packages'
+# one file per venv linked to the layer, holding the venv dir
+LAYER_LINKS_DIR = '.links'
+# request key -> layer key files, see resolved_layer()
+REQUESTS_DIR = '.requests'
+TMP_PREFIX = '.tmp-'
+
+
+# Content-addressed store of pip installed packages ("layers").
+# A layer is installed once with 'pip install --target' and keyed by the package set pip resolved (its 'pip freeze')
+# and the interpreter, so that requests resolving to the same set share it. The requested packages (requirements.txt
+# content included) are mapped to the layer they resolved to for resolve_ttl seconds (0: for ever), then installed
+# again: unpinned specs pick up new releases, and land in the same layer when nothing changed.
+# A venv is linked to its layer with a .pth file and copies of the layer console scripts.
+# Layers no venv links to anymore are evicted, least recently used first, when the layers exceed max_size bytes
+# or max_entries (0: no limit).
+class PackageLayerCache():
+
+    def __init__(self, cache_dir, enabled=False, max_size=0, max_entries=0, interval=300, resolve_ttl=86400):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.interval = interval
+        self.resolve_ttl = resolve_ttl
+        # blueprints asking for the same packages at the same time wait for a single build
+        self.builds = SingleFlight()
+        # links and evictions
+        self.lock = threading.Lock()
+        self.thread = None
+        self.metrics = get_prometheus_metrics()
+
+    def is_enabled(self):
+        return self.enabled
+
+    def start(self):
+        if not self.enabled or (self.max_size <= 0 and self.max_entries <= 0) or self.thread is not None:
+            return
+        self.logger.info("Starting package layer garbage collector on {} (max size: {}, max entries: {})".format(self.cache_dir, self.max_size, self.max_entries),
+                         extra=utils.getExtraLogData())
+        self.thread = threading.Thread(target=self.run, name=self.__class__.__name__, daemon=True)
+        self.thread.start()
+
+    # packages: pip package specs as sent in PrepareEnvInput, requirements_txt: content of the CBA requirements.txt (if any)
+    def request_key(self, packages, requirements_txt=None):
+        return key_of({'packages': sorted(packages), 'requirements_txt': requirements_txt})
+
+    # freeze: 'pip freeze' output of an installed layer
+    def layer_key(self, freeze):
+        return key_of({'freeze': sorted(line for line in freeze.splitlines() if line.strip())})
+
+    def layer_path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def request_path(self, request_key):
+        return os.path.join(self.cache_dir, REQUESTS_DIR, request_key)
+
+    def has_layer(self, key):
+        return os.path.isdir(self.layer_path(key))
+
+    # Returns the key of the layer the packages of request_key resolved to, None when not known (or too old).
+    def resolved_layer(self, request_key):
+        path = self.request_path(request_key)
+        try:
+            if self.resolve_ttl > 0 and time.time() - os.stat(path).st_mtime > self.resolve_ttl:
+                return None
+            with open(path, "r") as f:
+                key = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return key if self.has_layer(key) else None
+
+    # Returns (success, install log, layer key). The wheels of pip_args go to the wheelhouse first, when given.
+    def build_layer(self, request_key, pip, pip_args, env, extra=None, wheelhouse=None):
+        return self.builds.do(request_key, lambda: self.build_layer_once(request_key, pip, pip_args, env, extra, wheelhouse))
+
+    def build_layer_once(self, request_key, pip, pip_args, env, extra=None, wheelhouse=None):
+        key = self.resolved_layer(request_key)
+        if key is not None:
+            return True, "Package layer {} was built concurrently\n".format(key), key
+        if wheelhouse is not None:
+            success, wheel_log, pip_args = wheelhouse.install_args(pip, pip_args, env, extra=extra)
+            if not success:
+                return False, wheel_log, None
+        os.makedirs(os.path.join(self.cache_dir, REQUESTS_DIR), mode=0o755, exist_ok=True)
+        # install aside and rename into place, a layer dir is only ever seen complete
+        tmp_path = os.path.join(self.cache_dir, "{}{}-{}".format(TMP_PREFIX, request_key, uuid.uuid4().hex))
+        command = [pip, "install", "--target", tmp_path] + pip_args
+        self.logger.info("Building package layer for {} with: {}".format(request_key, command), extra=extra or utils.getExtraLogData())
+        try:
+            install_log = subprocess.run(command, check=True, stdout=PIPE, stderr=PIPE, env=env).stdout.decode()
+            freeze = subprocess.run([pip, "freeze", "--path", tmp_path], check=True, stdout=PIPE, stderr=PIPE, env=env).stdout.decode()
+        except CalledProcessError as e:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            self.logger.error("Building package layer for {} failed".format(request_key), extra=extra or utils.getExtraLogData())
+            return False, e.stderr.decode(), None
+        key = self.layer_key(freeze)
+        with open(os.path.join(tmp_path, LAYER_PYTHON_FILE), "w") as f:
+            f.write(os.path.join(os.path.dirname(pip), "python"))
+        with open(os.path.join(tmp_path, LAYER_PACKAGES_FILE), "w") as f:
+            f.write(freeze)
+        with self.lock:
+            try:
+                os.rename(tmp_path, self.layer_path(key))
+            except OSError:
+                # the packages resolved to a layer already in place: keep it
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                self.logger.info("Package layer for {} resolved to the existing layer {}".format(request_key, key), extra=extra or utils.getExtraLogData())
+                os.utime(self.layer_path(key))
+            # written aside and renamed, the request is only ever seen mapped to a complete layer
+            tmp_request_path = "{}.{}".format(self.request_path(request_key), uuid.uuid4().hex)
+            with open(tmp_request_path, "w") as f:
+                f.write(key)
+            os.replace(tmp_request_path, self.request_path(request_key))
+        return True, install_log, key
+
+    # Returns False when the layer was evicted in the meantime.
+    def link_layer(self, key, venv_dir):
+        layer_path = self.layer_path(key)
+        py_ver = "python{}.{}".format(sys.version_info.major, sys.version_info.minor)
+        with self.lock:
+            if not self.has_layer(key):
+                return False
+            # the layer is in use (and recently used) from now on
+            os.makedirs(os.path.join(layer_path, LAYER_LINKS_DIR), exist_ok=True)
+            with open(os.path.join(layer_path, LAYER_LINKS_DIR, key_of(os.path.normpath(venv_dir))), "w") as f:
+                f.write(os.path.normpath(venv_dir))
+            os.utime(layer_path)
+        with open(os.path.join(venv_dir, "lib", py_ver, "site-packages", LAYER_PTH_FILE), "w") as f:
+            f.write(layer_path + "\n")
+        # console scripts point to the interpreter which built the layer, re-home them to this venv
+        layer_bin = os.path.join(layer_path, "bin")
+        if not os.path.isdir(layer_bin):
+            return True
+        with open(os.path.join(layer_path, LAYER_PYTHON_FILE), "r") as f:
+            layer_python = os.fsencode(f.read())
+        venv_python = os.fsencode(os.path.join(venv_dir, "bin", "python"))
+        for entry in os.listdir(layer_bin):
+            dst = os.path.join(venv_dir, "bin", entry)
+            if os.path.lexists(dst):
+                continue
+            src = os.path.join(layer_bin, entry)
+            with open(src, "rb") as f:
+                content = f.read()
+            with open(dst, "wb") as f:
+                f.write(content.replace(layer_python, venv_python))
+            shutil.copymode(src, dst)
+        return True
+
+    # Number of venvs still linked to the layer: their .pth file points to it. Forgets the other ones
+    # (evicted or re-uploaded blueprints).
+    def live_links(self, key):
+        layer_path = self.layer_path(key)
+        links_dir = os.path.join(layer_path, LAYER_LINKS_DIR)
+        py_ver = "python{}.{}".format(sys.version_info.major, sys.version_info.minor)
+        live = 0
+        for entry in os.listdir(links_dir) if os.path.isdir(links_dir) else []:
+            link_path = os.path.join(links_dir, entry)
+            try:
+                with open(link_path, "r") as f:
+                    venv_dir = f.read()
+                with open(os.path.join(venv_dir, "lib", py_ver, "site-packages", LAYER_PTH_FILE), "r") as f:
+                    linked = f.read().strip() == layer_path
+            except FileNotFoundError:
+                linked = False
+            if linked:
+                live += 1
+            else:
+                try:
+                    os.remove(link_path)
+                except FileNotFoundError:
+                    pass
+        return live
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.collect()
+            except Exception as err:
+                self.logger.error("Package layer garbage collection failed. Error: {}".format(err), extra=utils.getExtraLogData())
+
+    def collect(self):
+        layers = []
+        for entry in scan_dirs(self.cache_dir):
+            if entry.name.startswith(EVICTED_PREFIX) or \
+                    (entry.name.startswith(TMP_PREFIX) and time.time() - entry.stat().st_mtime > STALE_UPLOAD_AGE):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            elif not entry.name.startswith('.'):
+                layers.append((entry.stat().st_mtime, tree_size(entry.path), entry.name))
+
+        total_size = sum(size for _, size, _ in layers)
+        count = len(layers)
+        # least recently built or linked first
+        for _, size, key in sorted(layers):
+            if self.max_size > 0 and total_size > self.max_size:
+                reason = 'size'
+            elif self.max_entries > 0 and count > self.max_entries:
+                reason = 'entries'
+            else:
+                break
+            if not self.evict(key):
+                self.metrics['skipped'].inc()
+                continue
+            self.metrics['evictions'].labels(reason).inc()
+            self.metrics['evicted_bytes'].inc(size)
+            total_size -= size
+            count -= 1
+        self.forget_evicted_requests()
+        self.metrics['layers'].set(count)
+        self.metrics['layers_bytes'].set(total_size)
+
+    # Returns False when a venv is still linked to the layer.
+    def evict(self, key):
+        evicted_path = os.path.join(self.cache_dir, EVICTED_PREFIX + uuid.uuid4().hex)
+        with self.lock:
+            if self.live_links(key) > 0:
+                return False
+            # renamed while holding the lock: a venv linking now finds no layer rather than half of it
+            os.rename(self.layer_path(key), evicted_path)
+        self.logger.info("Evicting package layer {}".format(key), extra=utils.getExtraLogData())
+        shutil.rmtree(evicted_path, ignore_errors=True)
+        return True
+
+    def forget_evicted_requests(self):
+        requests_dir = os.path.join(self.cache_dir, REQUESTS_DIR)
+        for entry in os.listdir(requests_dir) if os.path.isdir(requests_dir) else []:
+            try:
+                with open(os.path.join(requests_dir, entry), "r") as f:
+                    key = f.read().strip()
+                if not self.has_layer(key):
+                    os.remove(os.path.join(requests_dir, entry))
+            except FileNotFoundError:
+                pass
+
+
+# key of the data and the interpreter it is installed for
+def key_of(data):
+    key_data = {
+        'python': sys.version,
+        'platform': sysconfig.get_platform(),
+        'data': data
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+
+def get_prometheus_metrics():
+    metrics = getattr(prometheus.REGISTRY, '_command_executor_package_layer_metrics', None)
+    if not metrics:
+        metrics = {
+            'evictions': prometheus.Counter('cds_ce_package_layer_evictions_total',
+                                            'How many package layers were evicted, by reason (size or entries quota)', ['reason']),
+            'evicted_bytes': prometheus.Counter('cds_ce_package_layer_evicted_bytes_total', 'Disk space freed by evicting package layers'),
+            'skipped': prometheus.Counter('cds_ce_package_layer_eviction_skipped_total', 'How many times a package layer to evict was skipped because a venv was linked to it'),
+            'layers': prometheus.Gauge('cds_ce_package_layers', 'Number of package layers after the last garbage collection'),
+            'layers_bytes': prometheus.Gauge('cds_ce_package_layers_bytes', 'Disk space used by the package layers after the last garbage collection'),
+        }
+        prometheus.REGISTRY._command_executor_package_layer_metrics = metrics
+    return metrics
@@ -1,80 +1,237 @@
 # Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
 import grpc
 
 import proto.CommandExecutor_pb2 as CommandExecutor__pb2
 
 
 class CommandExecutorServiceStub(object):
-  # missing associated documentation comment in .proto file
-  pass
-
-  def __init__(self, channel):
-    """Constructor.
-
-    Args:
-      channel: A grpc.Channel.
-    """
-    self.uploadBlueprint = channel.unary_unary(
-        '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/uploadBlueprint',
-        request_serializer=CommandExecutor__pb2.UploadBlueprintInput.SerializeToString,
-        response_deserializer=CommandExecutor__pb2.UploadBlueprintOutput.FromString,
-        )
-    self.prepareEnv = channel.unary_unary(
-        '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/prepareEnv',
-        request_serializer=CommandExecutor__pb2.PrepareEnvInput.SerializeToString,
-        response_deserializer=CommandExecutor__pb2.ExecutionOutput.FromString,
-        )
-    self.executeCommand = channel.unary_unary(
-        '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/executeCommand',
-        request_serializer=CommandExecutor__pb2.ExecutionInput.SerializeToString,
-        response_deserializer=CommandExecutor__pb2.ExecutionOutput.FromString,
-        )
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.uploadBlueprint = channel.unary_unary(
+                '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/uploadBlueprint',
+                request_serializer=CommandExecutor__pb2.UploadBlueprintInput.SerializeToString,
+                response_deserializer=CommandExecutor__pb2.UploadBlueprintOutput.FromString,
+                )
+        self.prepareEnv = channel.unary_unary(
+                '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/prepareEnv',
+                request_serializer=CommandExecutor__pb2.PrepareEnvInput.SerializeToString,
+                response_deserializer=CommandExecutor__pb2.ExecutionOutput.FromString,
+                )
+        self.prepareEnvs = channel.unary_stream(
+                '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/prepareEnvs',
+                request_serializer=CommandExecutor__pb2.PrepareEnvsInput.SerializeToString,
+                response_deserializer=CommandExecutor__pb2.PrepareEnvsProgress.FromString,
+                )
+        self.executeCommand = channel.unary_unary(
+                '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/executeCommand',
+                request_serializer=CommandExecutor__pb2.ExecutionInput.SerializeToString,
+                response_deserializer=CommandExecutor__pb2.ExecutionOutput.FromString,
+                )
+        self.executeCommandStream = channel.unary_stream(
+                '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/executeCommandStream',
+                request_serializer=CommandExecutor__pb2.ExecutionInput.SerializeToString,
+                response_deserializer=CommandExecutor__pb2.ExecutionStreamOutput.FromString,
+                )
+        self.getEnvironments = channel.unary_unary(
+                '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/getEnvironments',
+                request_serializer=CommandExecutor__pb2.EnvironmentsInput.SerializeToString,
+                response_deserializer=CommandExecutor__pb2.EnvironmentsOutput.FromString,
+                )
 
 
 class CommandExecutorServiceServicer(object):
-  # missing associated documentation comment in .proto file
-  pass
-
-  def uploadBlueprint(self, request, context):
-    """rpc to upload the CBA
-    """
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
-
-  def prepareEnv(self, request, context):
-    """prepare Python environment
-    """
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
-
-  def executeCommand(self, request, context):
-    """execute the actual command.
-    """
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
+    """Missing associated documentation comment in .proto file."""
+
+    def uploadBlueprint(self, request, context):
+        """rpc to upload the CBA
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def prepareEnv(self, request, context):
+        """prepare Python environment
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def prepareEnvs(self, request, context):
+        """prepare many Python environments concurrently, streaming the result of each.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def executeCommand(self, request, context):
+        """execute the actual command.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def executeCommandStream(self, request, context):
+        """execute the actual command, streaming its output while it runs.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def getEnvironments(self, request, context):
+        """admin: list the deployed blueprints and the state of their environment.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
 
 
 def add_CommandExecutorServiceServicer_to_server(servicer, server):
-  rpc_method_handlers = {
-      'uploadBlueprint': grpc.unary_unary_rpc_method_handler(
-          servicer.uploadBlueprint,
-          request_deserializer=CommandExecutor__pb2.UploadBlueprintInput.FromString,
-          response_serializer=CommandExecutor__pb2.UploadBlueprintOutput.SerializeToString,
-      ),
-      'prepareEnv': grpc.unary_unary_rpc_method_handler(
-          servicer.prepareEnv,
-          request_deserializer=CommandExecutor__pb2.PrepareEnvInput.FromString,
-          response_serializer=CommandExecutor__pb2.ExecutionOutput.SerializeToString,
-      ),
-      'executeCommand': grpc.unary_unary_rpc_method_handler(
-          servicer.executeCommand,
-          request_deserializer=CommandExecutor__pb2.ExecutionInput.FromString,
-          response_serializer=CommandExecutor__pb2.ExecutionOutput.SerializeToString,
-      ),
-  }
-  generic_handler = grpc.method_handlers_generic_handler(
-      'org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService', rpc_method_handlers)
-  server.add_generic_rpc_handlers((generic_handler,))
+    rpc_method_handlers = {
+            'uploadBlueprint': grpc.unary_unary_rpc_method_handler(
+                    servicer.uploadBlueprint,
+                    request_deserializer=CommandExecutor__pb2.UploadBlueprintInput.FromString,
+                    response_serializer=CommandExecutor__pb2.UploadBlueprintOutput.SerializeToString,
+            ),
+            'prepareEnv': grpc.unary_unary_rpc_method_handler(
+                    servicer.prepareEnv,
+                    request_deserializer=CommandExecutor__pb2.PrepareEnvInput.FromString,
+                    response_serializer=CommandExecutor__pb2.ExecutionOutput.SerializeToString,
+            ),
+            'prepareEnvs': grpc.unary_stream_rpc_method_handler(
+                    servicer.prepareEnvs,
+                    request_deserializer=CommandExecutor__pb2.PrepareEnvsInput.FromString,
+                    response_serializer=CommandExecutor__pb2.PrepareEnvsProgress.SerializeToString,
+            ),
+            'executeCommand': grpc.unary_unary_rpc_method_handler(
+                    servicer.executeCommand,
+                    request_deserializer=CommandExecutor__pb2.ExecutionInput.FromString,
+                    response_serializer=CommandExecutor__pb2.ExecutionOutput.SerializeToString,
+            ),
+            'executeCommandStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.executeCommandStream,
+                    request_deserializer=CommandExecutor__pb2.ExecutionInput.FromString,
+                    response_serializer=CommandExecutor__pb2.ExecutionStreamOutput.SerializeToString,
+            ),
+            'getEnvironments': grpc.unary_unary_rpc_method_handler(
+                    servicer.getEnvironments,
+                    request_deserializer=CommandExecutor__pb2.EnvironmentsInput.FromString,
+                    response_serializer=CommandExecutor__pb2.EnvironmentsOutput.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+ # This class is part of an EXPERIMENTAL API.
+class CommandExecutorService(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def uploadBlueprint(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/uploadBlueprint',
+            CommandExecutor__pb2.UploadBlueprintInput.SerializeToString,
+            CommandExecutor__pb2.UploadBlueprintOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def prepareEnv(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/prepareEnv',
+            CommandExecutor__pb2.PrepareEnvInput.SerializeToString,
+            CommandExecutor__pb2.ExecutionOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def prepareEnvs(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/prepareEnvs',
+            CommandExecutor__pb2.PrepareEnvsInput.SerializeToString,
+            CommandExecutor__pb2.PrepareEnvsProgress.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def executeCommand(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/executeCommand',
+            CommandExecutor__pb2.ExecutionInput.SerializeToString,
+            CommandExecutor__pb2.ExecutionOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def executeCommandStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/executeCommandStream',
+            CommandExecutor__pb2.ExecutionInput.SerializeToString,
+            CommandExecutor__pb2.ExecutionStreamOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def getEnvironments(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/org.onap.ccsdk.cds.controllerblueprints.command.api.CommandExecutorService/getEnvironments',
+            CommandExecutor__pb2.EnvironmentsInput.SerializeToString,
+            CommandExecutor__pb2.EnvironmentsOutput.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -36,3 +36,24 @@ class RequestHeaderValidatorInterceptor(grpc.ServerInterceptor):
             return continuation(handler_call_details)
         else:
             return self._terminator
+
+
+def _async_unary_unary_rpc_terminator(code, details):
+    async def terminate(ignored_request, context):
+        await context.abort(code, details)
+
+    return grpc.unary_unary_rpc_method_handler(terminate)
+
+
+class AsyncRequestHeaderValidatorInterceptor(grpc.aio.ServerInterceptor):
+
+    def __init__(self, header, value, code, details):
+        self._header = header
+        self._value = value
+        self._terminator = _async_unary_unary_rpc_terminator(code, details)
+
+    async def intercept_service(self, continuation, handler_call_details):
+        if (self._header, self._value) in handler_call_details.invocation_metadata:
+            return await continuation(handler_call_details)
+        else:
+            return self._terminator
@@ -0,0 +1,115 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from collections import OrderedDict
+from google.protobuf.json_format import MessageToDict
+import hashlib
+import json
+import shlex
+import threading
+import time
+import proto.CommandExecutor_pb2 as CommandExecutor_pb2
+
+# executeCommand properties asking for the result to be cached, not part of the cache key
+CACHE_RESULT_KEY = "cds_cache_result"
+CACHE_TTL_KEY = "cds_cache_ttl"
+
+
+class _Entry():
+
+    def __init__(self, output, expires, size):
+        self.output = output
+        self.expires = expires
+        self.size = size
+
+
+# Successful executeCommand outputs of the requests opting in with the cds_cache_result property, returned to the
+# identical requests (same blueprint, command and properties) following within the TTL without running the script.
+# The TTL is cds_cache_ttl seconds when set in the properties, never more than max_ttl.
+# Least recently used outputs are evicted beyond max_entries / max_size bytes.
+class ExecutionResultCache():
+
+    def __init__(self, max_entries, max_size, max_ttl):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self.lock = threading.Lock()
+        # key -> _Entry, least recently used first
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def enabled(self):
+        return self.max_entries > 0 and self.max_size > 0 and self.max_ttl > 0
+
+    # Returns (cache key, TTL) for an executeCommand request, (None, None) when its result must not be cached.
+    def request_key(self, request, blueprint_id):
+        if not self.enabled() or not request.HasField('properties'):
+            return None, None
+        properties = MessageToDict(request.properties)
+        if properties.pop(CACHE_RESULT_KEY, False) is not True:
+            return None, None
+        try:
+            ttl = min(float(properties.pop(CACHE_TTL_KEY, self.max_ttl)), self.max_ttl)
+        except (TypeError, ValueError):
+            ttl = self.max_ttl
+        if ttl <= 0:
+            return None, None
+        try:
+            command = ' '.join(shlex.quote(arg) for arg in shlex.split(request.command))
+        except ValueError:
+            command = ' '.join(request.command.split())
+        properties_hash = hashlib.sha256(json.dumps(properties, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+        return (blueprint_id, command, properties_hash), ttl
+
+    # Returns a copy of the cached output answering request_id, None if there is none.
+    def get(self, key, request_id):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.time():
+                self.remove(key)
+                return None
+            self.entries.move_to_end(key)
+        output = CommandExecutor_pb2.ExecutionOutput()
+        output.CopyFrom(entry.output)
+        output.requestId = request_id
+        return output
+
+    def put(self, key, output, ttl):
+        if output.status != CommandExecutor_pb2.SUCCESS:
+            return
+        entry = _Entry(CommandExecutor_pb2.ExecutionOutput(), time.time() + ttl, 0)
+        entry.output.CopyFrom(output)
+        entry.size = entry.output.ByteSize()
+        if entry.size > self.max_size:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.remove(key)
+            self.entries[key] = entry
+            self.size += entry.size
+            while len(self.entries) > self.max_entries or self.size > self.max_size:
+                self.remove(next(iter(self.entries)))
+
+    # Drops the outputs of a blueprint, whose content or environment changed.
+    def invalidate(self, blueprint_id):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == blueprint_id]:
+                self.remove(key)
+
+    # lock held
+    def remove(self, key):
+        self.size -= self.entries.pop(key).size
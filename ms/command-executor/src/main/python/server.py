@@ -17,8 +17,9 @@
 # limitations under the License.
 #
 from builtins import KeyboardInterrupt
-from concurrent import futures
+import asyncio
 import logging
+import os
 import time
 import sys
 import utils
@@ -27,8 +28,10 @@ import grpc
 
 import proto.CommandExecutor_pb2_grpc as CommandExecutor_pb2_grpc
 
-from request_header_validator_interceptor import RequestHeaderValidatorInterceptor
+from request_header_validator_interceptor import RequestHeaderValidatorInterceptor, AsyncRequestHeaderValidatorInterceptor
+from server_metrics import MeteredThreadPoolExecutor, RpcMetricsInterceptor, AsyncRpcMetricsInterceptor
 from command_executor_server import CommandExecutorServer
+from async_command_executor_server import AsyncCommandExecutorServer
 
 logger = logging.getLogger("Server")
 
@@ -39,13 +42,19 @@ def serve():
     port = sys.argv[1]
     basic_auth = sys.argv[2] + ' ' + sys.argv[3]
 
+    if os.environ.get('ASYNC_SERVER_ENABLED', 'false') == 'true':
+        asyncio.get_event_loop().run_until_complete(serve_async(port, basic_auth))
+        return
+
     header_validator = RequestHeaderValidatorInterceptor(
         'authorization', basic_auth, grpc.StatusCode.UNAUTHENTICATED,
         'Access denied!')
 
+    # every call holds one of the SERVER_MAX_WORKERS threads until it completes,
+    # cds_ce_workers_busy and cds_ce_queue_wait_seconds{queue="grpc_server"} tell when it is too small
     server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=15),
-        interceptors=(header_validator,))
+        MeteredThreadPoolExecutor(int(os.environ.get('SERVER_MAX_WORKERS', '15')), 'grpc_server'),
+        interceptors=(RpcMetricsInterceptor(), header_validator))
 
     CommandExecutor_pb2_grpc.add_CommandExecutorServiceServicer_to_server(
         CommandExecutorServer(), server)
@@ -62,6 +71,32 @@ def serve():
         server.stop(0)
 
 
+# grpc.aio server: executions are multiplexed on the event loop instead of holding a thread each,
+# the blocking work (uploadBlueprint, prepareEnv) runs in a pool of SERVER_MAX_WORKERS threads.
+async def serve_async(port, basic_auth):
+    header_validator = AsyncRequestHeaderValidatorInterceptor(
+        'authorization', basic_auth, grpc.StatusCode.UNAUTHENTICATED,
+        'Access denied!')
+
+    asyncio.get_event_loop().set_default_executor(
+        MeteredThreadPoolExecutor(int(os.environ.get('SERVER_MAX_WORKERS', '15')), 'default_executor'))
+
+    server = grpc.aio.server(interceptors=(AsyncRpcMetricsInterceptor(), header_validator))
+
+    CommandExecutor_pb2_grpc.add_CommandExecutorServiceServicer_to_server(
+        AsyncCommandExecutorServer(), server)
+
+    server.add_insecure_port('[::]:' + port)
+    await server.start()
+
+    logger.info("Command Executor Server (asyncio) started on %s" % port, extra=utils.getExtraLogData())
+
+    try:
+        await server.wait_for_termination()
+    except KeyboardInterrupt:
+        await server.stop(0)
+
+
 if __name__ == '__main__':
     logging_formater = '%(asctime)s|%(request_id)s|%(subrequest_id)s|%(originator_id)s|%(threadName)s|%(name)s|%(levelname)s|%(message)s'
     logging.basicConfig(level=logging.INFO, format=logging_formater)
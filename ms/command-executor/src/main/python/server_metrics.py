@@ -0,0 +1,213 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import asyncio
+import contextlib
+import time
+from concurrent import futures
+
+import grpc
+import prometheus_client as prometheus
+
+
+def get_prometheus_metrics():
+    metrics = getattr(prometheus.REGISTRY, '_command_executor_server_metrics', None)
+    if not metrics:
+        metrics = {
+            'rpc_duration': prometheus.Histogram('cds_ce_rpc_duration_seconds', 'Latency of the gRPC calls, by method and status code',
+                                                 ['method', 'code']),
+            'queue_wait': prometheus.Histogram('cds_ce_queue_wait_seconds', 'Time spent waiting for a worker thread / a call slot, by queue',
+                                               ['queue']),
+            'workers': prometheus.Gauge('cds_ce_workers', 'Number of worker threads / call slots, by queue', ['queue']),
+            'workers_busy': prometheus.Gauge('cds_ce_workers_busy', 'Number of busy worker threads / call slots, by queue', ['queue']),
+            'in_flight': prometheus.Gauge('cds_ce_executions_in_flight', 'Commands being executed, by blueprint',
+                                          ['blueprint_name', 'blueprint_version']),
+        }
+        prometheus.REGISTRY._command_executor_server_metrics = metrics
+    return metrics
+
+
+# ThreadPoolExecutor reporting its occupancy and how long the submitted calls waited for a thread,
+# gRPC runs every call of the (sync) server in the pool it is given.
+class MeteredThreadPoolExecutor(futures.ThreadPoolExecutor):
+
+    def __init__(self, max_workers, queue, **kwargs):
+        super().__init__(max_workers=max_workers, **kwargs)
+        metrics = get_prometheus_metrics()
+        self.queue_wait = metrics['queue_wait'].labels(queue)
+        self.busy = metrics['workers_busy'].labels(queue)
+        metrics['workers'].labels(queue).set(max_workers)
+
+    def submit(self, fn, *args, **kwargs):
+        queued = time.time()
+
+        def run():
+            self.queue_wait.observe(time.time() - queued)
+            self.busy.inc()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.busy.dec()
+
+        return super().submit(run)
+
+
+# asyncio.Semaphore counterpart of MeteredThreadPoolExecutor, for the call slots of the grpc.aio server
+class MeteredSemaphore():
+
+    def __init__(self, value, queue):
+        self.semaphore = asyncio.Semaphore(value)
+        metrics = get_prometheus_metrics()
+        self.queue_wait = metrics['queue_wait'].labels(queue)
+        self.busy = metrics['workers_busy'].labels(queue)
+        metrics['workers'].labels(queue).set(value)
+
+    async def __aenter__(self):
+        queued = time.time()
+        await self.semaphore.acquire()
+        self.queue_wait.observe(time.time() - queued)
+        self.busy.inc()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.busy.dec()
+        self.semaphore.release()
+
+
+@contextlib.contextmanager
+def in_flight(blueprint_name, blueprint_version):
+    gauge = get_prometheus_metrics()['in_flight'].labels(blueprint_name, blueprint_version)
+    gauge.inc()
+    try:
+        yield
+    finally:
+        gauge.dec()
+
+
+def _method_name(handler_call_details):
+    return handler_call_details.method.rsplit('/', 1)[-1]
+
+
+# status code set by the servicer (context.abort / set_code), default when it did not set any
+def _status_code(context, default):
+    code = context.code() if hasattr(context, 'code') else None
+    if code is None:
+        return default
+    return code.name if isinstance(code, grpc.StatusCode) else str(code)
+
+
+class RpcMetricsInterceptor(grpc.ServerInterceptor):
+
+    def __init__(self):
+        self._rpc_duration = get_prometheus_metrics()['rpc_duration']
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = _method_name(handler_call_details)
+        if handler.unary_unary is not None:
+            return handler._replace(unary_unary=self._timed_unary(method, handler.unary_unary))
+        if handler.unary_stream is not None:
+            return handler._replace(unary_stream=self._timed_stream(method, handler.unary_stream))
+        return handler
+
+    def _timed_unary(self, method, behavior):
+        def timed(request, context):
+            start = time.time()
+            code = 'UNKNOWN'
+            try:
+                response = behavior(request, context)
+                code = _status_code(context, 'OK')
+                return response
+            except Exception:
+                code = _status_code(context, 'UNKNOWN')
+                raise
+            finally:
+                self._rpc_duration.labels(method, code).observe(time.time() - start)
+
+        return timed
+
+    def _timed_stream(self, method, behavior):
+        def timed(request, context):
+            start = time.time()
+            code = 'UNKNOWN'
+            try:
+                yield from behavior(request, context)
+                code = _status_code(context, 'OK')
+            except GeneratorExit:
+                code = 'CANCELLED'
+                raise
+            except Exception:
+                code = _status_code(context, 'UNKNOWN')
+                raise
+            finally:
+                self._rpc_duration.labels(method, code).observe(time.time() - start)
+
+        return timed
+
+
+class AsyncRpcMetricsInterceptor(grpc.aio.ServerInterceptor):
+
+    def __init__(self):
+        self._rpc_duration = get_prometheus_metrics()['rpc_duration']
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = _method_name(handler_call_details)
+        if handler.unary_unary is not None:
+            return handler._replace(unary_unary=self._timed_unary(method, handler.unary_unary))
+        if handler.unary_stream is not None:
+            return handler._replace(unary_stream=self._timed_stream(method, handler.unary_stream))
+        return handler
+
+    def _timed_unary(self, method, behavior):
+        async def timed(request, context):
+            start = time.time()
+            code = 'UNKNOWN'
+            try:
+                response = await behavior(request, context)
+                code = _status_code(context, 'OK')
+                return response
+            except asyncio.CancelledError:
+                code = 'CANCELLED'
+                raise
+            except Exception:
+                code = _status_code(context, 'UNKNOWN')
+                raise
+            finally:
+                self._rpc_duration.labels(method, code).observe(time.time() - start)
+
+        return timed
+
+    def _timed_stream(self, method, behavior):
+        async def timed(request, context):
+            start = time.time()
+            code = 'UNKNOWN'
+            try:
+                async for response in behavior(request, context):
+                    yield response
+                code = _status_code(context, 'OK')
+            except (GeneratorExit, asyncio.CancelledError):
+                code = 'CANCELLED'
+                raise
+            except Exception:
+                code = _status_code(context, 'UNKNOWN')
+                raise
+            finally:
+                self._rpc_duration.labels(method, code).observe(time.time() - start)
+
+        return timed
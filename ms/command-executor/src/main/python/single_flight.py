@@ -0,0 +1,63 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import copy
+import threading
+
+
+class _Call():
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Runs at most one call per key at a time.
+# Callers arriving while a call of the same kind is in flight for their key wait for it and get (a copy of) its result
+# instead of running their own; callers of another kind wait for it to finish and then run theirs.
+class SingleFlight():
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, fn, kind=None):
+        while True:
+            with self.lock:
+                call = self.calls.get(key)
+                if call is None:
+                    call = _Call(kind)
+                    self.calls[key] = call
+                    break
+            call.done.wait()
+            if call.kind == kind:
+                if call.error is not None:
+                    raise call.error
+                return copy.deepcopy(call.result)
+
+        try:
+            result = fn()
+            # keep a private copy: the caller is free to modify the returned value while waiters copy it
+            call.result = copy.deepcopy(result)
+            return result
+        except Exception as err:
+            call.error = err
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
@@ -16,15 +16,40 @@
 from google.protobuf.timestamp_pb2 import Timestamp
 
 import proto.CommandExecutor_pb2 as CommandExecutor_pb2
+import collections
 import json
 import email.parser
+import os
+import struct
+import tempfile
 
 CDS_IS_SUCCESSFUL_KEY = "cds_is_successful"
 ERR_MSG_KEY = "err_msg"
 RESULTS_KEY = "results"
 RESULTS_LOG_KEY = "results_log"
 REUPLOAD_CBA_KEY = "reupload_cba"
+# resource usage of the execution, in the payload with EXECUTION_USAGE_IN_PAYLOAD
+EXECUTION_USAGE_KEY = "cds_execution_usage"
 RESPONSE_MAX_SIZE = 4 * 1024 * 1024  # 4Mb
+# end of the execution logs kept when they have to be truncated, see truncate_execution_output
+RESPONSE_TAIL_SIZE = int(os.environ.get('RESPONSE_TAIL_KB', '0')) * 1024
+RESPONSE_FIELD_NUMBER = CommandExecutor_pb2.ExecutionOutput.DESCRIPTOR.fields_by_name['response'].number
+# room left for the "[...] TRUNCATED CHARS : <count>" line
+TRUNCATION_MARKER_RESERVE = 64
+# result side channel, see ResultChannel (keep in sync with cds_utils/payload_coder.py)
+RESULT_FILE_ENV = "CDS_RESULT_FILE"
+RESULT_FRAME_HEADER = struct.Struct('>cI')
+RESULT_FRAME_PAYLOAD = b'P'
+RESULT_FRAME_ERR_MSG = b'E'
+# command output kept per execution (half from the start, half from the end), see OutputCapture
+OUTPUT_CAPTURE_MAX_SIZE = int(os.environ.get('EXEC_OUTPUT_CAPTURE_KB', '8192')) * 1024
+# longer output lines are cut, except within the BEGIN_EXTRA_PAYLOAD / BEGIN_EXTRA_RET_ERR_MSG sections
+OUTPUT_MAX_LINE_SIZE = int(os.environ.get('EXEC_OUTPUT_MAX_LINE_KB', '64')) * 1024
+OUTPUT_CHUNK_SIZE = 65536
+# kinds of the events produced by CommandExecutorHandler.execute_command_stream
+STREAM_LOGS = "logs"
+STREAM_PAYLOAD = "payload"
+STREAM_RESULT = "result"
 
 # part of cba_name/version/uuid path
 def blueprint_name_version_uuid(request):
@@ -82,6 +107,19 @@ def build_grpc_response(request_id, response):
   return truncate_execution_output(execution_output)
 
 
+# Create a message of the executeCommandStream output: either log lines, the payload or the final response
+def build_grpc_stream_response(request_id, logs=None, payload=None, response=None):
+  timestamp = Timestamp()
+  timestamp.GetCurrentTime()
+  if logs is not None:
+    return CommandExecutor_pb2.ExecutionStreamOutput(requestId=request_id, timestamp=timestamp,
+                                                     logs=CommandExecutor_pb2.ExecutionLogs(response=logs))
+  if payload is not None:
+    return CommandExecutor_pb2.ExecutionStreamOutput(requestId=request_id, timestamp=timestamp, payload=json.dumps(payload))
+  return CommandExecutor_pb2.ExecutionStreamOutput(requestId=request_id, timestamp=timestamp,
+                                                   result=build_grpc_response(request_id, response))
+
+
 # return the status of validate blueprint UUID call rpc
 def build_grpc_blueprint_validation_response(request_id, subrequest_id,
     cba_uuid, success=True):
@@ -102,6 +140,35 @@ def build_grpc_blueprint_upload_response(request_id, subrequest_id, success=True
     timestamp=timestamp,
     payload=json.dumps(payload))
 
+# Create a prepareEnvs stream message for a prepared environment
+def build_grpc_prepare_envs_progress(request_id, identifiers, result, completed, total):
+  timestamp = Timestamp()
+  timestamp.GetCurrentTime()
+  return CommandExecutor_pb2.PrepareEnvsProgress(requestId=request_id, timestamp=timestamp, identifiers=identifiers, result=result,
+                                                 completed=completed, total=total)
+
+ENVIRONMENT_STATES = {
+  'uploaded': CommandExecutor_pb2.UPLOADED,
+  'installed': CommandExecutor_pb2.INSTALLED,
+  'incomplete': CommandExecutor_pb2.INCOMPLETE,
+}
+
+# Create the getEnvironments response from EnvironmentRegistry.dump() dicts
+def build_grpc_environments_response(request_id, environments):
+  timestamp = Timestamp()
+  timestamp.GetCurrentTime()
+  response = CommandExecutor_pb2.EnvironmentsOutput(requestId=request_id, timestamp=timestamp)
+  for environment in environments:
+    name, version, uuid = environment['blueprint_id'].split('/')
+    last_used = Timestamp()
+    last_used.FromNanoseconds(int(environment['last_used'] * 1e9))
+    response.environments.add(identifiers=CommandExecutor_pb2.Identifiers(blueprintName=name, blueprintVersion=version, blueprintUUID=uuid),
+                              state=ENVIRONMENT_STATES[environment['state']],
+                              lastUsed=last_used,
+                              size=environment['size'] if environment['size'] is not None else -1,
+                              installLog=environment.get('install_log') or '')
+  return response
+
 # build a ret data structure used to populate the ExecutionOutput
 def build_ret_data(cds_is_successful, results_log=[], error=None, reupload_cba = False):
   ret_data = {
@@ -116,57 +183,319 @@ def build_ret_data(cds_is_successful, results_log=[], error=None, reupload_cba =
   return ret_data
 
 
-# Truncate execution logs to make sure gRPC response doesn't exceed the gRPC buffer capacity
-def truncate_execution_output(execution_output):
-  sum_truncated_chars = 0
-  if execution_output.ByteSize() > RESPONSE_MAX_SIZE:
-    while execution_output.ByteSize() > RESPONSE_MAX_SIZE:
-      removed_item = execution_output.response.pop()
-      sum_truncated_chars += len(removed_item)
-    execution_output.response.append(
-        "[...] TRUNCATED CHARS : {}".format(sum_truncated_chars))
+# Truncate execution logs to make sure gRPC response doesn't exceed the gRPC buffer capacity.
+# The first log lines are kept, as well as the last RESPONSE_TAIL_SIZE bytes of them (where the failure
+# reason usually is), the lines dropped in between are replaced by a "[...] TRUNCATED CHARS" line.
+def truncate_execution_output(execution_output, tail_size=None):
+  if tail_size is None:
+    tail_size = RESPONSE_TAIL_SIZE
+  total_size = execution_output.ByteSize()
+  if total_size <= RESPONSE_MAX_SIZE:
+    return execution_output
+
+  logs = list(execution_output.response)
+  # encoded size of each log line: computed once instead of re-serializing the message for every dropped line
+  sizes = [repeated_string_entry_size(RESPONSE_FIELD_NUMBER, line) for line in logs]
+  budget = RESPONSE_MAX_SIZE - (total_size - sum(sizes)) - TRUNCATION_MARKER_RESERVE
+
+  tail_start = len(logs)
+  tail_used = 0
+  tail_budget = min(tail_size, budget)
+  while tail_start > 0 and tail_used + sizes[tail_start - 1] <= tail_budget:
+    tail_start -= 1
+    tail_used += sizes[tail_start]
+
+  head_end = 0
+  head_used = 0
+  head_budget = budget - tail_used
+  while head_end < tail_start and head_used + sizes[head_end] <= head_budget:
+    head_used += sizes[head_end]
+    head_end += 1
+
+  sum_truncated_chars = sum(len(line) for line in logs[head_end:tail_start])
+  del execution_output.response[:]
+  execution_output.response.extend(logs[:head_end])
+  execution_output.response.append("[...] TRUNCATED CHARS : {}".format(sum_truncated_chars))
+  execution_output.response.extend(logs[tail_start:])
   return execution_output
 
 
+# Size of one element of a 'repeated string' field once encoded: tag, length and UTF-8 bytes
+def repeated_string_entry_size(field_number, value):
+  length = len(value.encode('utf-8', errors='surrogatepass'))
+  return varint_size(field_number << 3) + varint_size(length) + length
+
+
+def varint_size(value):
+  size = 1
+  while value > 0x7f:
+    value >>= 7
+    size += 1
+  return size
+
+
 # Read temp file 'outputfile' into results_log and split out the returned payload into payload_result
 def parse_cmd_exec_output(outputfile, logger, payload_result, err_msg_result, results_log,
-    extra):
-  payload_section = []
-  ret_err_msg_section = []
-  is_payload_section = False
-  is_user_script_err_msg = False
+    extra, result_channel=None):
+  capture = OutputCapture(CmdExecOutputParser(payload_result, err_msg_result, result_channel))
   outputfile.seek(0)
   while True:
-    line = outputfile.readline()
-    if line == '':
+    chunk = outputfile.read(OUTPUT_CHUNK_SIZE)
+    if not chunk:
       break
+    capture.feed(chunk)
+  capture.close()
+  for log_line in capture.log_lines():
+    logger.info(log_line, extra=extra)
+    results_log.append(log_line)
+  if capture.dropped_lines or capture.dropped_bytes:
+    logger.info("Output of {} lines ({} bytes), {} lines and {} bytes of it dropped".format(
+      capture.lines, capture.bytes, capture.dropped_lines, capture.dropped_bytes), extra=extra)
+  if result_channel is not None:
+    result_channel.read(payload_result, err_msg_result)
+
+
+# Incremental parser of a command output: splits out the user-supplied (script) return payload into payload_result
+# and error message into err_msg_result, returns the other lines as log lines.
+# With a result_channel, the payloads / error messages sent through it are collected as well.
+class CmdExecOutputParser():
+
+  def __init__(self, payload_result, err_msg_result, result_channel=None):
+    self.payload_result = payload_result
+    self.err_msg_result = err_msg_result
+    self.result_channel = result_channel
+    self.payload_section = []
+    self.ret_err_msg_section = []
+    self.is_payload_section = False
+    self.is_user_script_err_msg = False
+    # number of payload sections parsed so far, and when feed_lines last reported it
+    self.payloads_count = 0
+    self.reported_payloads_count = 0
+
+  # True within a payload / error message section
+  def in_section(self):
+    return self.is_payload_section or self.is_user_script_err_msg
+
+  # Returns the log line to keep for 'line', or None if it belongs to the payload / error message.
+  def feed(self, line):
     # Read the user-supplied (script) return payload.
     if line.startswith('BEGIN_EXTRA_PAYLOAD'):
-      is_payload_section = True
-      line = outputfile.readline()
+      self.is_payload_section = True
+      return None
     if line.startswith('END_EXTRA_PAYLOAD'):
-      is_payload_section = False
-      line = ''
-      payload = '\n'.join(payload_section)
+      self.is_payload_section = False
+      payload = '\n'.join(self.payload_section)
+      self.payload_section = []
       msg = email.parser.Parser().parsestr(payload)
       for part in msg.get_payload():
-        payload_result.update(json.loads(part.get_payload()))
+        self.payload_result.update(json.loads(part.get_payload()))
+      self.payloads_count += 1
+      return None
 
     # Read the user-supplied (script) error message string
     if line.startswith('BEGIN_EXTRA_RET_ERR_MSG'):
-      is_user_script_err_msg = True
-      line = outputfile.readline()
+      self.is_user_script_err_msg = True
+      return None
     if line.startswith('END_EXTRA_RET_ERR_MSG'):
-      is_user_script_err_msg = False
-      line = ''
-      err_msg_result.append('\n'.join(ret_err_msg_section))
-    if is_payload_section:
-      payload_section.append(line.strip())
-    elif is_user_script_err_msg:
-      ret_err_msg_section.append(line.strip())
-    elif line:
-      logger.info(line.strip(), extra=extra)
-      results_log.append(line.strip())
+      self.is_user_script_err_msg = False
+      self.err_msg_result.append('\n'.join(self.ret_err_msg_section))
+      self.ret_err_msg_section = []
+      return None
+    if self.is_payload_section:
+      self.payload_section.append(line.strip())
+    elif self.is_user_script_err_msg:
+      self.ret_err_msg_section.append(line.strip())
+    else:
+      return line.strip()
+    return None
+
+  # Returns the log lines kept out of 'lines' and whether the payload was updated since the previous call.
+  def feed_lines(self, lines):
+    logs = []
+    for line in lines:
+      log_line = self.feed(line)
+      if log_line is not None:
+        logs.append(log_line)
+    if self.result_channel is not None:
+      self.payloads_count += self.result_channel.read(self.payload_result, self.err_msg_result)
+    payload_updated = self.payloads_count != self.reported_payloads_count
+    self.reported_payloads_count = self.payloads_count
+    return logs, payload_updated
+
+
+# Yields the chunks read from the file descriptor 'fd' as they come, until EOF.
+def read_chunks(fd, chunk_size=OUTPUT_CHUNK_SIZE):
+  while True:
+    chunk = os.read(fd, chunk_size)
+    if not chunk:
+      break
+    yield chunk
+
+
+# Bounded capture of a command output, fed with raw bytes as they are read.
+# Lines are split out of the bytes and the payload / error message sections handed to the parser; the log lines
+# are kept undecoded, the first ones up to max_size / 2 bytes and the last ones in a ring of max_size / 2 bytes,
+# and decoded (invalid UTF-8 replaced) only when asked for. Lines longer than max_line_size are cut.
+# Whatever the command prints, the memory used stays within max_size + max_line_size (plus the payload sections).
+class OutputCapture():
+
+  def __init__(self, parser, max_size=None, max_line_size=None):
+    self.parser = parser
+    self.max_size = max_size if max_size is not None else OUTPUT_CAPTURE_MAX_SIZE
+    self.max_line_size = max_line_size if max_line_size is not None else OUTPUT_MAX_LINE_SIZE
+    self.head = []
+    self.head_size = 0
+    self.tail = collections.deque()
+    self.tail_size = 0
+    # incomplete last line
+    self.pending = bytearray()
+    # dropping the end of a line which was too long
+    self.skipping = False
+    # lines / bytes printed, and dropped to stay within the limits
+    self.lines = 0
+    self.bytes = 0
+    self.dropped_lines = 0
+    self.dropped_bytes = 0
+    # dropped_lines when the lines were last taken by poll()
+    self.polled_dropped_lines = 0
+
+  def feed(self, chunk):
+    self.bytes += len(chunk)
+    if self.skipping:
+      end = chunk.find(b'\n')
+      if end < 0:
+        self.dropped_bytes += len(chunk)
+        return
+      self.dropped_bytes += end
+      chunk = chunk[end + 1:]
+      self.skipping = False
+    if b'\n' in chunk:
+      lines = chunk.split(b'\n')
+      if self.pending:
+        self.pending += lines[0]
+        lines[0] = bytes(self.pending)
+      self.pending = bytearray(lines.pop())
+      for line in lines:
+        self.add_line(line)
+    else:
+      self.pending += chunk
+    if len(self.pending) > self.max_line_size and not self.parser.in_section():
+      self.dropped_bytes += len(self.pending) - self.max_line_size
+      self.add_line(bytes(self.pending[:self.max_line_size]))
+      self.pending = bytearray()
+      self.skipping = True
+
+  # end of the output
+  def close(self):
+    if self.pending:
+      self.add_line(bytes(self.pending))
+      self.pending = bytearray()
+    self.skipping = False
+
+  def add_line(self, line):
+    self.lines += 1
+    if self.parser.in_section() or line.startswith((b'BEGIN_EXTRA_', b'END_EXTRA_')):
+      self.parser.feed(line.decode(errors='replace'))
+      return
+    if len(line) > self.max_line_size:
+      self.dropped_bytes += len(line) - self.max_line_size
+      line = line[:self.max_line_size]
+    if not self.tail and self.head_size + len(line) <= self.max_size // 2:
+      self.head.append(line)
+      self.head_size += len(line)
+      return
+    self.tail.append(line)
+    self.tail_size += len(line)
+    while self.tail_size > self.max_size - self.max_size // 2 and self.tail:
+      dropped = self.tail.popleft()
+      self.tail_size -= len(dropped)
+      self.dropped_lines += 1
+      self.dropped_bytes += len(dropped)
+
+  # The log lines kept, with a line telling how many were dropped in between.
+  def log_lines(self):
+    log_lines = [line.decode(errors='replace').strip() for line in self.head]
+    if self.dropped_lines:
+      log_lines.append("[...] {} lines of output dropped".format(self.dropped_lines))
+    log_lines.extend(line.decode(errors='replace').strip() for line in self.tail)
+    return log_lines
+
+  # Returns the log lines kept since the previous call and whether the payload was updated meanwhile.
+  def poll(self):
+    log_lines = [line.decode(errors='replace').strip() for line in self.head]
+    if self.dropped_lines != self.polled_dropped_lines:
+      log_lines.append("[...] {} lines of output dropped".format(self.dropped_lines - self.polled_dropped_lines))
+      self.polled_dropped_lines = self.dropped_lines
+    log_lines.extend(line.decode(errors='replace').strip() for line in self.tail)
+    self.head = []
+    self.head_size = 0
+    self.tail.clear()
+    self.tail_size = 0
+    return log_lines, self.parser.feed_lines([])[1]
+
+
+# Side channel for the script results: a file named by the CDS_RESULT_FILE env variable, to which
+# cds_utils.payload_coder appends frames instead of printing the BEGIN_EXTRA_PAYLOAD/BEGIN_EXTRA_RET_ERR_MSG sections.
+# A frame is a type byte (RESULT_FRAME_PAYLOAD or RESULT_FRAME_ERR_MSG), the data length (4 bytes, big endian)
+# and the data, UTF-8 JSON. Nothing is scanned nor re-encoded, whitespaces in the payload are kept.
+class ResultChannel():
+
+  def __init__(self):
+    fd, self.path = tempfile.mkstemp(prefix='cds-result-')
+    self.file = os.fdopen(fd, 'rb')
+    self.pending = b''
+
+  def env(self):
+    return {RESULT_FILE_ENV: self.path}
+
+  # Adds the frames written since the previous call to payload_result / err_msg_result,
+  # returns the number of payload frames read.
+  def read(self, payload_result, err_msg_result):
+    self.pending += self.file.read()
+    payloads_count = 0
+    offset = 0
+    while len(self.pending) - offset >= RESULT_FRAME_HEADER.size:
+      frame_type, length = RESULT_FRAME_HEADER.unpack_from(self.pending, offset)
+      end = offset + RESULT_FRAME_HEADER.size + length
+      if len(self.pending) < end:
+        break
+      data = json.loads(self.pending[offset + RESULT_FRAME_HEADER.size:end].decode())
+      if frame_type == RESULT_FRAME_PAYLOAD:
+        payload_result.update(data)
+        payloads_count += 1
+      elif frame_type == RESULT_FRAME_ERR_MSG:
+        err_msg_result.append(data if isinstance(data, str) else str(data))
+      offset = end
+    self.pending = self.pending[offset:]
+    return payloads_count
+
+  def close(self):
+    self.file.close()
+    try:
+      os.remove(self.path)
+    except FileNotFoundError:
+      pass
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+
+# Copy of 'message' without the given (large) fields, e.g. to log it
+def message_without_fields(message, excluded_fields):
+  copy = type(message)()
+  for field, value in message.ListFields():
+    if field.name in excluded_fields:
+      continue
+    if field.label == field.LABEL_REPEATED:
+      getattr(copy, field.name).extend(value)
+    elif field.message_type is not None:
+      getattr(copy, field.name).CopyFrom(value)
+    else:
+      setattr(copy, field.name, value)
+  return copy
 
 
 def getExtraLogData(request=None):
@@ -0,0 +1,169 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from subprocess import CalledProcessError, PIPE
+import errno
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import uuid
+import venv
+import utils
+
+READY_MARKER = '.ready'
+# how long to wait before retrying after a template could not be built (e.g. no network for pip)
+BUILD_RETRY_INTERVAL = 60
+
+
+# Keeps a pool of pre-built Python virtual environments (pip already upgraded) ready in the background.
+# A blueprint venv is then obtained by moving a template into the blueprint dir and rewriting the
+# absolute template path in the scripts/config files, instead of running venv.create + pip upgrade.
+class VenvTemplatePool():
+
+    # wheelhouse: the Wheelhouse the pip upgrade goes through, if any
+    def __init__(self, pool_dir, size, system_site_packages=True, wheelhouse=None):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.pool_dir = pool_dir
+        self.size = size
+        self.system_site_packages = system_site_packages
+        self.wheelhouse = wheelhouse
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.ready = []
+        self.thread = None
+
+    def is_enabled(self):
+        return self.size > 0
+
+    def start(self):
+        if not self.is_enabled() or self.thread is not None:
+            return
+        os.makedirs(self.pool_dir, mode=0o755, exist_ok=True)
+        # adopt templates finished by a previous run, drop the half-built ones
+        for entry in os.listdir(self.pool_dir):
+            path = os.path.join(self.pool_dir, entry)
+            if os.path.exists(os.path.join(path, READY_MARKER)) and len(self.ready) < self.size:
+                self.ready.append(path)
+            else:
+                shutil.rmtree(path, ignore_errors=True)
+        self.logger.info("Starting venv template pool in {} (size: {}, adopted: {})".format(self.pool_dir, self.size, len(self.ready)),
+                         extra=utils.getExtraLogData())
+        self.thread = threading.Thread(target=self.fill, name=self.__class__.__name__, daemon=True)
+        self.thread.start()
+
+    def fill(self):
+        while True:
+            with self.lock:
+                missing = self.size - len(self.ready)
+            if missing <= 0:
+                self.wakeup.wait()
+                self.wakeup.clear()
+                continue
+            if not self.build_template():
+                self.wakeup.wait(BUILD_RETRY_INTERVAL)
+                self.wakeup.clear()
+
+    def build_template(self):
+        path = os.path.join(self.pool_dir, uuid.uuid4().hex)
+        try:
+            venv.create(path, with_pip=True, system_site_packages=self.system_site_packages)
+            # venv comes with an old pip, templates are handed out already upgraded
+            pip_args = ["pip"]
+            if self.wheelhouse is not None:
+                success, wheel_log, pip_args = self.wheelhouse.install_args(path + "/bin/pip", pip_args)
+                if not success:
+                    raise RuntimeError(wheel_log)
+            subprocess.run([path + "/bin/pip", "install", "--upgrade"] + pip_args, check=True, stdout=PIPE, stderr=PIPE)
+            open(os.path.join(path, READY_MARKER), "w").close()
+        except Exception as err:
+            details = err.stderr.decode() if isinstance(err, CalledProcessError) else err
+            self.logger.error("Failed to build venv template {}. Error: {}".format(path, details), extra=utils.getExtraLogData())
+            shutil.rmtree(path, ignore_errors=True)
+            return False
+        with self.lock:
+            self.ready.append(path)
+        self.logger.info("venv template {} is ready".format(path), extra=utils.getExtraLogData())
+        return True
+
+    # Turns target_dir into a venv using a ready template.
+    # Returns False when no template is available (or cloning failed) so the caller can fall back to venv.create.
+    def clone_into(self, target_dir, extra=None):
+        with self.lock:
+            template = self.ready.pop() if self.ready else None
+        self.wakeup.set()
+        if template is None:
+            self.logger.info("No venv template ready for {}".format(target_dir), extra=extra or utils.getExtraLogData())
+            return False
+        try:
+            entries = [entry for entry in os.listdir(template) if entry != READY_MARKER]
+            if any(os.path.lexists(os.path.join(target_dir, entry)) for entry in entries):
+                raise OSError(errno.EEXIST, "venv files already exist in {}".format(target_dir))
+            for entry in entries:
+                move_tree(os.path.join(template, entry), os.path.join(target_dir, entry))
+            rewrite_paths(target_dir, template, os.path.normpath(target_dir))
+            return True
+        except OSError as err:
+            self.logger.error("Failed to clone venv template {} into {}. Error: {}".format(template, target_dir, err),
+                              extra=extra or utils.getExtraLogData())
+            return False
+        finally:
+            shutil.rmtree(template, ignore_errors=True)
+
+
+# rename when possible (same filesystem), otherwise fall back to a hardlink copy
+def move_tree(src, dst):
+    try:
+        os.rename(src, dst)
+    except OSError as err:
+        if err.errno != errno.EXDEV:
+            raise
+        if os.path.isdir(src) and not os.path.islink(src):
+            shutil.copytree(src, dst, symlinks=True, copy_function=link_or_copy)
+        else:
+            link_or_copy(src, dst)
+
+
+def link_or_copy(src, dst):
+    if os.path.islink(src):
+        os.symlink(os.readlink(src), dst)
+        return
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+# venv scripts (shebangs, activate*) and pyvenv.cfg carry the absolute path of the venv
+def rewrite_paths(venv_dir, old_path, new_path):
+    old = os.fsencode(old_path)
+    new = os.fsencode(new_path)
+    bin_dir = os.path.join(venv_dir, "bin")
+    candidates = [os.path.join(bin_dir, entry) for entry in os.listdir(bin_dir)]
+    candidates.append(os.path.join(venv_dir, "pyvenv.cfg"))
+    for path in candidates:
+        if os.path.islink(path) or not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            content = f.read()
+        if old not in content:
+            continue
+        # write a new file rather than in place: it may be a hardlink shared with another venv
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content.replace(old, new))
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
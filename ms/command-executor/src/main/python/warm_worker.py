@@ -0,0 +1,123 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+# Warm worker, started by warm_worker_pool.py with the python interpreter of a CBA venv.
+# It imports the commonly used packages once, then for every request read from stdin
+# (one JSON object per line: cwd, argv, env, output) forks a child running the script as __main__
+# with stdout/stderr sent to the 'output' file and the 'rlimits' applied, and answers {"pid": ...}
+# then {"rc": ..., "usage": ...} (see execution_resources.usage_from_rusage) on stdout.
+import importlib
+import json
+import os
+import resource
+import runpy
+import sys
+import traceback
+
+PRELOAD_MODULES = ['cds_utils', 'cds_utils.payload_coder', 'json', 'email.mime.multipart', 'email.mime.text',
+                   'email.parser', 'subprocess', 'logging']
+
+
+def preload():
+    modules = PRELOAD_MODULES + [m for m in os.environ.get('WARM_WORKERS_PRELOAD', '').split(',') if m]
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            pass
+
+
+def run_child(request):
+    try:
+        # own session, killed as a whole on timeout
+        os.setsid()
+        for rlimit, value in request.get('rlimits', {}).items():
+            _, hard = resource.getrlimit(int(rlimit))
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            resource.setrlimit(int(rlimit), (value, value))
+        os.chdir(request['cwd'])
+        os.environ.clear()
+        os.environ.update(request['env'])
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        output = os.open(request['output'], os.O_WRONLY | os.O_APPEND)
+        os.dup2(output, 1)
+        os.dup2(output, 2)
+        script = request['argv'][1]
+        sys.argv = request['argv'][1:]
+        sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+        runpy.run_path(script, run_name='__main__')
+        code = 0
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    finally:
+        os._exit(code)
+
+
+def exit_code(status):
+    if os.WIFEXITED(status):
+        return os.WEXITSTATUS(status)
+    return -os.WTERMSIG(status)
+
+
+def serve():
+    # keep the request/answer channel away from fd 0/1, which the children redirect
+    requests = os.fdopen(os.dup(0), 'r')
+    answers = os.fdopen(os.dup(1), 'w')
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(2, 1)
+    # the scripts see their own dir first on sys.path, not the command executor one
+    sys.path.pop(0)
+    preload()
+    for line in requests:
+        request = json.loads(line)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            requests.close()
+            answers.close()
+            run_child(request)
+        answers.write(json.dumps({'pid': pid}) + '\n')
+        answers.flush()
+        _, status, rusage = os.wait4(pid, 0)
+        usage = {
+            'user_cpu_seconds': rusage.ru_utime,
+            'sys_cpu_seconds': rusage.ru_stime,
+            'max_rss_bytes': rusage.ru_maxrss * 1024,
+            'read_bytes': rusage.ru_inblock * 512,
+            'written_bytes': rusage.ru_oublock * 512,
+        }
+        answers.write(json.dumps({'rc': exit_code(status), 'usage': usage}) + '\n')
+        answers.flush()
+
+
+if __name__ == '__main__':
+    serve()
@@ -0,0 +1,219 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from subprocess import PIPE, DEVNULL, TimeoutExpired
+import json
+import logging
+import os
+import select
+import shlex
+import subprocess
+import threading
+import time
+import utils
+from execution_resources import ExecutionTimeoutExpired, kill_session
+
+WARM_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'warm_worker.py')
+PYTHON_COMMANDS = ('python', 'python3')
+# anything the shell would interpret: such commands keep going through /bin/sh
+SHELL_CHARACTERS = set('|&;<>()$`\\*?[]#~{}!\n')
+EVICTION_INTERVAL = 30
+
+
+class WarmWorker():
+
+    def __init__(self, venv_dir, env, generation):
+        self.venv_dir = venv_dir
+        self.generation = generation
+        self.process = subprocess.Popen([venv_dir + "/bin/python", WARM_WORKER_SCRIPT], stdin=PIPE, stdout=PIPE,
+                                        stderr=DEVNULL, cwd=venv_dir, env=env)
+        self.buffer = b''
+        self.last_used = time.time()
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        if self.is_alive():
+            self.process.kill()
+        self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+
+    # Returns the script (return code, resource usage), None when the worker died before starting it.
+    # Raises ExecutionTimeoutExpired (after killing the script and its children) like subprocess.run would.
+    def run(self, cwd, argv, env, output, timeout, rlimits=None):
+        request = {'cwd': cwd, 'argv': argv, 'env': env, 'output': output, 'rlimits': rlimits or {}}
+        try:
+            self.process.stdin.write((json.dumps(request) + '\n').encode())
+            self.process.stdin.flush()
+            pid = self.read_answer(None)['pid']
+        except (OSError, ValueError):
+            return None
+        try:
+            answer = self.read_answer(time.time() + timeout if timeout is not None else None)
+            return answer['rc'], answer.get('usage')
+        except TimeoutExpired:
+            killed_processes = kill_session(pid)
+            self.read_answer(None)
+            raise ExecutionTimeoutExpired(argv, timeout, killed_processes)
+        finally:
+            self.last_used = time.time()
+
+    def read_answer(self, deadline):
+        fd = self.process.stdout.fileno()
+        while b'\n' not in self.buffer:
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutExpired(self.process.args, 0)
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                continue
+            data = os.read(fd, 4096)
+            if not data:
+                raise OSError("warm worker for {} exited".format(self.venv_dir))
+            self.buffer += data
+        line, self.buffer = self.buffer.split(b'\n', 1)
+        return json.loads(line.decode())
+
+
+# Pools of warm python workers, per CBA venv.
+# A worker runs one script at a time; when all the workers of a venv are busy (or the limits are reached)
+# the caller runs the command the usual way.
+class WarmWorkerPool():
+
+    def __init__(self, enabled=False, workers_per_venv=2, max_workers=20, idle_timeout=300):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.enabled = enabled
+        self.workers_per_venv = workers_per_venv
+        self.max_workers = max_workers
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        # venv dir -> idle workers
+        self.idle = {}
+        # venv dir -> number of workers (idle or busy)
+        self.counts = {}
+        # venv dir -> generation, bumped to retire the workers started before a venv change
+        self.generations = {}
+        self.thread = None
+
+    def is_enabled(self):
+        return self.enabled
+
+    def start(self):
+        if not self.enabled or self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self.evict_idle_workers, name=self.__class__.__name__, daemon=True)
+        self.thread.start()
+
+    # Returns the argv to run in a warm worker for this command, None if it has to go through the shell.
+    @staticmethod
+    def warm_argv(command):
+        if any(c in SHELL_CHARACTERS for c in command):
+            return None
+        try:
+            argv = shlex.split(command)
+        except ValueError:
+            return None
+        if len(argv) < 2 or argv[0] not in PYTHON_COMMANDS or argv[1].startswith('-'):
+            return None
+        return argv
+
+    # Returns the script (return code, resource usage), or None when no warm worker could run it.
+    def run(self, venv_dir, argv, env, output, timeout, extra=None, rlimits=None):
+        worker = self.acquire(venv_dir, env, extra)
+        if worker is None:
+            return None
+        try:
+            outcome = worker.run(venv_dir, argv, env, output, timeout, rlimits)
+        except BaseException:
+            self.release(worker)
+            raise
+        self.release(worker)
+        return outcome
+
+    def acquire(self, venv_dir, env, extra=None):
+        with self.lock:
+            workers = self.idle.get(venv_dir, [])
+            while workers:
+                worker = workers.pop()
+                if worker.is_alive():
+                    return worker
+                self.forget_locked(worker)
+                worker.close()
+            if self.counts.get(venv_dir, 0) >= self.workers_per_venv:
+                return None
+            if sum(self.counts.values()) >= self.max_workers and not self.evict_lru_locked():
+                return None
+            self.counts[venv_dir] = self.counts.get(venv_dir, 0) + 1
+            generation = self.generations.get(venv_dir, 0)
+        try:
+            self.logger.info("Starting warm worker for {}".format(venv_dir), extra=extra or utils.getExtraLogData())
+            return WarmWorker(venv_dir, env, generation)
+        except OSError as err:
+            self.logger.error("Failed to start warm worker for {}. Error: {}".format(venv_dir, err), extra=extra or utils.getExtraLogData())
+            with self.lock:
+                self.counts[venv_dir] -= 1
+                if self.counts[venv_dir] <= 0:
+                    del self.counts[venv_dir]
+            return None
+
+    def release(self, worker):
+        with self.lock:
+            if worker.is_alive() and worker.generation == self.generations.get(worker.venv_dir, 0):
+                self.idle.setdefault(worker.venv_dir, []).append(worker)
+                return
+            self.forget_locked(worker)
+        worker.close()
+
+    # retire the workers of a venv, e.g. when its packages changed: idle ones now, busy ones when released
+    def evict(self, venv_dir):
+        with self.lock:
+            self.generations[venv_dir] = self.generations.get(venv_dir, 0) + 1
+            workers = self.idle.pop(venv_dir, [])
+            for worker in workers:
+                self.forget_locked(worker)
+        for worker in workers:
+            worker.close()
+
+    def forget_locked(self, worker):
+        self.counts[worker.venv_dir] -= 1
+        if self.counts[worker.venv_dir] <= 0:
+            del self.counts[worker.venv_dir]
+
+    def evict_lru_locked(self):
+        idle = [worker for workers in self.idle.values() for worker in workers]
+        if not idle:
+            return False
+        worker = min(idle, key=lambda w: w.last_used)
+        self.idle[worker.venv_dir].remove(worker)
+        self.forget_locked(worker)
+        worker.close()
+        return True
+
+    def evict_idle_workers(self):
+        while True:
+            time.sleep(EVICTION_INTERVAL)
+            expired = []
+            with self.lock:
+                now = time.time()
+                for venv_dir, workers in self.idle.items():
+                    for worker in [w for w in workers if now - w.last_used > self.idle_timeout]:
+                        workers.remove(worker)
+                        self.forget_locked(worker)
+                        expired.append(worker)
+            for worker in expired:
+                self.logger.info("Stopping idle warm worker for {}".format(worker.venv_dir), extra=utils.getExtraLogData())
+                worker.close()
@@ -0,0 +1,80 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from subprocess import CalledProcessError, PIPE
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import utils
+
+# name prefix of the dirs the wheels of an install are built into before being moved to the wheelhouse
+STAGING_PREFIX = '.staging-'
+
+
+# Local wheel cache shared by all the CBA environments.
+# The wheels of an install (the requested packages and their dependencies) are built or downloaded once by
+# 'pip wheel' into the wheelhouse, then those very wheel files are installed without any index: the packages
+# installed successfully are in the wheelhouse by construction, nothing is downloaded or built twice. In offline mode the wheelhouse is not filled, pip resolves from it only (--no-index),
+# which makes prepareEnv independent from the network index / proxy.
+class Wheelhouse():
+
+    def __init__(self, wheel_dir, enabled=False, offline=False):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.wheel_dir = wheel_dir
+        self.enabled = enabled or offline
+        self.offline = offline
+
+    def is_enabled(self):
+        return self.enabled
+
+    def start(self):
+        if not self.enabled:
+            return
+        os.makedirs(self.wheel_dir, mode=0o755, exist_ok=True)
+        # left by installs interrupted by a restart
+        for entry in os.listdir(self.wheel_dir):
+            if entry.startswith(STAGING_PREFIX):
+                shutil.rmtree(os.path.join(self.wheel_dir, entry), ignore_errors=True)
+
+    # pip install options resolving from the wheelhouse only
+    def pip_args(self):
+        if not self.enabled:
+            return []
+        return ["--no-index", "--find-links", self.wheel_dir]
+
+    # Builds the wheels of args (pip requirement specs and '-r <file>' options) into the wheelhouse with the given pip,
+    # whose interpreter gives the wheel tags. Returns (success, pip wheel log, pip install arguments installing them).
+    def install_args(self, pip, args, env=None, extra=None):
+        if not self.enabled:
+            return True, "", list(args)
+        if self.offline:
+            return True, "", self.pip_args() + list(args)
+        # built aside and moved in file by file: an install reading the wheelhouse only sees complete wheels
+        staging_dir = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=self.wheel_dir)
+        command = [pip, "wheel", "--wheel-dir", staging_dir, "--find-links", self.wheel_dir] + list(args)
+        try:
+            log = subprocess.run(command, check=True, stdout=PIPE, stderr=PIPE, env=env).stdout.decode()
+            wheels = sorted(os.listdir(staging_dir))
+            for wheel in wheels:
+                os.replace(os.path.join(staging_dir, wheel), os.path.join(self.wheel_dir, wheel))
+        except CalledProcessError as e:
+            self.logger.error("Building wheels of {} failed".format(args), extra=extra or utils.getExtraLogData())
+            return False, e.stderr.decode(), None
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        self.logger.info("Wheels of {} are in the wheelhouse".format(args), extra=extra or utils.getExtraLogData())
+        return True, log, self.pip_args() + [os.path.join(self.wheel_dir, wheel) for wheel in wheels]
@@ -0,0 +1,112 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import glob
+import os
+import time
+
+from blueprint_gc import EVICTED_PREFIX, STALE_UPLOAD_AGE, BlueprintGarbageCollector
+from environment_registry import EnvironmentRegistry
+
+
+def make_blueprint(deploy_dir, blueprint_id, size, age):
+    path = os.path.join(deploy_dir, blueprint_id)
+    os.makedirs(path)
+    with open(os.path.join(path, 'data'), 'wb') as f:
+        f.write(b'x' * size)
+    used = time.time() - age
+    os.utime(path, (used, used))
+    return path
+
+
+def blueprints(deploy_dir):
+    return sorted(os.path.relpath(path, deploy_dir) for path in glob.glob(os.path.join(deploy_dir, '*', '*', '*')))
+
+
+def test_evicts_least_recently_used_over_the_size_quota(tmp_path):
+    deploy_dir = str(tmp_path)
+    make_blueprint(deploy_dir, 'a/1.0.0/u1', 1000, age=300)
+    make_blueprint(deploy_dir, 'a/1.0.0/u2', 1000, age=100)
+    make_blueprint(deploy_dir, 'b/1.0.0/u1', 1000, age=200)
+    gc = BlueprintGarbageCollector(deploy_dir, max_size=2000)
+    gc.collect()
+    assert blueprints(deploy_dir) == ['a/1.0.0/u2', 'b/1.0.0/u1']
+    gc.collect()
+    assert blueprints(deploy_dir) == ['a/1.0.0/u2', 'b/1.0.0/u1']
+
+
+def test_evicts_over_the_entries_quota(tmp_path):
+    deploy_dir = str(tmp_path)
+    for i in range(5):
+        make_blueprint(deploy_dir, 'a/1.0.0/u{}'.format(i), 10, age=100 * i)
+    BlueprintGarbageCollector(deploy_dir, max_entries=2).collect()
+    assert blueprints(deploy_dir) == ['a/1.0.0/u0', 'a/1.0.0/u1']
+
+
+def test_blueprints_in_use_are_skipped(tmp_path):
+    deploy_dir = str(tmp_path)
+    oldest = make_blueprint(deploy_dir, 'a/1.0.0/u1', 10, age=300)
+    make_blueprint(deploy_dir, 'a/1.0.0/u2', 10, age=200)
+    make_blueprint(deploy_dir, 'a/1.0.0/u3', 10, age=100)
+    gc = BlueprintGarbageCollector(deploy_dir, max_entries=2)
+    with gc.using(oldest + '/'):
+        gc.collect()
+        assert blueprints(deploy_dir) == ['a/1.0.0/u1', 'a/1.0.0/u3']
+    assert gc.in_use == {}
+    gc.max_entries = 1
+    gc.collect()
+    assert blueprints(deploy_dir) == ['a/1.0.0/u3']
+
+
+def test_registry_last_use_and_size(tmp_path):
+    deploy_dir = str(tmp_path)
+    make_blueprint(deploy_dir, 'a/1.0.0/u1', 10, age=300)
+    make_blueprint(deploy_dir, 'a/1.0.0/u2', 20, age=200)
+    registry = EnvironmentRegistry(deploy_dir, 'TOSCA-Metadata/TOSCA.meta')
+    registry.load()
+    # used recently, its dir mtime not updated yet
+    registry.used('a/1.0.0/u1')
+    gc = BlueprintGarbageCollector(deploy_dir, max_entries=1, environment_registry=registry)
+    gc.collect()
+    assert blueprints(deploy_dir) == ['a/1.0.0/u1']
+    assert [(e['blueprint_id'], e['size']) for e in registry.dump()] == [('a/1.0.0/u1', 10)]
+
+
+def test_leftovers_are_removed(tmp_path):
+    deploy_dir = str(tmp_path)
+    make_blueprint(deploy_dir, 'a/1.0.0/u1', 10, age=0)
+    make_blueprint(deploy_dir, 'a/1.0.0/' + EVICTED_PREFIX + 'x', 10, age=0)
+    make_blueprint(deploy_dir, 'a/1.0.0/.upload-abandoned', 10, age=STALE_UPLOAD_AGE + 60)
+    make_blueprint(deploy_dir, 'a/1.0.0/.upload-in-progress', 10, age=0)
+    BlueprintGarbageCollector(deploy_dir, max_entries=10).collect()
+    assert sorted(os.listdir(os.path.join(deploy_dir, 'a/1.0.0'))) == ['.upload-in-progress', 'u1']
+
+
+def test_evicted_blueprint_warm_workers(tmp_path):
+    deploy_dir = str(tmp_path)
+    path = make_blueprint(deploy_dir, 'a/1.0.0/u1', 10, age=0)
+
+    class WarmWorkerPool():
+
+        def __init__(self):
+            self.evicted = []
+
+        def evict(self, venv_dir):
+            self.evicted.append(venv_dir)
+
+    pool = WarmWorkerPool()
+    BlueprintGarbageCollector(deploy_dir, max_size=1, warm_worker_pool=pool).collect()
+    assert pool.evicted == [path]
+    assert blueprints(deploy_dir) == []
@@ -0,0 +1,143 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import gzip
+import io
+import os
+import stat
+import tarfile
+import zipfile
+
+import pytest
+
+from cba_extractor import PARALLEL_MIN_MEMBERS, CbaExtractionError, CbaExtractor, MemoryViewReader
+
+FILES = dict(('Scripts/python/script{}.py'.format(i), 'print({})\n'.format(i) * (i + 1) * 100) for i in range(PARALLEL_MIN_MEMBERS * 2))
+FILES['TOSCA-Metadata/TOSCA.meta'] = 'TOSCA-Meta-File-Version: 1.0.0\n'
+
+
+def make_zip(files, symlinks=(), compression=zipfile.ZIP_DEFLATED):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w', compression) as archive:
+        archive.writestr('Scripts/', '')
+        for name, content in files.items():
+            archive.writestr(name, content)
+        for name, target in symlinks:
+            info = zipfile.ZipInfo(name)
+            info.external_attr = (stat.S_IFLNK | 0o777) << 16
+            archive.writestr(info, target)
+    return data.getvalue()
+
+
+def make_tar_gz(files, symlinks=(), modes=None):
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode='w:gz') as archive:
+        info = tarfile.TarInfo('Scripts')
+        info.type = tarfile.DIRTYPE
+        archive.addfile(info)
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content.encode())
+            info.mode = (modes or {}).get(name, 0o644)
+            archive.addfile(info, io.BytesIO(content.encode()))
+        for name, target in symlinks:
+            info = tarfile.TarInfo(name)
+            info.type = tarfile.SYMTYPE
+            info.linkname = target
+            archive.addfile(info)
+    return data.getvalue()
+
+
+def read_tree(root):
+    files = {}
+    for dir_path, _, file_names in os.walk(root):
+        for name in file_names:
+            path = os.path.join(dir_path, name)
+            with open(path) as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_extract_zip(tmp_path, max_workers):
+    CbaExtractor(max_workers=max_workers).extract(make_zip(FILES), 'CBA_ZIP', str(tmp_path), sync=True)
+    assert read_tree(str(tmp_path)) == FILES
+
+
+def test_extract_tar_gz(tmp_path):
+    data = make_tar_gz(FILES, modes={'Scripts/python/script0.py': 0o4777})
+    CbaExtractor().extract(data, 'CBA_GZIP', str(tmp_path))
+    assert read_tree(str(tmp_path)) == FILES
+    # executable kept, special and group/other write bits dropped
+    assert stat.S_IMODE(os.stat(str(tmp_path / 'Scripts/python/script0.py')).st_mode) == 0o755
+    assert stat.S_IMODE(os.stat(str(tmp_path / 'Scripts/python/script1.py')).st_mode) == 0o644
+
+
+def test_extract_gzipped_zip(tmp_path):
+    CbaExtractor().extract(gzip.compress(make_zip(FILES)), 'CBA_GZIP', str(tmp_path))
+    assert read_tree(str(tmp_path)) == FILES
+
+
+@pytest.mark.parametrize('name', ['../evil.py', 'Scripts/../../evil.py', '/tmp/evil.py'])
+@pytest.mark.parametrize('archive', ['CBA_ZIP', 'CBA_GZIP'])
+def test_path_traversal_is_refused(tmp_path, name, archive):
+    target = tmp_path / 'cba'
+    target.mkdir()
+    files = {'Scripts/ok.py': 'ok', name: 'evil'}
+    data = make_zip(files) if archive == 'CBA_ZIP' else make_tar_gz(files)
+    with pytest.raises(CbaExtractionError, match='Illegal path'):
+        CbaExtractor().extract(data, archive, str(target))
+    assert not (tmp_path / 'evil.py').exists()
+
+
+def test_tar_symlink_is_refused(tmp_path):
+    data = make_tar_gz({'Scripts/ok.py': 'ok'}, symlinks=[('Scripts/passwd', '/etc/passwd')])
+    with pytest.raises(CbaExtractionError, match='Unsupported member type'):
+        CbaExtractor().extract(data, 'CBA_GZIP', str(tmp_path))
+    assert not os.path.lexists(str(tmp_path / 'Scripts/passwd'))
+
+
+def test_zip_symlink_is_a_plain_file(tmp_path):
+    CbaExtractor().extract(make_zip({'Scripts/ok.py': 'ok'}, symlinks=[('Scripts/passwd', '/etc/passwd')]), 'CBA_ZIP', str(tmp_path))
+    path = str(tmp_path / 'Scripts/passwd')
+    assert not os.path.islink(path)
+    with open(path) as f:
+        assert f.read() == '/etc/passwd'
+
+
+def test_corrupted_zip_member(tmp_path):
+    data = bytearray(make_zip({'Scripts/ok.py': 'x' * 1000}, compression=zipfile.ZIP_STORED))
+    # flip a byte of the stored content: the CRC does not match anymore
+    offset = bytes(data).index(b'x' * 1000) + 500
+    data[offset] ^= 0xff
+    with pytest.raises(zipfile.BadZipFile, match='CRC'):
+        CbaExtractor().extract(bytes(data), 'CBA_ZIP', str(tmp_path))
+
+
+def test_unknown_archive_type(tmp_path):
+    with pytest.raises(CbaExtractionError, match='not valid'):
+        CbaExtractor().extract(b'', 'CBA_RAR', str(tmp_path))
+
+
+def test_memory_view_reader():
+    reader = MemoryViewReader(memoryview(b'0123456789'))
+    assert reader.read(3) == b'012'
+    assert reader.seek(-2, io.SEEK_END) == 8
+    assert reader.read() == b'89'
+    assert reader.seek(-100, io.SEEK_CUR) == 0
+    buffer = bytearray(4)
+    assert reader.readinto(buffer) == 4 and buffer == b'0123'
+    with pytest.raises(ValueError):
+        reader.seek(-1)
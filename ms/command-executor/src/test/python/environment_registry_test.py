@@ -0,0 +1,120 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+
+import environment_registry
+from environment_registry import EnvironmentRegistry
+
+TOSCA_META_FILE = 'TOSCA-Metadata/TOSCA.meta'
+
+
+def make_blueprint(deploy_dir, blueprint_id, uploaded=True, installed=False):
+    blueprint_dir = os.path.join(deploy_dir, blueprint_id)
+    os.makedirs(blueprint_dir)
+    if uploaded:
+        touch(os.path.join(blueprint_dir, TOSCA_META_FILE))
+    if installed:
+        touch(os.path.join(blueprint_dir, 'bin', 'python'))
+        with open(os.path.join(blueprint_dir, '.installed'), 'w') as f:
+            f.write('Installed pip packages:\n')
+    return blueprint_dir
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'w').close()
+
+
+def test_load_probes_the_deployed_environments(tmp_path):
+    deploy_dir = str(tmp_path)
+    make_blueprint(deploy_dir, 'cba/1.0.0/u1', installed=True)
+    make_blueprint(deploy_dir, 'cba/1.0.0/u2')
+    make_blueprint(deploy_dir, 'cba/1.0.0/u3', uploaded=False)
+    # staging dir of an upload in progress
+    make_blueprint(deploy_dir, 'cba/1.0.0/.staging-u4')
+    registry = EnvironmentRegistry(deploy_dir, TOSCA_META_FILE)
+    registry.load()
+    assert [(e['blueprint_id'], e['state']) for e in registry.dump()] == [
+        ('cba/1.0.0/u1', environment_registry.INSTALLED),
+        ('cba/1.0.0/u2', environment_registry.UPLOADED),
+        ('cba/1.0.0/u3', environment_registry.INCOMPLETE)]
+    assert registry.install_log('cba/1.0.0/u1') == 'Installed pip packages:\n'
+    assert registry.install_log('cba/1.0.0/u2') is None
+
+
+def test_unknown_blueprint_is_probed(tmp_path):
+    registry = EnvironmentRegistry(str(tmp_path), TOSCA_META_FILE)
+    assert registry.state('cba/1.0.0/u1') is None
+    assert registry.dump() == []
+    make_blueprint(str(tmp_path), 'cba/1.0.0/u1')
+    assert registry.state('cba/1.0.0/u1') == environment_registry.UPLOADED
+    assert [e['blueprint_id'] for e in registry.dump('cba/')] == ['cba/1.0.0/u1']
+    assert registry.dump('cb/') == []
+
+
+def test_state_transitions(tmp_path):
+    deploy_dir = str(tmp_path)
+    registry = EnvironmentRegistry(deploy_dir, TOSCA_META_FILE)
+    blueprint_dir = make_blueprint(deploy_dir, 'cba/1.0.0/u1')
+    registry.uploaded('cba/1.0.0/u1')
+    assert registry.state('cba/1.0.0/u1') == environment_registry.UPLOADED
+    touch(os.path.join(blueprint_dir, 'bin', 'python'))
+    with open(os.path.join(blueprint_dir, '.installed'), 'w') as f:
+        f.write('first install')
+    registry.installed('cba/1.0.0/u1')
+    assert registry.state('cba/1.0.0/u1') == environment_registry.INSTALLED
+    assert registry.install_log('cba/1.0.0/u1') == 'first install'
+    # uploaded again: the install log read before is dropped
+    registry.uploaded('cba/1.0.0/u1')
+    with open(os.path.join(blueprint_dir, '.installed'), 'w') as f:
+        f.write('second install')
+    registry.installed('cba/1.0.0/u1')
+    assert registry.install_log('cba/1.0.0/u1') == 'second install'
+    registry.removed('cba/1.0.0/u1')
+    assert registry.dump() == []
+
+
+def test_known_state_is_checked_against_the_disk(tmp_path):
+    deploy_dir = str(tmp_path)
+    blueprint_dir = make_blueprint(deploy_dir, 'cba/1.0.0/u1', installed=True)
+    registry = EnvironmentRegistry(deploy_dir, TOSCA_META_FILE)
+    registry.load()
+    assert registry.state('cba/1.0.0/u1') == environment_registry.INSTALLED
+    # venv removed behind the back of the registry: to be prepared again
+    os.remove(os.path.join(blueprint_dir, 'bin', 'python'))
+    assert registry.state('cba/1.0.0/u1') == environment_registry.UPLOADED
+    os.remove(os.path.join(blueprint_dir, TOSCA_META_FILE))
+    assert registry.state('cba/1.0.0/u1') == environment_registry.INCOMPLETE
+    os.rmdir(os.path.join(blueprint_dir, 'TOSCA-Metadata'))
+    os.rmdir(os.path.join(blueprint_dir, 'bin'))
+    os.remove(os.path.join(blueprint_dir, '.installed'))
+    os.rmdir(blueprint_dir)
+    assert registry.state('cba/1.0.0/u1') is None
+    assert registry.dump() == []
+
+
+def test_used_touches_once_per_resolution(tmp_path):
+    deploy_dir = str(tmp_path)
+    make_blueprint(deploy_dir, 'cba/1.0.0/u1')
+    registry = EnvironmentRegistry(deploy_dir, TOSCA_META_FILE)
+    assert registry.used('cba/1.0.0/u1')
+    registry.load()
+    registry.environments['cba/1.0.0/u1'].last_used -= environment_registry.USED_MTIME_RESOLUTION
+    assert registry.used('cba/1.0.0/u1')
+    assert not registry.used('cba/1.0.0/u1')
+    assert registry.last_used('cba/1.0.0/u1') > 0
+    registry.measured('cba/1.0.0/u1', 42)
+    assert registry.dump()[0]['size'] == 42
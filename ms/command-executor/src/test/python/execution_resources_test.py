@@ -0,0 +1,122 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import asyncio
+import subprocess
+import sys
+import time
+
+import pytest
+
+from execution_resources import ExecutionTimeoutExpired, kill_session, run_with_usage, session_processes, \
+    wait_with_usage, wait_with_usage_async
+
+
+def test_wait_with_usage_reports_exit_code_and_usage():
+    process = subprocess.Popen([sys.executable, '-c', 'sum(range(10 ** 6)); exit(3)'])
+    return_code, usage = wait_with_usage(process, timeout=30)
+    assert return_code == 3
+    assert process.returncode == 3
+    assert usage['user_cpu_seconds'] + usage['sys_cpu_seconds'] > 0
+    assert usage['max_rss_bytes'] > 0
+
+
+def test_wait_with_usage_timeout_kills():
+    process = subprocess.Popen(['sleep', '30'])
+    start = time.time()
+    with pytest.raises(ExecutionTimeoutExpired) as error:
+        wait_with_usage(process, timeout=0.2)
+    assert time.time() - start < 10
+    assert error.value.killed_processes == 0
+    assert process.returncode < 0
+
+
+def test_wait_with_usage_never_kills_a_reaped_process():
+    # the processes exit right at the timeout: the timer either kills one not reaped yet (and the timeout is
+    # raised) or does nothing, it never kills a reaped one, whose pid may have been reused
+    reaped_when_killed = []
+
+    def kill(process):
+        reaped_when_killed.append(process.returncode is not None)
+        return 1
+
+    for _ in range(50):
+        process = subprocess.Popen(['true'])
+        time.sleep(0.01)
+        try:
+            assert wait_with_usage(process, timeout=0.01, kill=kill)[0] == 0
+        except ExecutionTimeoutExpired as error:
+            assert error.killed_processes == 1
+    assert not any(reaped_when_killed)
+
+
+def test_wait_with_usage_async():
+    async def wait():
+        ok = subprocess.Popen([sys.executable, '-c', 'sum(range(10 ** 6))'])
+        slow = subprocess.Popen(['sleep', '30'])
+        # both waited for concurrently, the loop is not blocked
+        results = await asyncio.gather(wait_with_usage_async(ok, 30), wait_with_usage_async(slow, 0.2),
+                                       return_exceptions=True)
+        return ok, results
+    loop = asyncio.new_event_loop()
+    try:
+        ok, (ok_result, slow_result) = loop.run_until_complete(wait())
+    finally:
+        loop.close()
+    assert ok_result[0] == 0 and ok.returncode == 0
+    assert ok_result[1]['user_cpu_seconds'] > 0
+    assert isinstance(slow_result, ExecutionTimeoutExpired)
+
+
+def test_run_with_usage_kills_the_whole_session(tmp_path):
+    pid_file = str(tmp_path / 'pid')
+    # the child moves to its own process group: killpg alone would miss it
+    cmd = '{} -c "import os, time; os.setpgid(0, 0); open(\'{}\', \'w\').write(str(os.getpid())); time.sleep(30)" ' \
+          '& wait'.format(sys.executable, pid_file)
+    with pytest.raises(ExecutionTimeoutExpired) as error:
+        run_with_usage(cmd, subprocess.DEVNULL, None, 1)
+    assert error.value.killed_processes == 2
+    with open(pid_file) as f:
+        child = int(f.read())
+    assert not _alive(child)
+
+
+def test_kill_session_escalates_to_sigkill():
+    # ignores SIGTERM: killed by SIGKILL after the grace period
+    process = subprocess.Popen([sys.executable, '-c', 'import signal, time; signal.signal(signal.SIGTERM, '
+                                'signal.SIG_IGN); print(flush=True); time.sleep(30)'],
+                               stdout=subprocess.PIPE, start_new_session=True)
+    process.stdout.readline()
+    start = time.time()
+    assert kill_session(process.pid, grace_period=0.3) == 1
+    assert time.time() - start < 10
+    assert process.wait(5) == -9
+    assert session_processes(process.pid) == []
+    process.stdout.close()
+
+
+def test_kill_session_nothing_to_kill():
+    process = subprocess.Popen(['true'], start_new_session=True)
+    process.wait()
+    assert kill_session(process.pid, grace_period=0.1) == 0
+
+
+def _alive(pid):
+    try:
+        with open('/proc/{}/stat'.format(pid)) as f:
+            stat = f.read()
+    except OSError:
+        return False
+    return stat[stat.rfind(')') + 2:].split()[0] != 'Z'
@@ -0,0 +1,47 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+from concurrent import futures
+
+from install_plan import copy_roles
+
+
+def make_roles(root, *roles):
+    for role in roles:
+        os.makedirs(os.path.join(root, role, 'tasks'))
+        with open(os.path.join(root, role, 'tasks', 'main.yml'), 'w') as f:
+            f.write('- name: {}\n'.format(role))
+    return root
+
+
+def test_copy_roles_keeps_existing_roles(tmp_path):
+    roles_dir = make_roles(str(tmp_path / 'roles'), 'common')
+    with open(os.path.join(roles_dir, 'common', 'tasks', 'main.yml'), 'w') as f:
+        f.write('# already installed\n')
+    src_dir = make_roles(str(tmp_path / 'src'), 'web', 'common')
+    copy_roles(src_dir, roles_dir)
+    assert sorted(os.listdir(roles_dir)) == ['common', 'web']
+    with open(os.path.join(roles_dir, 'common', 'tasks', 'main.yml')) as f:
+        assert f.read() == '# already installed\n'
+
+
+def test_copy_roles_concurrently_with_shared_dependencies(tmp_path):
+    for run in range(20):
+        roles_dir = str(tmp_path / 'roles-{}'.format(run))
+        sources = [make_roles(str(tmp_path / 'src-{}-{}'.format(run, i)), 'role{}'.format(i), 'common') for i in range(8)]
+        with futures.ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda src: copy_roles(src, roles_dir, move=True), sources))
+        assert sorted(os.listdir(roles_dir)) == sorted(['common'] + ['role{}'.format(i) for i in range(8)])
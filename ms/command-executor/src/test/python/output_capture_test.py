@@ -0,0 +1,133 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import logging
+import tempfile
+
+import utils
+
+PAYLOAD_OUTPUT = (
+    b"starting\n"
+    b"BEGIN_EXTRA_PAYLOAD\n"
+    b"MIME-Version: 1.0\n"
+    b"Content-Type: multipart/mixed; boundary=\"===b===\"\n"
+    b"\n"
+    b"--===b===\n"
+    b"Content-Type: application/json\n"
+    b"\n"
+    b"{\"key\": \"value\"}\n"
+    b"--===b===--\n"
+    b"END_EXTRA_PAYLOAD\n"
+    b"BEGIN_EXTRA_RET_ERR_MSG\n"
+    b"something failed\n"
+    b"END_EXTRA_RET_ERR_MSG\n"
+    b"  done  \n"
+)
+
+
+def capture_of(output, chunk_size, max_size=None, max_line_size=None):
+    payload_result = {}
+    err_msg_result = []
+    capture = utils.OutputCapture(utils.CmdExecOutputParser(payload_result, err_msg_result),
+        max_size=max_size, max_line_size=max_line_size)
+    for offset in range(0, len(output), chunk_size):
+        capture.feed(output[offset:offset + chunk_size])
+    capture.close()
+    return capture, payload_result, err_msg_result
+
+
+# Line by line parsing of the whole output, as done before the capture was bounded
+def reference_parse(output):
+    payload_result = {}
+    err_msg_result = []
+    parser = utils.CmdExecOutputParser(payload_result, err_msg_result)
+    log_lines = []
+    for line in output.decode(errors='replace').splitlines(keepends=True):
+        log_line = parser.feed(line)
+        if log_line is not None:
+            log_lines.append(log_line)
+    return log_lines, payload_result, err_msg_result
+
+
+def test_same_results_as_line_parsing_whatever_the_chunks():
+    expected = reference_parse(PAYLOAD_OUTPUT)
+    assert expected == (['starting', 'done'], {'key': 'value'}, ['something failed'])
+    for chunk_size in (1, 2, 3, 7, 64, len(PAYLOAD_OUTPUT)):
+        capture, payload_result, err_msg_result = capture_of(PAYLOAD_OUTPUT, chunk_size)
+        assert (capture.log_lines(), payload_result, err_msg_result) == expected
+        assert capture.lines == PAYLOAD_OUTPUT.count(b'\n')
+        assert capture.bytes == len(PAYLOAD_OUTPUT)
+        assert capture.dropped_lines == 0 and capture.dropped_bytes == 0
+
+
+def test_parse_cmd_exec_output_matches_line_parsing():
+    results_log = []
+    payload_result = {}
+    err_msg_result = []
+    with tempfile.TemporaryFile() as outputfile:
+        outputfile.write(PAYLOAD_OUTPUT + b"no newline at the end")
+        utils.parse_cmd_exec_output(outputfile, logging.getLogger(__name__), payload_result, err_msg_result,
+            results_log, utils.getExtraLogData())
+    assert results_log == ['starting', 'done', 'no newline at the end']
+    assert payload_result == {'key': 'value'}
+    assert err_msg_result == ['something failed']
+
+
+def test_invalid_utf8_is_replaced():
+    output = b"caf\xc3\xa9\n\xff\xfe broken\n"
+    for chunk_size in (1, 4, len(output)):
+        capture = capture_of(output, chunk_size)[0]
+        assert capture.log_lines() == ['café', '�� broken']
+
+
+def test_ring_buffer_keeps_head_and_tail():
+    lines = [b'%07d' % i for i in range(10000)]
+    output = b'\n'.join(lines) + b'\n'
+    capture = capture_of(output, 4096, max_size=8000)[0]
+    log_lines = capture.log_lines()
+    kept = capture.lines - capture.dropped_lines
+    assert capture.lines == len(lines)
+    assert capture.dropped_lines > 0
+    assert capture.head_size + capture.tail_size <= 8000
+    assert len(log_lines) == kept + 1
+    marker = log_lines.index("[...] {} lines of output dropped".format(capture.dropped_lines))
+    head, tail = log_lines[:marker], log_lines[marker + 1:]
+    assert head == [line.decode() for line in lines[:len(head)]]
+    assert tail == [line.decode() for line in lines[len(lines) - len(tail):]]
+    assert capture.dropped_bytes == sum(len(line) for line in lines) - capture.head_size - capture.tail_size
+
+
+def test_long_lines_are_cut():
+    output = b'a' * 1000 + b'\nshort\n' + b'b' * 1000
+    for chunk_size in (1, 100, len(output)):
+        capture = capture_of(output, chunk_size, max_line_size=100)[0]
+        assert capture.log_lines() == ['a' * 100, 'short', 'b' * 100]
+        assert capture.dropped_bytes == 1800
+        assert len(capture.pending) <= 100
+
+
+def test_poll_returns_new_lines_only():
+    capture = utils.OutputCapture(utils.CmdExecOutputParser({}, []), max_size=20)
+    capture.feed(b'one\ntwo\n')
+    assert capture.poll() == (['one', 'two'], False)
+    capture.feed(PAYLOAD_OUTPUT)
+    assert capture.poll() == (['starting', 'done'], True)
+    capture.feed(b''.join(b'line %02d\n' % i for i in range(10)))
+    log_lines, payload_updated = capture.poll()
+    assert not payload_updated
+    # the head fills up again after a poll
+    assert log_lines == ['line 00', "[...] 8 lines of output dropped", 'line 09']
+    assert capture.dropped_lines == 8
+    assert capture.poll() == ([], False)
@@ -0,0 +1,177 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+import sys
+import textwrap
+import time
+
+from package_layer_cache import LAYER_PTH_FILE, PackageLayerCache
+
+# 'pip install --target' installs a package per spec (name[==version], or a requirements file of specs),
+# 'pip freeze --path' lists them
+FAKE_PIP = textwrap.dedent('''\
+    #!{python}
+    import os, sys
+    args = sys.argv[1:]
+    if args[0] == 'install':
+        target, specs = args[2], []
+        args = args[3:]
+        while args:
+            if args[0] == '-r':
+                with open(args[1]) as f:
+                    specs.extend(f.read().split())
+                args = args[2:]
+            else:
+                specs.append(args.pop(0))
+        for spec in specs:
+            if spec == 'broken':
+                sys.exit('no such package')
+            name, _, version = spec.partition('==')
+            os.makedirs(os.path.join(target, name))
+            with open(os.path.join(target, name, 'VERSION'), 'w') as f:
+                f.write(version or '1.0')
+        os.makedirs(os.path.join(target, 'bin'), exist_ok=True)
+        with open(os.path.join(target, 'bin', 'tool'), 'w') as f:
+            f.write('#!' + os.path.join(os.path.dirname(sys.argv[0]), 'python') + '\\n')
+    elif args[0] == 'freeze':
+        target = args[2]
+        for name in sorted(os.listdir(target)):
+            if not name.startswith('.') and name != 'bin':
+                with open(os.path.join(target, name, 'VERSION')) as f:
+                    print('{{}}=={{}}'.format(name, f.read()))
+''').format(python=sys.executable)
+
+
+def make_pip(tmp_path):
+    pip = str(tmp_path / 'builder' / 'bin' / 'pip')
+    os.makedirs(os.path.dirname(pip))
+    with open(pip, 'w') as f:
+        f.write(FAKE_PIP)
+    os.chmod(pip, 0o755)
+    return pip
+
+
+def make_venv(tmp_path, name):
+    venv_dir = str(tmp_path / name)
+    os.makedirs(os.path.join(venv_dir, 'lib', 'python{}.{}'.format(*sys.version_info[:2]), 'site-packages'))
+    os.makedirs(os.path.join(venv_dir, 'bin'))
+    return venv_dir
+
+
+def pth_path(venv_dir):
+    return os.path.join(venv_dir, 'lib', 'python{}.{}'.format(*sys.version_info[:2]), 'site-packages', LAYER_PTH_FILE)
+
+
+def build(cache, pip, packages, requirements_txt=None, pip_args=None):
+    request_key = cache.request_key(packages, requirements_txt)
+    return request_key, cache.build_layer(request_key, pip, pip_args or packages, dict(os.environ))
+
+
+def layers(cache):
+    return sorted(name for name in os.listdir(cache.cache_dir) if not name.startswith('.'))
+
+
+def test_requests_resolving_to_the_same_packages_share_a_layer(tmp_path):
+    pip = make_pip(tmp_path)
+    cache = PackageLayerCache(str(tmp_path / 'layers'), enabled=True)
+    request_key, (success, _, key) = build(cache, pip, ['six==1.16.0', 'cowsay'])
+    assert success
+    assert cache.resolved_layer(request_key) == key
+    # same set, asked through a requirements.txt
+    requirements = tmp_path / 'requirements.txt'
+    requirements.write_text('cowsay==1.0\nsix==1.16.0\n')
+    other_request_key, (success, _, other_key) = build(cache, pip, ['requirements.txt'], requirements.read_text(),
+                                                       pip_args=['-r', str(requirements)])
+    assert success
+    assert other_request_key != request_key
+    assert other_key == key
+    assert layers(cache) == [key]
+    # another set: another layer
+    _, (_, _, third_key) = build(cache, pip, ['six==1.15.0'])
+    assert third_key != key
+    assert layers(cache) == sorted([key, third_key])
+
+
+def test_resolution_expires(tmp_path):
+    pip = make_pip(tmp_path)
+    cache = PackageLayerCache(str(tmp_path / 'layers'), enabled=True, resolve_ttl=60)
+    request_key, (_, _, key) = build(cache, pip, ['cowsay'])
+    old = time.time() - 120
+    os.utime(cache.request_path(request_key), (old, old))
+    assert cache.resolved_layer(request_key) is None
+    # installed again, resolved to the same packages
+    assert cache.build_layer(request_key, pip, ['cowsay'], dict(os.environ))[2] == key
+    assert cache.resolved_layer(request_key) == key
+    assert layers(cache) == [key]
+
+
+def test_failed_build(tmp_path):
+    pip = make_pip(tmp_path)
+    cache = PackageLayerCache(str(tmp_path / 'layers'), enabled=True)
+    request_key, (success, install_log, key) = build(cache, pip, ['cowsay', 'broken'])
+    assert not success
+    assert 'no such package' in install_log
+    assert key is None
+    assert cache.resolved_layer(request_key) is None
+    assert os.listdir(cache.cache_dir) == ['.requests']
+
+
+def test_link_layer(tmp_path):
+    pip = make_pip(tmp_path)
+    cache = PackageLayerCache(str(tmp_path / 'layers'), enabled=True)
+    _, (_, _, key) = build(cache, pip, ['cowsay'])
+    venv_dir = make_venv(tmp_path, 'venv')
+    assert cache.link_layer(key, venv_dir)
+    with open(pth_path(venv_dir)) as f:
+        assert f.read() == cache.layer_path(key) + '\n'
+    with open(os.path.join(venv_dir, 'bin', 'tool')) as f:
+        assert f.read() == '#!' + os.path.join(venv_dir, 'bin', 'python') + '\n'
+    assert cache.live_links(key) == 1
+    os.remove(pth_path(venv_dir))
+    assert cache.live_links(key) == 0
+
+
+def test_collect_evicts_unlinked_layers_least_recently_used_first(tmp_path):
+    pip = make_pip(tmp_path)
+    cache = PackageLayerCache(str(tmp_path / 'layers'), enabled=True, max_entries=1)
+    linked_request_key, (_, _, linked_key) = build(cache, pip, ['a'])
+    old_request_key, (_, _, old_key) = build(cache, pip, ['b'])
+    recent_request_key, (_, _, recent_key) = build(cache, pip, ['c'])
+    for key, age in ((linked_key, 300), (old_key, 200), (recent_key, 100)):
+        os.utime(cache.layer_path(key), (time.time() - age, time.time() - age))
+    venv_dir = make_venv(tmp_path, 'venv')
+    assert cache.link_layer(linked_key, venv_dir)
+    os.utime(cache.layer_path(linked_key), (time.time() - 300, time.time() - 300))
+    os.makedirs(os.path.join(cache.cache_dir, '.tmp-abandoned'))
+    os.utime(os.path.join(cache.cache_dir, '.tmp-abandoned'), (0, 0))
+
+    cache.collect()
+    # the oldest one is still linked: kept over the quota
+    assert layers(cache) == [linked_key]
+    assert cache.resolved_layer(old_request_key) is None
+    assert cache.resolved_layer(recent_request_key) is None
+    assert not os.path.exists(cache.request_path(old_request_key))
+    assert cache.resolved_layer(linked_request_key) == linked_key
+    assert sorted(os.listdir(cache.cache_dir)) == ['.requests', linked_key]
+    # an evicted layer can not be linked
+    assert not cache.link_layer(old_key, make_venv(tmp_path, 'other'))
+
+    # the blueprint went away: its layer is no longer used
+    os.remove(pth_path(venv_dir))
+    cache.max_entries = 0
+    cache.max_size = 1
+    cache.collect()
+    assert layers(cache) == []
@@ -0,0 +1,107 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from google.protobuf import struct_pb2
+
+import proto.CommandExecutor_pb2 as CommandExecutor_pb2
+from result_cache import ExecutionResultCache
+
+BLUEPRINT_ID = 'cba/1.0.0/u1'
+
+
+def execution_input(command='python Scripts/python/check.py', **properties):
+    request = CommandExecutor_pb2.ExecutionInput(requestId='r1', command=command)
+    if properties:
+        struct = struct_pb2.Struct()
+        struct.update(properties)
+        request.properties.CopyFrom(struct)
+    return request
+
+
+def output(response=('done',), status=CommandExecutor_pb2.SUCCESS, request_id='r1'):
+    return CommandExecutor_pb2.ExecutionOutput(requestId=request_id, response=list(response), status=status, payload='{}')
+
+
+def test_request_key_opt_in():
+    cache = ExecutionResultCache(max_entries=10, max_size=1024 * 1024, max_ttl=300)
+    assert cache.request_key(execution_input(), BLUEPRINT_ID) == (None, None)
+    assert cache.request_key(execution_input(a=1), BLUEPRINT_ID) == (None, None)
+    assert cache.request_key(execution_input(a=1, cds_cache_result='true'), BLUEPRINT_ID) == (None, None)
+    key, ttl = cache.request_key(execution_input(a=1, cds_cache_result=True), BLUEPRINT_ID)
+    assert key is not None and ttl == 300
+    # the TTL asked for is capped, the caching properties are not part of the key
+    assert cache.request_key(execution_input(a=1, cds_cache_result=True, cds_cache_ttl=10), BLUEPRINT_ID) == (key, 10)
+    assert cache.request_key(execution_input(a=1, cds_cache_result=True, cds_cache_ttl=3600), BLUEPRINT_ID) == (key, 300)
+    assert cache.request_key(execution_input(a=1, cds_cache_result=True, cds_cache_ttl=0), BLUEPRINT_ID) == (None, None)
+    # same command, spelled differently
+    assert cache.request_key(execution_input('python  Scripts/python/check.py', a=1, cds_cache_result=True), BLUEPRINT_ID)[0] == key
+    assert cache.request_key(execution_input(a=2, cds_cache_result=True), BLUEPRINT_ID)[0] != key
+    assert cache.request_key(execution_input(a=1, cds_cache_result=True), 'cba/1.0.0/u2')[0] != key
+    assert ExecutionResultCache(max_entries=0, max_size=1024, max_ttl=300).request_key(
+        execution_input(a=1, cds_cache_result=True), BLUEPRINT_ID) == (None, None)
+
+
+def test_get_returns_a_copy_for_the_request(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('result_cache.time.time', lambda: now[0])
+    cache = ExecutionResultCache(max_entries=10, max_size=1024 * 1024, max_ttl=300)
+    key, ttl = cache.request_key(execution_input(cds_cache_result=True), BLUEPRINT_ID)
+    assert cache.get(key, 'r2') is None
+    cache.put(key, output(), ttl)
+    cached = cache.get(key, 'r2')
+    assert cached.requestId == 'r2' and list(cached.response) == ['done']
+    cached.response.append('changed')
+    assert list(cache.get(key, 'r3').response) == ['done']
+    now[0] += ttl
+    assert cache.get(key, 'r4') is None
+    assert cache.entries == {} and cache.size == 0
+
+
+def test_failures_and_oversized_outputs_are_not_cached():
+    cache = ExecutionResultCache(max_entries=10, max_size=100, max_ttl=300)
+    cache.put('failed', output(status=CommandExecutor_pb2.FAILURE), 300)
+    cache.put('big', output(['x' * 200]), 300)
+    assert cache.get('failed', 'r2') is None and cache.get('big', 'r2') is None
+    assert cache.size == 0
+
+
+def test_least_recently_used_are_evicted():
+    entry_size = output(['0' * 10]).ByteSize()
+    cache = ExecutionResultCache(max_entries=3, max_size=1024 * 1024, max_ttl=300)
+    for key in 'abc':
+        cache.put(key, output([key * 10]), 300)
+    cache.get('a', 'r2')
+    cache.put('d', output(['d' * 10]), 300)
+    assert list(cache.entries) == ['c', 'a', 'd']
+    # by size
+    cache.max_size = 2 * entry_size
+    cache.put('e', output(['e' * 10]), 300)
+    assert list(cache.entries) == ['d', 'e']
+    assert cache.size == 2 * entry_size
+    # replaced, not counted twice
+    cache.put('e', output(['E' * 10]), 300)
+    assert cache.size == 2 * entry_size
+    assert list(cache.get('e', 'r2').response) == ['E' * 10]
+
+
+def test_invalidate_drops_the_blueprint_outputs():
+    cache = ExecutionResultCache(max_entries=10, max_size=1024 * 1024, max_ttl=300)
+    key, ttl = cache.request_key(execution_input(cds_cache_result=True), BLUEPRINT_ID)
+    other_key, _ = cache.request_key(execution_input(cds_cache_result=True), 'cba/1.0.0/u2')
+    cache.put(key, output(), ttl)
+    cache.put(other_key, output(), ttl)
+    cache.invalidate(BLUEPRINT_ID)
+    assert cache.get(key, 'r2') is None
+    assert cache.get(other_key, 'r2') is not None
@@ -0,0 +1,45 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+
+import utils
+from cds_utils import payload_coder
+
+
+def test_result_channel_payload_and_err_msg(monkeypatch):
+    with utils.ResultChannel() as channel:
+        monkeypatch.setenv(payload_coder.RESULT_FILE_ENV, channel.path)
+        payload_coder.send_response_data_payload({"key": "value"})
+        payload_coder.send_response_err_msg("failed")
+        payload_result, err_msg_result = {}, []
+        assert channel.read(payload_result, err_msg_result) == 1
+    assert payload_result == {"key": "value"}
+    assert err_msg_result == ["failed"]
+    assert not os.path.exists(channel.path)
+
+
+def test_result_channel_non_str_err_msg(monkeypatch):
+    with utils.ResultChannel() as channel:
+        monkeypatch.setenv(payload_coder.RESULT_FILE_ENV, channel.path)
+        payload_coder.send_response_err_msg(ValueError("bad value"))
+        payload_coder.send_response_err_msg(42)
+        # frame written by a script using an older payload_coder
+        payload_coder.send_result_frame(b'E', {"code": 42})
+        payload_result, err_msg_result = {}, []
+        channel.read(payload_result, err_msg_result)
+    assert err_msg_result == ["bad value", "42", "{'code': 42}"]
+    response = utils.build_grpc_response("request-id", utils.build_ret_data(False, error=err_msg_result))
+    assert response.errMsg == "bad value\n42\n{'code': 42}"
@@ -0,0 +1,105 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import threading
+import time
+from concurrent import futures
+
+import pytest
+
+from single_flight import SingleFlight
+
+# time given to the waiting callers to reach the call in flight
+SETTLE = 0.2
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def build():
+        runs.append(1)
+        started.set()
+        release.wait(10)
+        return {'packages': ['six']}
+
+    def call(i):
+        if i > 0:
+            started.wait(10)
+        return flight.do('bp/1.0.0/u1', build)
+
+    with futures.ThreadPoolExecutor(max_workers=8) as executor:
+        calls = [executor.submit(call, i) for i in range(8)]
+        started.wait(10)
+        time.sleep(SETTLE)
+        release.set()
+        results = [c.result(10) for c in calls]
+    assert len(runs) == 1
+    assert all(result == {'packages': ['six']} for result in results)
+    # every caller gets its own copy
+    results[0]['packages'].append('changed')
+    assert results[1] == {'packages': ['six']}
+    assert flight.calls == {}
+
+
+def test_errors_propagate_to_the_waiters():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(10)
+        raise ValueError('pip failed')
+
+    with futures.ThreadPoolExecutor(max_workers=4) as executor:
+        first = executor.submit(flight.do, 'key', fail)
+        started.wait(10)
+        waiters = [executor.submit(flight.do, 'key', lambda: 'not run') for _ in range(3)]
+        time.sleep(SETTLE)
+        release.set()
+        for call in [first] + waiters:
+            with pytest.raises(ValueError, match='pip failed'):
+                call.result(10)
+    # the failure is not cached: the next call runs again
+    assert flight.do('key', lambda: 'ok') == 'ok'
+
+
+def test_other_keys_and_kinds_run_their_own():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def prepare():
+        started.set()
+        release.wait(10)
+        order.append('prepare')
+        return 'prepared'
+
+    with futures.ThreadPoolExecutor(max_workers=3) as executor:
+        first = executor.submit(flight.do, 'key', prepare, 'prepare')
+        started.wait(10)
+        # another key does not wait
+        assert flight.do('other', lambda: 'other') == 'other'
+        # another kind waits for the call in flight, then runs
+        upload = executor.submit(flight.do, 'key', lambda: order.append('upload') or 'uploaded', 'upload')
+        assert not upload.done()
+        release.set()
+        assert first.result(10) == 'prepared'
+        assert upload.result(10) == 'uploaded'
+    assert order == ['prepare', 'upload']
@@ -0,0 +1,87 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import proto.CommandExecutor_pb2 as CommandExecutor_pb2
+import utils
+
+MARKER_PREFIX = "[...] TRUNCATED CHARS : "
+
+
+def execution_output(lines, payload=''):
+    return CommandExecutor_pb2.ExecutionOutput(requestId='r1', response=lines, payload=payload)
+
+
+def split(output):
+    lines = list(output.response)
+    markers = [i for i, line in enumerate(lines) if line.startswith(MARKER_PREFIX)]
+    assert len(markers) == 1
+    marker = markers[0]
+    return lines[:marker], int(lines[marker][len(MARKER_PREFIX):]), lines[marker + 1:]
+
+
+def test_small_output_is_untouched():
+    lines = ['line {}'.format(i) for i in range(100)]
+    assert list(utils.truncate_execution_output(execution_output(lines)).response) == lines
+
+
+def test_head_only_by_default():
+    lines = ['{:08d}'.format(i) * 128 for i in range(8192)]
+    output = utils.truncate_execution_output(execution_output(lines), tail_size=0)
+    assert output.ByteSize() <= utils.RESPONSE_MAX_SIZE
+    head, truncated_chars, tail = split(output)
+    assert tail == []
+    assert head == lines[:len(head)]
+    assert truncated_chars == sum(len(line) for line in lines[len(head):])
+    # the head fills the budget: one more line would not fit
+    assert output.ByteSize() + utils.repeated_string_entry_size(utils.RESPONSE_FIELD_NUMBER, lines[len(head)]) > \
+        utils.RESPONSE_MAX_SIZE - utils.TRUNCATION_MARKER_RESERVE
+
+
+def test_head_and_tail():
+    lines = ['{:08d}'.format(i) * 128 for i in range(8192)]
+    tail_size = 64 * 1024
+    output = utils.truncate_execution_output(execution_output(lines), tail_size=tail_size)
+    assert output.ByteSize() <= utils.RESPONSE_MAX_SIZE
+    head, truncated_chars, tail = split(output)
+    assert head == lines[:len(head)]
+    assert tail == lines[len(lines) - len(tail):]
+    assert 0 < sum(utils.repeated_string_entry_size(utils.RESPONSE_FIELD_NUMBER, line) for line in tail) <= tail_size
+    assert truncated_chars == sum(len(line) for line in lines[len(head):len(lines) - len(tail)])
+
+
+def test_multibyte_lines_are_measured_in_bytes():
+    # 3 bytes per char: counting chars would overflow the gRPC message
+    lines = ['☃' * 1000 + str(i) for i in range(3000)]
+    output = utils.truncate_execution_output(execution_output(lines), tail_size=16 * 1024)
+    assert output.ByteSize() <= utils.RESPONSE_MAX_SIZE
+    head, truncated_chars, tail = split(output)
+    assert head == lines[:len(head)] and tail == lines[len(lines) - len(tail):]
+    assert truncated_chars == sum(len(line) for line in lines[len(head):len(lines) - len(tail)])
+
+
+def test_negative_budget_drops_every_line():
+    # the other fields alone exceed the limit: no line fits, nothing loops for ever
+    lines = ['x' * 1024 for _ in range(16)]
+    output = utils.truncate_execution_output(execution_output(lines, payload='p' * utils.RESPONSE_MAX_SIZE), tail_size=4096)
+    assert split(output) == ([], 16 * 1024, [])
+
+
+def test_tail_larger_than_the_budget():
+    lines = ['{:08d}'.format(i) * 128 for i in range(8192)]
+    output = utils.truncate_execution_output(execution_output(lines), tail_size=2 * utils.RESPONSE_MAX_SIZE)
+    assert output.ByteSize() <= utils.RESPONSE_MAX_SIZE
+    head, _, tail = split(output)
+    assert head == []
+    assert tail == lines[len(lines) - len(tail):]
@@ -0,0 +1,41 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from warm_worker_pool import WarmWorkerPool
+
+
+def test_plain_python_scripts_run_warm():
+    assert WarmWorkerPool.warm_argv("python script.py") == ['python', 'script.py']
+    assert WarmWorkerPool.warm_argv("python3  /opt/app/Scripts/python/cba.py arg1 'arg 2'") == \
+        ['python3', '/opt/app/Scripts/python/cba.py', 'arg1', 'arg 2']
+    assert WarmWorkerPool.warm_argv("python script.py '\"a\": 1'") == ['python', 'script.py', '"a": 1']
+
+
+def test_shell_constructs_go_through_the_shell():
+    for command in ("python script.py | tee out", "python script.py > out", "python a.py && python b.py",
+                    "python a.py; python b.py", "python $SCRIPT", "python `which s`", "python *.py",
+                    "python script.py &", "python script.py\npython other.py", "python ~/script.py",
+                    "python script.py # comment", 'python script.py "\\"quoted\\""'):
+        assert WarmWorkerPool.warm_argv(command) is None, command
+
+
+def test_non_python_commands_go_through_the_shell():
+    for command in ("", "python", "bash script.sh", "ansible-playbook play.yml", "/usr/bin/python script.py",
+                    "python -m module", "python -c 'print(1)'", "python -u script.py", "python2 script.py"):
+        assert WarmWorkerPool.warm_argv(command) is None, command
+
+
+def test_unbalanced_quotes_go_through_the_shell():
+    assert WarmWorkerPool.warm_argv("python script.py 'unterminated") is None
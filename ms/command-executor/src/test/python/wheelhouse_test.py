@@ -0,0 +1,71 @@
+#
+# Copyright (C) 2019 - 2020 Bell Canada.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+import sys
+import textwrap
+
+from wheelhouse import Wheelhouse
+
+# 'pip wheel --wheel-dir <dir> --find-links <dir> spec...': a wheel per spec, plus a dependency
+FAKE_PIP = textwrap.dedent('''\
+    #!{python}
+    import os, sys
+    wheel_dir, specs = sys.argv[3], sys.argv[6:]
+    if 'broken' in specs:
+        sys.exit('no such package')
+    for spec in specs + ['dep']:
+        open(os.path.join(wheel_dir, spec + '-1.0-py3-none-any.whl'), 'w').close()
+    print('built', specs)
+''').format(python=sys.executable)
+
+
+def make_pip(tmp_path):
+    pip = str(tmp_path / 'pip')
+    with open(pip, 'w') as f:
+        f.write(FAKE_PIP)
+    os.chmod(pip, 0o755)
+    return pip
+
+
+def test_install_args_installs_the_wheels_built_into_the_wheelhouse(tmp_path):
+    wheel_dir = str(tmp_path / 'wheelhouse')
+    wheelhouse = Wheelhouse(wheel_dir, enabled=True)
+    wheelhouse.start()
+    success, log, args = wheelhouse.install_args(make_pip(tmp_path), ['six'])
+    assert success
+    assert log == "built ['six']\n"
+    assert args == ['--no-index', '--find-links', wheel_dir,
+                    os.path.join(wheel_dir, 'dep-1.0-py3-none-any.whl'), os.path.join(wheel_dir, 'six-1.0-py3-none-any.whl')]
+    assert sorted(os.listdir(wheel_dir)) == ['dep-1.0-py3-none-any.whl', 'six-1.0-py3-none-any.whl']
+
+
+def test_install_args_failure(tmp_path):
+    wheel_dir = str(tmp_path / 'wheelhouse')
+    wheelhouse = Wheelhouse(wheel_dir, enabled=True)
+    wheelhouse.start()
+    success, log, args = wheelhouse.install_args(make_pip(tmp_path), ['six', 'broken'])
+    assert not success
+    assert 'no such package' in log
+    assert args is None
+    assert os.listdir(wheel_dir) == []
+
+
+def test_install_args_offline_and_disabled(tmp_path):
+    wheel_dir = str(tmp_path / 'wheelhouse')
+    pip = make_pip(tmp_path)
+    assert Wheelhouse(wheel_dir, offline=True).install_args(pip, ['six']) == (True, '', ['--no-index', '--find-links', wheel_dir, 'six'])
+    assert Wheelhouse(wheel_dir).install_args(pip, ['six']) == (True, '', ['six'])
+    assert not os.path.exists(wheel_dir)
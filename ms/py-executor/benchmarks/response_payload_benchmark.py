@@ -0,0 +1,69 @@
+#!/usr/bin/python
+#
+#  Copyright © 2018-2019 AT&T Intellectual Property.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+# Compares building a response payload Struct through a JSON round trip (json.dumps + json_format.Parse)
+# with executor_utils.create_response_payload_from_json, for 1 KB, 100 KB and 10 MB payloads.
+#
+# From ms/py-executor:
+#   PYTHONPATH=$PWD:$PWD/../artifact-manager:$PWD/../../py-modules/common python benchmarks/response_payload_benchmark.py
+
+import json
+import timeit
+
+from google.protobuf import json_format, struct_pb2
+from google.protobuf.internal import api_implementation
+
+from blueprints_grpc.executor_utils import create_response_payload_from_json
+
+SIZES = [('1 KB', 1024), ('100 KB', 100 * 1024), ('10 MB', 10 * 1024 * 1024)]
+
+
+def json_round_trip(action_name, property_json):
+    payload_struct = struct_pb2.Struct()
+    response_payload_json = json.dumps({action_name + '-response': property_json})
+    json_format.Parse(response_payload_json, payload_struct, ignore_unknown_fields=True)
+    return payload_struct
+
+
+# Device configuration like payload: a list of interfaces with nested attributes, about size bytes as JSON.
+def payload(size):
+    interface = {
+        "name": "ge-0/0/0",
+        "enabled": True,
+        "mtu": 9000,
+        "description": "uplink to core router",
+        "addresses": [{"ip": "10.0.0.1", "prefix-length": 31}, {"ip": "2001:db8::1", "prefix-length": 127}],
+        "counters": {"in-octets": 123456789, "out-octets": 987654321, "errors": None},
+    }
+    interface_size = len(json.dumps(interface))
+    return {"interfaces": [dict(interface, name="ge-0/0/{}".format(i)) for i in range(max(1, size // interface_size))]}
+
+
+def main():
+    print("protobuf implementation: {}".format(api_implementation.Type()))
+    print("{:>8} {:>14} {:>14} {:>8}".format("payload", "json (ms)", "direct (ms)", "speedup"))
+    for label, size in SIZES:
+        property_json = payload(size)
+        assert json_round_trip('action', property_json) == create_response_payload_from_json('action', property_json)
+        number = max(1, 1024 * 1024 // size)
+        json_time = min(timeit.repeat(lambda: json_round_trip('action', property_json), number=number, repeat=3)) / number
+        direct_time = min(timeit.repeat(lambda: create_response_payload_from_json('action', property_json),
+                                        number=number, repeat=3)) / number
+        print("{:>8} {:>14.3f} {:>14.3f} {:>7.1f}x".format(label, json_time * 1000, direct_time * 1000, json_time / direct_time))
+
+
+if __name__ == '__main__':
+    main()
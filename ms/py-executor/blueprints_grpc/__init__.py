@@ -16,4 +16,5 @@ from proto.BluePrintCommon_pb2 import *
 from proto.BluePrintProcessing_pb2 import *
 from .script_executor_configuration import *
 from .executor_utils import *
-from .blueprint_processing_server import *
\ No newline at end of file
+from .blueprint_processing_server import *
+from .async_blueprint_processing_server import *
\ No newline at end of file
@@ -0,0 +1,104 @@
+#!/usr/bin/python
+#
+#  Copyright © 2018-2019 AT&T Intellectual Property.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import asyncio
+from google.protobuf.json_format import MessageToJson
+from .blueprint_processing_server import AbstractScriptFunction, AsyncAbstractScriptFunction, BluePrintProcessingServer
+from .executor_utils import instance_for_input
+
+# Ends the responses of a sync script generator run in the executor
+_END = object()
+
+
+# BluePrintProcessingServer for the grpc.aio server (see asyncServer).
+# AsyncAbstractScriptFunction scripts run on the event loop, AbstractScriptFunction ones in the dispatch executor
+# (the loop default executor when streamConcurrency is 1), one thread hop per response.
+class AsyncBluePrintProcessingServer(BluePrintProcessingServer):
+
+    async def process(self, request_iterator, context):
+        if self.stream_concurrency > 1:
+            async for response in self.process_concurrently(request_iterator, context):
+                yield response
+            return
+        async for request in request_iterator:
+            async for response in self.process_request(request, context):
+                yield response
+
+    async def process_request(self, request, context):
+        loop = asyncio.get_event_loop()
+        jsonObj = MessageToJson(request.payload)
+        self.logger.info(jsonObj)
+        # Get the Dynamic Process Instance based on request, the blueprint scripts may have to be loaded
+        instance: AbstractScriptFunction = await loop.run_in_executor(None, instance_for_input,
+                                                                      self.configuration, request)
+        instance.set_context(context)
+        if isinstance(instance, AsyncAbstractScriptFunction):
+            async for response in instance.process(request):
+                yield response
+            return
+        responses = instance.process(request)
+        while True:
+            response = await loop.run_in_executor(self.dispatch_executor, next, responses, _END)
+            if response is _END:
+                return
+            yield response
+
+    # Processes the requests of the stream as they come, stream_concurrency at a time,
+    # and yields their responses as they are produced.
+    async def process_concurrently(self, request_iterator, context):
+        responses = asyncio.Queue()
+        slots = asyncio.Semaphore(self.stream_concurrency)
+        tasks = set()
+
+        async def run(request):
+            try:
+                async for response in self.process_request(request, context):
+                    await responses.put(response)
+            finally:
+                slots.release()
+
+        async def dispatch():
+            async for request in request_iterator:
+                await slots.acquire()
+                task = asyncio.ensure_future(run(request))
+                tasks.add(task)
+                task.add_done_callback(done)
+
+        def done(task):
+            tasks.discard(task)
+            # wakes up the consumer, which checks the task result and whether the stream is over
+            responses.put_nowait(task)
+
+        dispatcher = asyncio.ensure_future(dispatch())
+        dispatcher.add_done_callback(done)
+        try:
+            while not dispatcher.done() or tasks or not responses.empty():
+                response = await responses.get()
+                if isinstance(response, asyncio.Future):
+                    if not response.cancelled() and response.exception() is not None:
+                        raise response.exception()
+                else:
+                    yield response
+        finally:
+            pending = [dispatcher] + list(tasks)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            # requests which completed (maybe failed) after the one which ended the stream
+            while not responses.empty():
+                response = responses.get_nowait()
+                if isinstance(response, asyncio.Future) and not response.cancelled():
+                    response.exception()
@@ -15,11 +15,31 @@
 #  limitations under the License.
 
 import logging
+import queue
+import threading
+from concurrent import futures
 from google.protobuf.json_format import MessageToJson
 from proto import BluePrintProcessing_pb2_grpc as BluePrintProcessing_pb2_grpc
 from .script_executor_configuration import ScriptExecutorConfiguration
 from .executor_utils import instance_for_input
 
+# Marks the end of the responses of one request in the responses queue of a stream
+_REQUEST_DONE = object()
+
+
+# Responses queue entry: the number of requests of the stream, once all of them are dispatched
+class _AllDispatched:
+
+    def __init__(self, count):
+        self.count = count
+
+
+# Responses queue entry: the exception raised by a script or by the request iterator
+class _Failed:
+
+    def __init__(self, error):
+        self.error = error
+
 
 class AbstractScriptFunction:
 
@@ -33,17 +53,96 @@ class AbstractScriptFunction:
         pass
 
 
+# Script function for the asyncio server (see AsyncBluePrintProcessingServer): process is an async generator,
+# so waiting on I/O does not hold a thread. AbstractScriptFunction scripts keep working, they run in an executor.
+class AsyncAbstractScriptFunction(AbstractScriptFunction):
+
+    async def process(self, request):
+        return
+        yield
+
+
 class BluePrintProcessingServer(BluePrintProcessing_pb2_grpc.BluePrintProcessingServiceServicer):
 
     def __init__(self, configuration: ScriptExecutorConfiguration):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.configuration = configuration
+        # Requests of one stream processed at the same time, 1 processes them one after the other.
+        # Responses of concurrent requests are interleaved,
+        # the client correlates them with commonHeader requestId / subRequestId.
+        self.stream_concurrency = configuration.config.getint('scriptExecutor', 'streamConcurrency', fallback=1)
+        self.dispatch_executor = None
+        if self.stream_concurrency > 1:
+            dispatch_workers = configuration.config.getint('scriptExecutor', 'dispatchWorkers', fallback=20)
+            self.dispatch_executor = futures.ThreadPoolExecutor(max_workers=dispatch_workers,
+                                                                thread_name_prefix='dispatch')
 
     def process(self, request_iterator, context):
+        if self.dispatch_executor is not None:
+            yield from self.process_concurrently(request_iterator, context)
+            return
         for request in request_iterator:
-            jsonObj = MessageToJson(request.payload)
-            self.logger.info(jsonObj)
-            # Get the Dynamic Process Instance based on request
-            instance: AbstractScriptFunction = instance_for_input(self.configuration, request)
-            instance.set_context(context)
-            yield from instance.process(request)
+            yield from self.process_request(request, context)
+
+    def process_request(self, request, context):
+        jsonObj = MessageToJson(request.payload)
+        self.logger.info(jsonObj)
+        # Get the Dynamic Process Instance based on request
+        instance: AbstractScriptFunction = instance_for_input(self.configuration, request)
+        instance.set_context(context)
+        yield from instance.process(request)
+
+    # Fans the requests of the stream out to the dispatch executor, stream_concurrency at a time,
+    # and yields their responses as they are produced. Once the stream is closed (client gone, error),
+    # no more requests are dispatched and the running ones stop at their next response.
+    def process_concurrently(self, request_iterator, context):
+        responses = queue.Queue()
+        slots = threading.Semaphore(self.stream_concurrency)
+        cancelled = threading.Event()
+
+        # A script is only stopped between two responses: one blocked before its next yield keeps its dispatch
+        # thread until it returns or yields, even though the client went away.
+        def run(request):
+            try:
+                if cancelled.is_set():
+                    return
+                for response in self.process_request(request, context):
+                    if cancelled.is_set():
+                        break
+                    responses.put(response)
+            except Exception as error:
+                responses.put(_Failed(error))
+            finally:
+                slots.release()
+                responses.put(_REQUEST_DONE)
+
+        def dispatch():
+            dispatched = 0
+            try:
+                for request in request_iterator:
+                    slots.acquire()
+                    if cancelled.is_set():
+                        slots.release()
+                        break
+                    self.dispatch_executor.submit(run, request)
+                    dispatched += 1
+            except Exception as error:
+                responses.put(_Failed(error))
+            finally:
+                responses.put(_AllDispatched(dispatched))
+
+        threading.Thread(target=dispatch, name='dispatch-requests', daemon=True).start()
+        dispatched, done = None, 0
+        try:
+            while dispatched is None or done < dispatched:
+                response = responses.get()
+                if response is _REQUEST_DONE:
+                    done += 1
+                elif isinstance(response, _AllDispatched):
+                    dispatched = response.count
+                elif isinstance(response, _Failed):
+                    raise response.error
+                else:
+                    yield response
+        finally:
+            cancelled.set()
@@ -19,10 +19,12 @@ import importlib
 import importlib.util
 import json
 import logging
+import os
 import sys
+import threading
 import time
 
-from google.protobuf import json_format, struct_pb2
+from google.protobuf import struct_pb2
 from google.protobuf.timestamp_pb2 import Timestamp
 from proto.BluePrintCommon_pb2 import (
     EVENT_COMPONENT_EXECUTED,
@@ -58,22 +60,86 @@ def blueprint_location(config: ScriptExecutorConfiguration, input: ExecutionServ
     return config.blueprints_processor('blueprintDeployPath') + '/' + blueprint_name + '/' + blueprint_version
 
 
+def script_location(config: ScriptExecutorConfiguration, input: ExecutionServiceInput):
+    return blueprint_location(config, input) + '/' + 'Scripts/python/__init__.py'
+
+
+# Cheap fingerprint of the blueprint python scripts, checked on every request: Scripts/python (whose mtime changes
+# when a module is added, removed or replaced) and its __init__.py. A module edited in place is not seen,
+# the artifact manager invalidates the blueprint when it uploads it again (see ScriptModuleCache.invalidate).
+def scripts_fingerprint(script_location: str):
+    scripts_dir = os.stat(os.path.dirname(script_location))
+    init = os.stat(script_location)
+    return scripts_dir.st_ino, scripts_dir.st_mtime_ns, init.st_ino, init.st_mtime_ns, init.st_size
+
+
+# Blueprint script packages (Scripts/python), loaded once per blueprint name/version.
+# A loaded package is reused until the scripts fingerprint changes or the blueprint is invalidated
+# (the artifact manager uploaded or removed it), it is then reloaded along with its submodules.
+class ScriptModuleCache:
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.lock = threading.Lock()
+        # module name -> (fingerprint, module)
+        self.modules = {}
+        # module name -> lock held while the module loads
+        self.loading = {}
+
+    def get(self, blueprint_name: str, blueprint_version: str, script_location: str):
+        module_name = blueprint_name + '-' + blueprint_version
+        fingerprint = scripts_fingerprint(script_location)
+        cached = self.modules.get(module_name)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        with self.lock:
+            loading = self.loading.setdefault(module_name, threading.Lock())
+        with loading:
+            cached = self.modules.get(module_name)
+            if cached is not None and cached[0] == fingerprint:
+                return cached[1]
+            module = self.load(module_name, script_location)
+            # taken again once loaded: importing the submodules may have added Scripts/python/__pycache__
+            self.modules[module_name] = (scripts_fingerprint(script_location), module)
+            return module
+
+    def load(self, module_name: str, script_location: str):
+        self.logger.info("Loading {} from {}".format(module_name, script_location))
+        self.unload(module_name)
+        spec = importlib.util.spec_from_file_location(module_name, script_location)
+        dynamic_module = importlib.util.module_from_spec(spec)
+        # Add blueprint modules
+        sys.modules[spec.name] = dynamic_module
+        try:
+            spec.loader.exec_module(dynamic_module)
+        except BaseException:
+            self.unload(module_name)
+            raise
+        return dynamic_module
+
+    # Drops the package and its submodules from sys.modules, so that they are imported again.
+    def unload(self, module_name: str):
+        for name in [name for name in sys.modules if name == module_name or name.startswith(module_name + '.')]:
+            sys.modules.pop(name, None)
+
+    # Invalidation hook, called when a blueprint is uploaded or removed.
+    def invalidate(self, blueprint_name: str, blueprint_version: str):
+        module_name = blueprint_name + '-' + blueprint_version
+        with self.loading.get(module_name) or threading.Lock():
+            if self.modules.pop(module_name, None) is not None:
+                self.logger.info("Invalidated {}".format(module_name))
+            self.unload(module_name)
+
+
+script_module_cache = ScriptModuleCache()
+
+
 def instance_for_input(config: ScriptExecutorConfiguration, input: ExecutionServiceInput):
     blueprint_name = input.actionIdentifiers.blueprintName
     blueprint_version = input.actionIdentifiers.blueprintVersion
     action_name = input.actionIdentifiers.actionName
-    # Get Blueprint python script location
-    script_location = blueprint_location(config, input) + '/' + 'Scripts/python/__init__.py'
-    logger.info(script_location)
-
-    # Create Dynamic Module Name
-    module_name = blueprint_name + '-' + blueprint_version
-    spec = importlib.util.spec_from_file_location(module_name, script_location)
-    logger.info(spec)
-    dynamic_module = importlib.util.module_from_spec(spec)
-    # Add blueprint modules
-    sys.modules[spec.name] = dynamic_module
-    spec.loader.exec_module(dynamic_module)
+    # Get the blueprint python scripts, loaded on the first request
+    dynamic_module = script_module_cache.get(blueprint_name, blueprint_version, script_location(config, input))
     script_clazz = getattr(dynamic_module, action_name)
     return script_clazz()
 
@@ -140,13 +206,59 @@ def failure_response(input: ExecutionServiceInput, property_json: json, error_co
                                   actionIdentifiers=input.actionIdentifiers, status=status, payload=payload_struct)
 
 
+# Nesting levels allowed in a response payload, keeps fill_value (recursive) clear of the interpreter recursion limit.
+# There is no byte size guard: the size of a response is bounded by the gRPC max message size when it is sent.
+MAX_PAYLOAD_DEPTH = 100
+
+
 def create_response_payload_from_json(action_name, property_json: json):
-    # Create response Pay load json from property Json
+    # Create response Pay load Struct from property Json (dict, list, scalar or an already built Struct)
     payload_key = action_name + '-response'
-    response_payload = {}
-    response_payload[payload_key] = property_json
-    response_payload_json = json.dumps(response_payload)
-    # Create Struct from Json
     payload_struct = struct_pb2.Struct()
-    json_format.Parse(str(response_payload_json), payload_struct, ignore_unknown_fields=True)
+    fill_value(payload_struct.fields[payload_key], property_json, 1)
     return payload_struct
+
+
+# Fills a google.protobuf.Value in place from a json like value, without a JSON round trip.
+# Non string dict keys are converted the way json.dumps does.
+def fill_value(value_pb: struct_pb2.Value, value, depth: int = 0):
+    if depth > MAX_PAYLOAD_DEPTH:
+        raise ValueError("Response payload exceeds the maximum depth {}".format(MAX_PAYLOAD_DEPTH))
+    if value is None:
+        value_pb.null_value = struct_pb2.NULL_VALUE
+    elif isinstance(value, bool):
+        value_pb.bool_value = value
+    elif isinstance(value, (int, float)):
+        value_pb.number_value = value
+    elif isinstance(value, str):
+        value_pb.string_value = value
+    elif isinstance(value, dict):
+        fields = value_pb.struct_value.fields
+        if not value:
+            value_pb.struct_value.SetInParent()
+        for key, item in value.items():
+            fill_value(fields[key if isinstance(key, str) else json_key(key)], item, depth + 1)
+    elif isinstance(value, (list, tuple)):
+        values = value_pb.list_value.values
+        if not value:
+            value_pb.list_value.SetInParent()
+        for item in value:
+            fill_value(values.add(), item, depth + 1)
+    elif isinstance(value, struct_pb2.Struct):
+        value_pb.struct_value.CopyFrom(value)
+    elif isinstance(value, struct_pb2.ListValue):
+        value_pb.list_value.CopyFrom(value)
+    elif isinstance(value, struct_pb2.Value):
+        value_pb.CopyFrom(value)
+    else:
+        raise TypeError("Object of type {} is not JSON serializable".format(value.__class__.__name__))
+
+
+def json_key(key):
+    if key is None:
+        return 'null'
+    if isinstance(key, bool):
+        return 'true' if key else 'false'
+    if isinstance(key, (int, float)):
+        return json.dumps(key)
+    raise TypeError("keys must be str, int, float, bool or None, not {}".format(key.__class__.__name__))
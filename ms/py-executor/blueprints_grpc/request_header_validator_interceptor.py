@@ -38,3 +38,36 @@ class RequestHeaderValidatorInterceptor(grpc.ServerInterceptor):
             return continuation(handler_call_details)
         else:
             return self._terminator
+
+
+def _async_unary_unary_rpc_terminator(code, details):
+    async def terminate(ignored_request, context):
+        await context.abort(code, details)
+
+    return grpc.unary_unary_rpc_method_handler(terminate)
+
+
+def _async_stream_stream_rpc_terminator(code, details):
+    async def terminate(ignored_request_iterator, context):
+        await context.abort(code, details)
+
+    return grpc.stream_stream_rpc_method_handler(terminate)
+
+
+# grpc.aio rejects a terminator of another kind than the call, the process call is a bidirectional stream
+class AsyncRequestHeaderValidatorInterceptor(grpc.aio.ServerInterceptor):
+
+    def __init__(self, header, value, code, details):
+        self._header = header
+        self._value = value
+        self._terminator = _async_unary_unary_rpc_terminator(code, details)
+        self._stream_terminator = _async_stream_stream_rpc_terminator(code, details)
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if (self._header, self._value) in handler_call_details.invocation_metadata:
+            return handler
+        elif handler is not None and handler.request_streaming and handler.response_streaming:
+            return self._stream_terminator
+        else:
+            return self._terminator
@@ -0,0 +1,116 @@
+#
+#  Copyright © 2018-2019 AT&T Intellectual Property.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import asyncio
+import gc
+import time
+from unittest.mock import patch
+
+from pytest import fixture
+
+from blueprints_grpc.async_blueprint_processing_server import AsyncBluePrintProcessingServer
+from blueprints_grpc.blueprint_processing_server import AbstractScriptFunction, AsyncAbstractScriptFunction
+from blueprints_grpc.script_executor_configuration import ScriptExecutorConfiguration
+from proto.BluePrintProcessing_pb2 import ExecutionServiceInput
+
+
+class SleepingScript(AsyncAbstractScriptFunction):
+    """Yields ('request id', 'start') then ('request id', 'done') after payload sleep seconds, fails on payload fail."""
+
+    async def process(self, request):
+        yield request.commonHeader.requestId, "start"
+        await asyncio.sleep(request.payload["sleep"])
+        if request.payload["fail"]:
+            raise ValueError("{} failed".format(request.commonHeader.requestId))
+        yield request.commonHeader.requestId, "done"
+
+
+class SyncSleepingScript(AbstractScriptFunction):
+    """SleepingScript as a sync script, run in the executor."""
+
+    def process(self, request):
+        yield request.commonHeader.requestId, "start"
+        time.sleep(request.payload["sleep"])
+        if request.payload["fail"]:
+            raise ValueError("{} failed".format(request.commonHeader.requestId))
+        yield request.commonHeader.requestId, "done"
+
+
+async def requests(*sleeps, fail=(), action="SleepingScript"):
+    for i, sleep in enumerate(sleeps):
+        request = ExecutionServiceInput()
+        request.commonHeader.requestId = "r{}".format(i)
+        request.actionIdentifiers.actionName = action
+        request.payload["sleep"] = sleep
+        request.payload["fail"] = i in fail
+        yield request
+
+
+def server(tmp_path, stream_concurrency):
+    configuration_file = tmp_path / "configuration.ini"
+    configuration_file.write_text(
+        "[scriptExecutor]\nstreamConcurrency={}\ndispatchWorkers=10\n".format(stream_concurrency)
+    )
+    return AsyncBluePrintProcessingServer(ScriptExecutorConfiguration(str(configuration_file)))
+
+
+# Returns the result of coroutine, or the exception it raised
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    errors = []
+    loop.set_exception_handler(lambda loop, context: errors.append(context["message"]))
+    try:
+        result = loop.run_until_complete(coroutine)
+    except Exception as error:
+        # the traceback would keep the tasks of the stream alive
+        error.__traceback__ = None
+        result = error
+    gc.collect()
+    loop.close()
+    # e.g. "Task exception was never retrieved"
+    assert errors == []
+    return result
+
+
+async def collect(responses):
+    return [response async for response in responses]
+
+
+@fixture(autouse=True)
+def fake_instance_for_input():
+    scripts = {"SleepingScript": SleepingScript, "SyncSleepingScript": SyncSleepingScript}
+    fake = lambda config, request: scripts[request.actionIdentifiers.actionName]()  # noqa: E731
+    with patch("blueprints_grpc.async_blueprint_processing_server.instance_for_input", fake):
+        yield
+
+
+def test_async_process_sequentially(tmp_path):
+    for action in ("SleepingScript", "SyncSleepingScript"):
+        responses = run(collect(server(tmp_path, 1).process(requests(0.2, 0.0, action=action), None)))
+        assert responses == [("r0", "start"), ("r0", "done"), ("r1", "start"), ("r1", "done")]
+
+
+def test_async_process_concurrently_in_completion_order(tmp_path):
+    for action in ("SleepingScript", "SyncSleepingScript"):
+        responses = run(collect(server(tmp_path, 3).process(requests(0.6, 0.0, 0.3, action=action), None)))
+        done = [response for response in responses if response[1] == "done"]
+        assert done == [("r1", "done"), ("r2", "done"), ("r0", "done")]
+
+
+def test_async_process_concurrently_retrieves_all_failures(tmp_path):
+    for action in ("SleepingScript", "SyncSleepingScript"):
+        error = run(collect(server(tmp_path, 3).process(requests(0.0, 0.0, 0.0, fail=(0, 1, 2), action=action), None)))
+        assert isinstance(error, ValueError)
+        assert str(error) in ("r0 failed", "r1 failed", "r2 failed")
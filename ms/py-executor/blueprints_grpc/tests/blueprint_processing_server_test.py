@@ -0,0 +1,113 @@
+#
+#  Copyright © 2018-2019 AT&T Intellectual Property.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import threading
+import time
+from unittest.mock import patch
+
+from pytest import fixture, raises
+
+from blueprints_grpc.blueprint_processing_server import AbstractScriptFunction, BluePrintProcessingServer
+from blueprints_grpc.script_executor_configuration import ScriptExecutorConfiguration
+from proto.BluePrintProcessing_pb2 import ExecutionServiceInput
+
+
+class SleepingScript(AbstractScriptFunction):
+    """Yields ('request id', 'start') then ('request id', 'done') after payload sleep seconds, fails on payload fail."""
+
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def process(self, request):
+        request_id = request.commonHeader.requestId
+        with self.lock:
+            SleepingScript.running += 1
+            SleepingScript.max_running = max(SleepingScript.max_running, SleepingScript.running)
+        try:
+            yield request_id, "start"
+            time.sleep(request.payload["sleep"])
+            if request.payload["fail"]:
+                raise ValueError("{} failed".format(request_id))
+            yield request_id, "done"
+        finally:
+            with self.lock:
+                SleepingScript.running -= 1
+
+
+def requests(*sleeps, fail=(), consumed=None):
+    for i, sleep in enumerate(sleeps):
+        request = ExecutionServiceInput()
+        request.commonHeader.requestId = "r{}".format(i)
+        request.payload["sleep"] = sleep
+        request.payload["fail"] = i in fail
+        if consumed is not None:
+            consumed.append(request.commonHeader.requestId)
+        yield request
+
+
+def server(tmp_path, stream_concurrency):
+    configuration_file = tmp_path / "configuration.ini"
+    configuration_file.write_text(
+        "[scriptExecutor]\nstreamConcurrency={}\ndispatchWorkers=10\n".format(stream_concurrency)
+    )
+    return BluePrintProcessingServer(ScriptExecutorConfiguration(str(configuration_file)))
+
+
+@fixture(autouse=True)
+def fake_instance_for_input():
+    SleepingScript.running = SleepingScript.max_running = 0
+    fake = lambda config, request: SleepingScript()  # noqa: E731
+    with patch("blueprints_grpc.blueprint_processing_server.instance_for_input", fake):
+        yield
+        # scripts of a closed stream finish in the background
+        deadline = time.time() + 5
+        while SleepingScript.running and time.time() < deadline:
+            time.sleep(0.05)
+
+
+def test_process_sequentially(tmp_path):
+    responses = list(server(tmp_path, 1).process(requests(0.2, 0.0), None))
+    assert responses == [("r0", "start"), ("r0", "done"), ("r1", "start"), ("r1", "done")]
+    assert SleepingScript.max_running == 1
+
+
+def test_process_concurrently_in_completion_order(tmp_path):
+    responses = list(server(tmp_path, 3).process(requests(0.6, 0.0, 0.3), None))
+    done = [response for response in responses if response[1] == "done"]
+    assert done == [("r1", "done"), ("r2", "done"), ("r0", "done")]
+    assert sorted(responses) == sorted([("r{}".format(i), step) for i in range(3) for step in ("start", "done")])
+
+
+def test_process_concurrently_per_stream_limit(tmp_path):
+    responses = list(server(tmp_path, 2).process(requests(*[0.1] * 6), None))
+    assert len(responses) == 12
+    assert SleepingScript.max_running == 2
+
+
+def test_process_concurrently_propagates_exceptions(tmp_path):
+    with raises(ValueError, match="r1 failed"):
+        list(server(tmp_path, 3).process(requests(0.3, 0.0, 0.3, fail=(1,)), None))
+
+
+def test_process_concurrently_stops_dispatching_on_cancel(tmp_path):
+    consumed = []
+    responses = server(tmp_path, 2).process(requests(*[0.2] * 10, consumed=consumed), None)
+    assert next(responses)[1] == "start"
+    # the client went away
+    responses.close()
+    time.sleep(1)
+    assert len(consumed) <= 3
+    assert SleepingScript.running == 0
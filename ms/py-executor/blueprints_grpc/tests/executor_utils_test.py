@@ -0,0 +1,162 @@
+#
+#  Copyright © 2018-2019 AT&T Intellectual Property.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+import os
+import sys
+
+from google.protobuf import json_format, struct_pb2
+from pytest import mark, raises
+
+from blueprints_grpc.executor_utils import MAX_PAYLOAD_DEPTH, ScriptModuleCache, create_response_payload_from_json
+
+SCRIPT = """
+from .helper import VALUE
+
+
+class Action:
+    def value(self):
+        return VALUE
+"""
+
+
+def write_blueprint(root, value):
+    scripts_dir = os.path.join(root, "Scripts", "python")
+    os.makedirs(scripts_dir, exist_ok=True)
+    with open(os.path.join(scripts_dir, "__init__.py"), "w") as f:
+        f.write(SCRIPT)
+    with open(os.path.join(scripts_dir, "helper.py"), "w") as f:
+        f.write("VALUE = {!r}\n".format(value))
+    return os.path.join(scripts_dir, "__init__.py")
+
+
+def touch_later(path):
+    # make sure the new mtime differs from the previous one, whatever the file system timestamp resolution
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+
+def test_script_module_cache_reuses_loaded_module(tmp_path):
+    cache = ScriptModuleCache()
+    script_location = write_blueprint(str(tmp_path), "first")
+    module = cache.get("cache-test", "1.0.0", script_location)
+    assert module.Action().value() == "first"
+    assert cache.get("cache-test", "1.0.0", script_location) is module
+    assert sys.modules["cache-test-1.0.0"] is module
+    cache.invalidate("cache-test", "1.0.0")
+
+
+def test_script_module_cache_reloads_on_change(tmp_path):
+    cache = ScriptModuleCache()
+    script_location = write_blueprint(str(tmp_path), "first")
+    module = cache.get("cache-test", "2.0.0", script_location)
+    assert module.Action().value() == "first"
+
+    # new helper module: its submodule is reloaded along with the package
+    write_blueprint(str(tmp_path), "second")
+    touch_later(script_location)
+    reloaded = cache.get("cache-test", "2.0.0", script_location)
+    assert reloaded is not module
+    assert reloaded.Action().value() == "second"
+    assert cache.get("cache-test", "2.0.0", script_location) is reloaded
+    cache.invalidate("cache-test", "2.0.0")
+
+
+def test_script_module_cache_invalidate(tmp_path):
+    cache = ScriptModuleCache()
+    script_location = write_blueprint(str(tmp_path), "first")
+    module = cache.get("cache-test", "3.0.0", script_location)
+
+    # edited in place, without a new fingerprint: seen after the invalidation only
+    with open(os.path.join(os.path.dirname(script_location), "helper.py"), "w") as f:
+        f.write("VALUE = 'edited'\n")
+    cache.invalidate("cache-test", "3.0.0")
+    assert "cache-test-3.0.0" not in sys.modules
+    assert "cache-test-3.0.0.helper" not in sys.modules
+
+    reloaded = cache.get("cache-test", "3.0.0", script_location)
+    assert reloaded is not module
+    assert reloaded.Action().value() == "edited"
+    cache.invalidate("cache-test", "3.0.0")
+
+
+def json_round_trip(action_name, property_json):
+    # how create_response_payload_from_json used to build the payload
+    payload_struct = struct_pb2.Struct()
+    response_payload_json = json.dumps({action_name + "-response": property_json})
+    json_format.Parse(response_payload_json, payload_struct, ignore_unknown_fields=True)
+    return payload_struct
+
+
+@mark.parametrize(
+    "property_json",
+    [
+        {"key": "value", "number": 1, "float": 2.5, "bool": False, "null": None, "nested": {"list": [1, "two", None]}},
+        {1: "int key", 2.5: "float key", None: "null key"},
+        {True: "bool key"},
+        {},
+        [],
+        {"empty": {}, "empty_list": [], "nested": [[], {}]},
+        (1, "two", (3,)),
+        None,
+        "string",
+        42,
+        {"unicode": "\u00e9\u2603"},
+    ],
+)
+def test_create_response_payload_from_json_as_json_round_trip(property_json):
+    assert create_response_payload_from_json("action", property_json) == json_round_trip("action", property_json)
+
+
+def test_create_response_payload_from_protobuf_values():
+    struct = struct_pb2.Struct()
+    struct.update({"key": [1, {"nested": "value"}]})
+    assert create_response_payload_from_json("action", struct) == json_round_trip(
+        "action", {"key": [1, {"nested": "value"}]}
+    )
+
+    list_value = struct_pb2.ListValue()
+    list_value.extend([1, "two", None])
+    assert create_response_payload_from_json("action", list_value) == json_round_trip("action", [1, "two", None])
+
+    value = struct_pb2.Value(string_value="value")
+    assert create_response_payload_from_json("action", value) == json_round_trip("action", "value")
+
+    assert create_response_payload_from_json("action", {"struct": struct, "values": [value]}) == json_round_trip(
+        "action", {"struct": {"key": [1, {"nested": "value"}]}, "values": ["value"]}
+    )
+
+
+def test_create_response_payload_depth_guard():
+    def nested(depth):
+        property_json = []
+        for _ in range(depth - 1):
+            property_json = [property_json]
+        return property_json
+
+    # the response key takes one level
+    payload = create_response_payload_from_json("action", nested(MAX_PAYLOAD_DEPTH - 1))
+    assert payload.ByteSize() > 0
+    with raises(ValueError, match="maximum depth"):
+        create_response_payload_from_json("action", nested(MAX_PAYLOAD_DEPTH + 1))
+
+
+def test_create_response_payload_unsupported_types():
+    with raises(TypeError, match="not JSON serializable"):
+        create_response_payload_from_json("action", {"key": object()})
+    with raises(TypeError, match="not JSON serializable"):
+        create_response_payload_from_json("action", {"key": b"bytes"})
+    with raises(TypeError, match="keys must be"):
+        create_response_payload_from_json("action", {("tuple", "key"): "value"})
@@ -15,6 +15,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import asyncio
 import logging
 import os
 import time
@@ -29,7 +30,12 @@ from proto.BluePrintManagement_pb2_grpc import add_BluePrintManagementServiceSer
 
 from blueprints_grpc import BluePrintProcessing_pb2_grpc, ScriptExecutorConfiguration
 from blueprints_grpc.blueprint_processing_server import BluePrintProcessingServer
-from blueprints_grpc.request_header_validator_interceptor import RequestHeaderValidatorInterceptor
+from blueprints_grpc.async_blueprint_processing_server import AsyncBluePrintProcessingServer
+from blueprints_grpc.executor_utils import script_module_cache
+from blueprints_grpc.request_header_validator_interceptor import (
+    RequestHeaderValidatorInterceptor,
+    AsyncRequestHeaderValidatorInterceptor
+)
 
 logger = logging.getLogger("Server")
 
@@ -41,6 +47,10 @@ def serve(configuration: ScriptExecutorConfiguration):
     authType = configuration.script_executor_property('authType')
     maxWorkers = configuration.script_executor_property('maxWorkers')
 
+    if configuration.config.getboolean('scriptExecutor', 'asyncServer', fallback=False):
+        asyncio.get_event_loop().run_until_complete(serve_async(configuration))
+        return
+
     if authType == 'tls-auth':
         cert_chain_file = configuration.script_executor_property('certChain')
         private_key_file = configuration.script_executor_property('privateKey')
@@ -60,7 +70,9 @@ def serve(configuration: ScriptExecutorConfiguration):
         BluePrintProcessing_pb2_grpc.add_BluePrintProcessingServiceServicer_to_server(
             BluePrintProcessingServer(configuration), server
         )
-        add_BluePrintManagementServiceServicer_to_server(ArtifactManagerServicer(), server)
+        add_BluePrintManagementServiceServicer_to_server(
+            ArtifactManagerServicer(blueprint_listeners=(script_module_cache.invalidate,)), server
+        )
 
         # add secure port using credentials
         server.add_secure_port('[::]:' + port, server_credentials)
@@ -77,7 +89,9 @@ def serve(configuration: ScriptExecutorConfiguration):
         BluePrintProcessing_pb2_grpc.add_BluePrintProcessingServiceServicer_to_server(
             BluePrintProcessingServer(configuration), server
         )
-        add_BluePrintManagementServiceServicer_to_server(ArtifactManagerServicer(), server)
+        add_BluePrintManagementServiceServicer_to_server(
+            ArtifactManagerServicer(blueprint_listeners=(script_module_cache.invalidate,)), server
+        )
 
         server.add_insecure_port('[::]:' + port)
         server.start()
@@ -91,6 +105,54 @@ def serve(configuration: ScriptExecutorConfiguration):
         server.stop(0)
 
 
+# grpc.aio server: process streams are served on the event loop instead of holding one of maxWorkers threads each,
+# the artifact manager (sync) and the blocking work of the scripts run in a pool of maxWorkers threads.
+async def serve_async(configuration: ScriptExecutorConfiguration):
+    port = configuration.script_executor_property('port')
+    authType = configuration.script_executor_property('authType')
+    maxWorkers = configuration.script_executor_property('maxWorkers')
+
+    thread_pool = futures.ThreadPoolExecutor(max_workers=int(maxWorkers))
+    asyncio.get_event_loop().set_default_executor(thread_pool)
+
+    interceptors = ()
+    if authType != 'tls-auth':
+        logger.info("Setting GRPC server base authentication")
+        basic_auth = configuration.script_executor_property('token')
+        interceptors = (AsyncRequestHeaderValidatorInterceptor(
+            'authorization', basic_auth, grpc.StatusCode.UNAUTHENTICATED,
+            'Access denied!'),)
+
+    server = grpc.aio.server(migration_thread_pool=thread_pool, interceptors=interceptors)
+    BluePrintProcessing_pb2_grpc.add_BluePrintProcessingServiceServicer_to_server(
+        AsyncBluePrintProcessingServer(configuration), server
+    )
+    add_BluePrintManagementServiceServicer_to_server(
+        ArtifactManagerServicer(blueprint_listeners=(script_module_cache.invalidate,)), server
+    )
+
+    if authType == 'tls-auth':
+        cert_chain_file = configuration.script_executor_property('certChain')
+        private_key_file = configuration.script_executor_property('privateKey')
+        logger.info("Setting GRPC server TLS authentication, cert file(%s) private key file(%s)", cert_chain_file,
+                    private_key_file)
+        with open(cert_chain_file, 'rb') as f:
+            certificate_chain = f.read()
+        with open(private_key_file, 'rb') as f:
+            private_key = f.read()
+        server.add_secure_port('[::]:' + port, grpc.ssl_server_credentials(((private_key, certificate_chain),)))
+    else:
+        server.add_insecure_port('[::]:' + port)
+    await server.start()
+
+    logger.info("Command Executor Server (asyncio) started on %s" % port)
+
+    try:
+        await server.wait_for_termination()
+    except KeyboardInterrupt:
+        await server.stop(0)
+
+
 if __name__ == '__main__':
     default_configuration_file = str(PurePath(Path().absolute(), "../../configuration.ini"))
     supplied_configuration_file = os.environ.get("CONFIGURATION")